@@ -0,0 +1,178 @@
+"""
+Admission Control for Hotel Management
+This module provides:
+1. A gate per expensive route class (single receipt PDFs, streamed receipt
+   batches): a bounded number of requests render at once and a bounded number
+   wait for a slot; the rest are turned away at once with 503 + Retry-After,
+   so cheap routes (dashboard, room status, check-in) keep their latency
+2. A Retry-After estimate from the recent service time of the class
+3. A depth limit on queued Excel exports (HOTEL_EXPORT_QUEUE), shared by every
+   worker through the job queue
+4. Gauges for /metrics (running and waiting requests per class); admitted
+   waits and rejections are counted in metrics.py
+
+Limits are per worker process: HOTEL_ADMISSION="pdf=2:8, batch=1:1" sets
+class=running:waiting.
+"""
+
+import os
+import math
+import time
+import threading
+
+from metrics import ADMISSION_WAIT_SECONDS, ADMISSION_REJECTED
+
+# Route class -> (requests rendering at once, requests allowed to wait for a slot)
+DEFAULT_LIMITS = {'pdf': (2, 8), 'batch': (1, 1)}
+
+# Seconds a request waits for a slot before it is turned away
+ADMISSION_WAIT = float(os.environ.get('HOTEL_ADMISSION_WAIT', '5'))
+
+# Excel exports queued or running (all workers) before new ones are turned away
+EXPORT_QUEUE_DEPTH = int(os.environ.get('HOTEL_EXPORT_QUEUE', '10'))
+
+# Retry-After of a turned away export: roughly one large workbook
+EXPORT_RETRY_AFTER = 30
+
+# Retry-After bounds, in seconds
+RETRY_AFTER_MIN = 1
+RETRY_AFTER_MAX = 60
+
+# What admit() returns instead of a ticket for a class without a gate (never queued)
+NOT_GATED = object()
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def parse_limits(spec):
+    """'pdf=2:8, batch=1' -> {'pdf': (2, 8), 'batch': (1, 0)}"""
+    limits = {}
+    for item in spec.split(','):
+        name, _, value = item.partition('=')
+        if not name.strip() or not value.strip():
+            continue
+        running, _, waiting = value.partition(':')
+        limits[name.strip()] = (max(1, int(running)), max(0, int(waiting or 0)))
+    return limits
+
+
+class Ticket:
+    """A slot held by one request; release() is safe to call more than once"""
+
+    def __init__(self, gate):
+        self.gate = gate
+        self.started = time.perf_counter()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.gate.leave(time.perf_counter() - self.started)
+
+
+class AdmissionGate:
+    """At most `limit` requests of one class inside, `depth` more waiting, the rest rejected"""
+
+    def __init__(self, name, limit, depth, timeout=None):
+        self.name = name
+        self.limit = limit
+        self.depth = depth
+        self.timeout = ADMISSION_WAIT if timeout is None else timeout
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.busy_seconds = 0.0
+        self._condition = threading.Condition()
+
+    def enter(self):
+        """A Ticket once a slot is free, or None if the queue is full or the wait timed out"""
+        started = time.perf_counter()
+        with self._condition:
+            if self.running >= self.limit:
+                if self.waiting >= self.depth:
+                    ADMISSION_REJECTED.inc((self.name, 'queue_full'))
+                    return None
+                self.waiting += 1
+                try:
+                    if not self._condition.wait_for(lambda: self.running < self.limit, self.timeout):
+                        ADMISSION_REJECTED.inc((self.name, 'timeout'))
+                        return None
+                finally:
+                    self.waiting -= 1
+            self.running += 1
+        ADMISSION_WAIT_SECONDS.observe((self.name,), time.perf_counter() - started)
+        return Ticket(self)
+
+    def leave(self, seconds):
+        with self._condition:
+            self.running -= 1
+            self.completed += 1
+            self.busy_seconds += seconds
+            self._condition.notify()
+
+    def retry_after(self):
+        """Whole seconds until the requests ahead of a new one should be done"""
+        with self._condition:
+            mean = self.busy_seconds / self.completed if self.completed else 1.0
+            ahead = self.running + self.waiting
+        return min(RETRY_AFTER_MAX, max(RETRY_AFTER_MIN, math.ceil(mean * ahead / self.limit)))
+
+    def snapshot(self):
+        """(running, waiting, limit, depth)"""
+        with self._condition:
+            return self.running, self.waiting, self.limit, self.depth
+
+
+def configure_admission(limits=None, timeout=None):
+    """Replace the gates (limits: {class: (running, waiting)}); returns them"""
+    global _gates
+    if limits is None:
+        limits = dict(DEFAULT_LIMITS, **parse_limits(os.environ.get('HOTEL_ADMISSION', '')))
+    with _gates_lock:
+        _gates = {name: AdmissionGate(name, running, waiting, timeout)
+                  for name, (running, waiting) in limits.items()}
+        return dict(_gates)
+
+
+def gates():
+    """{class: AdmissionGate} of this process"""
+    return dict(_gates)
+
+
+def admit(route_class):
+    """(ticket, None) for a request of `route_class`, (None, retry_after seconds) if it is turned away,
+    or (NOT_GATED, None) if the class has no gate"""
+    gate = _gates.get(route_class)
+    if gate is None:
+        return NOT_GATED, None
+    ticket = gate.enter()
+    if ticket is None:
+        return None, gate.retry_after()
+    return ticket, None
+
+
+def release_after(chunks, ticket):
+    """Pass a streamed body through, keeping the ticket until it is sent or abandoned.
+
+    A body that is never iterated (HEAD, client gone) never runs this generator's finally: also
+    register ticket.release with response.call_on_close.
+    """
+    try:
+        yield from chunks
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+        ticket.release()
+
+
+def export_queue_full(pending):
+    """True (and counted) when `pending` queued or running exports reach EXPORT_QUEUE_DEPTH"""
+    if pending < EXPORT_QUEUE_DEPTH:
+        return False
+    ADMISSION_REJECTED.inc(('export', 'queue_full'))
+    return True
+
+
+configure_admission()
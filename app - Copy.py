@@ -4,43 +4,229 @@ This is the main entry point for the Aggarwal Bhawan management web application.
 Handles 157 rooms with tourist check-in, PDF receipts, Excel reports, calendar view, and search functionality.
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file
-from flask_session import Session
+from flask import Flask, render_template, stream_template, request, redirect, url_for, session, flash, jsonify, send_file, g
 import sqlite3
 import hashlib
 import os
-import pandas as pd
 from datetime import datetime, timedelta
 import json
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
 import tempfile
 import re
+import io
+import time
+import logging
+from app_logging import setup_logging
 from receipt_system import (
     get_next_receipt_number, 
+    allocate_receipt_number,
+    ensure_receipt_counter,
     generate_receipt_with_number, 
-    generate_custom_hindi_receipt,
     search_tourists,
-    get_tourist_full_data
+    SEARCH_PAGE_SIZE,
+    get_tourist_full_data,
+    get_receipt_batch_data
 )
+from database import DATABASE_PATH, get_db, close_db, ensure_indexes, configure as configure_database
+from metrics import (
+    TimedConnection,
+    start_request,
+    finish_request,
+    current_stats,
+    count_streamed,
+    finish_streamed,
+    timed_pdf,
+    is_authorized,
+    render_metrics
+)
+from profiling import (
+    RequestProfile,
+    requested_kind,
+    list_profiles,
+    profile_file,
+    profile_summary,
+    PROFILE_SAMPLE_RATE
+)
+from receipt_template import warm_receipt_templates
+from receipt_batch import stream_batch, BATCH_FORMATS
+from excel_export import report_range, report_rows, report_filename, write_report
+from artifacts import ensure_artifact_schema, load_artifact, spool_artifact, clean_artifact_files
+from jobs import (
+    ensure_job_schema,
+    enqueue_job,
+    job_status,
+    job_counts,
+    latest_job,
+    job_handler,
+    JobError,
+    start_job_processes,
+    default_job_workers
+)
+from sessions import SqliteSessionInterface, ensure_session_schema
+from admission import admit, release_after, export_queue_full, EXPORT_RETRY_AFTER, NOT_GATED
+from occupancy import RoomOccupancy, ensure_occupancy_schema, bump_generation, stay_nights
+from search_index import ensure_search_index
+from room_events import RoomStatusBroker
+from room_calendar import CalendarCache, month_range, calendar_payload
+from daily_stats import (
+    ensure_daily_stats_schema,
+    record_stay_change,
+    stay_row,
+    day_stats,
+    stats_between,
+    payment_totals
+)
+from group_checkin import (
+    parse_member_lines,
+    group_members,
+    validate_group,
+    check_in_group,
+    SHARED_FIELDS,
+    GROUP_MAX_MEMBERS
+)
+from profiles import ProfilePage, profile_page, profile_counts, PROFILE_PAGE_SIZE, PROFILE_PAGE_MAX
+from receipt_cache import (
+    receipt_cache_key,
+    cached_receipt_pdf,
+    invalidate_receipts,
+    ensure_receipt_cache_schema
+)
+
+# Leveled, queue-backed logging (HOTEL_LOG_LEVEL / HOTEL_LOG_LEVELS)
+setup_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = 'aggarwal_bhawan_secret_key_2025'  # Change this in production
 
-# Configure session to use filesystem
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
+# Sessions live in the app's database, with indexed expiry (see sessions.py)
+app.session_interface = SqliteSessionInterface()
+
+# Return pooled database connections at the end of every request
+app.teardown_appcontext(close_db)
+
+# Time every SQL statement run through pooled connections (see /metrics)
+configure_database(connection_factory=TimedConnection)
+
+@app.before_request
+def start_request_metrics():
+    """Start timing the request (route template, not the raw path, keeps the label set small)"""
+    start_request(request.url_rule.rule if request.url_rule else 'unmatched', request.method)
+
+@app.after_request
+def record_response_metrics(response):
+    """Note status and size; streamed bodies are counted as they are sent"""
+    stats = current_stats()
+    if stats is not None:
+        stats.status = response.status_code
+        if response.content_length is not None:
+            stats.response_bytes = response.content_length
+        elif response.is_sequence:
+            stats.response_bytes = response.calculate_content_length() or 0
+        else:
+            stats.streaming = True
+            response.response = count_streamed(response.response, stats)
+            # The server closes every response, even one whose body is never read (HEAD, client gone)
+            response.call_on_close(lambda: finish_streamed(stats))
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exception=None):
+    """Record the request unless its body is still streaming"""
+    stats = current_stats()
+    if stats is not None and not stats.streaming:
+        if exception is not None or not stats.status:
+            stats.status = 500
+        finish_request(stats)
+
+# Registered after the metrics hooks: starts after them and (teardown runs in reverse) stops first
+@app.before_request
+def start_request_profile():
+    """Profile this request if an admin asked for it or it was sampled (see /admin/profiles)"""
+    kind = requested_kind(request.headers, request.args, session)
+    if kind:
+        g.request_profile = RequestProfile(kind, request.url_rule.rule if request.url_rule else 'unmatched',
+                                           request.method, request.path)
+
+@app.teardown_request
+def finish_request_profile(exception=None):
+    """Save the profile with the request's status and SQL time"""
+    profile = g.pop('request_profile', None)
+    if profile is not None:
+        stats = current_stats()
+        extra = {}
+        if stats is not None:
+            extra = {'sql_statements': stats.sql_statements, 'sql_ms': round(stats.sql_seconds * 1000, 2)}
+        status = 500 if exception is not None else (stats.status if stats is not None else None)
+        try:
+            profile.stop(status, extra)
+        except OSError:
+            logger.exception('Could not save request profile')
+
+# Expensive routes by admission class (see admission.py); every other route is never queued
+ROUTE_CLASSES = {
+    'download_custom_receipt': 'pdf',
+    'download_receipt_by_id': 'pdf',
+    'download_receipt_batch': 'batch',
+}
+
+def busy_response(retry_after=None):
+    """503 telling the client when to try again (Retry-After only when there is an estimate)"""
+    if retry_after is None:
+        response = jsonify({'error': 'Server busy, please retry later', 'retry_after': None})
+    else:
+        response = jsonify({'error': f'Server busy, please retry in {retry_after} seconds', 'retry_after': retry_after})
+        response.headers['Retry-After'] = str(retry_after)
+    response.status_code = 503
+    return response
+
+@app.before_request
+def admit_request():
+    """Wait for a slot of the route's class, or turn the request away at once when its queue is full"""
+    route_class = ROUTE_CLASSES.get(request.endpoint)
+    if route_class is None or 'user_id' not in session:
+        return None
+    ticket, retry_after = admit(route_class)
+    if ticket is NOT_GATED:
+        return None
+    if ticket is None:
+        return busy_response(retry_after)
+    g.admission = ticket
+
+@app.after_request
+def hold_admission_while_streaming(response):
+    """A streamed body is rendered while it is sent: keep the slot until then"""
+    ticket = g.pop('admission', None)
+    if ticket is not None:
+        if response.is_sequence or response.direct_passthrough:
+            g.admission = ticket
+        else:
+            response.response = release_after(response.response, ticket)
+            # The server closes every response, even one whose body is never read (HEAD, client gone)
+            response.call_on_close(ticket.release)
+    return response
+
+@app.teardown_request
+def release_admission(exception=None):
+    """Free the slot of a request whose body is already rendered (or that failed)"""
+    ticket = g.pop('admission', None)
+    if ticket is not None:
+        ticket.release()
 
 # Constants
 TOTAL_ROOMS = 157
-DATABASE_PATH = 'hotel_management.db'
+
+# Occupied rooms per date, kept in memory and shared by all requests in this process
+room_occupancy = RoomOccupancy(TOTAL_ROOMS)
+
+# Pushes room-status changes to every open /api/room_events feed in this process
+room_feed = RoomStatusBroker(room_occupancy)
+
+# Room x day occupancy/revenue matrices per month, rebuilt after any stay change
+room_calendar = CalendarCache(TOTAL_ROOMS)
 
 def init_database():
     """Initialize the SQLite database with required tables"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Create users table for login system
@@ -93,7 +279,32 @@ def init_database():
                       ('admin', password_hash))
     
     conn.commit()
-    conn.close()
+    
+    # Create the secondary indexes used by the dashboard, availability and search queries
+    ensure_indexes(conn)
+    
+    # Create the trigram search index over names, mobile, aadhar and receipt numbers
+    ensure_search_index(conn)
+    
+    # Create the occupancy generation counter shared by worker processes
+    ensure_occupancy_schema(conn)
+    
+    # Create the per-day statistics rollup (filled from tourists the first time)
+    ensure_daily_stats_schema(conn)
+    
+    # Create the sequential receipt counter
+    ensure_receipt_counter(conn)
+    
+    # Create the rendered receipt PDF cache
+    ensure_receipt_cache_schema(conn)
+    ensure_artifact_schema(conn)
+    
+    # Create the background job queue (receipts and reports)
+    ensure_job_schema(conn)
+    
+    # Create the session store
+    ensure_session_schema(conn)
+    conn.commit()
 
 def validate_form_data(data):
     """Validate tourist form data"""
@@ -172,33 +383,29 @@ def validate_form_data(data):
 
 def get_next_available_room():
     """Get the next available room number (1-157)"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Get occupied rooms for today
+    # First free bit in today's occupancy bitmap (None if all rooms are taken)
     today = datetime.now().date()
-    cursor.execute('SELECT room_number FROM tourists WHERE check_in_date = ? AND check_in_done = 1', 
-                   (today,))
-    occupied_rooms = [row[0] for row in cursor.fetchall()]
-    
-    conn.close()
-    
-    # Find first available room
-    for room_num in range(1, TOTAL_ROOMS + 1):
-        if room_num not in occupied_rooms:
-            return room_num
-    
-    return None  # No rooms available
+    return room_occupancy.first_free(today)
 
-def generate_pdf_receipt(tourist_data, room_number):
-    """Generate simple PDF receipt for tourist check-in"""
-    # Create temporary file for PDF
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-    temp_filename = temp_file.name
-    temp_file.close()
+@timed_pdf
+def generate_pdf_receipt(tourist_data, room_number, output=None):
+    """Generate simple PDF receipt for tourist check-in.
+    Renders into `output` (e.g. io.BytesIO) and returns it; without one, writes a temp file and returns its path."""
+    # ReportLab's platypus takes ~70 ms to import: load it on the first receipt, not at start-up
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+    
+    if output is None:
+        # Create temporary file for PDF
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+        output = temp_file.name
+        temp_file.close()
     
     # Create PDF document
-    doc = SimpleDocTemplate(temp_filename, pagesize=letter, topMargin=30, bottomMargin=30)
+    doc = SimpleDocTemplate(output, pagesize=letter, topMargin=30, bottomMargin=30)
     styles = getSampleStyleSheet()
     story = []
     
@@ -315,7 +522,55 @@ def generate_pdf_receipt(tourist_data, room_number):
     # Build PDF
     doc.build(story)
     
-    return temp_filename
+    return output
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# What each background job produces, for the job status page
+JOB_LABELS = {
+    'checkin_receipt': 'Check-in receipt',
+    'custom_receipt': 'Receipt',
+    'excel_report': 'Excel report',
+    'group_receipt': 'Group receipt',
+    'member_receipts': 'Member receipts',
+}
+
+# Jobs /download_receipt offers: the newest of these started by the signed-in user
+RECEIPT_JOB_KINDS = ('checkin_receipt', 'custom_receipt', 'group_receipt')
+
+@job_handler('checkin_receipt')
+def render_checkin_receipt(params, progress):
+    """Job: the check-in receipt, from the form as it was submitted"""
+    receipt_pdf = generate_pdf_receipt(params['tourist'], params['room_number'], io.BytesIO())
+    return receipt_pdf.getvalue(), 'hotel_receipt.pdf', 'application/pdf'
+
+@job_handler('custom_receipt')
+def render_custom_receipt(params, progress):
+    """Job: the Hindi receipt of a guest (also kept in the receipt cache)"""
+    tourist_data = get_tourist_full_data(params['tourist_id'])
+    if not tourist_data:
+        raise JobError('Tourist not found')
+    pdf_bytes, _ = cached_receipt_pdf(tourist_data, params['receipt_number'])
+    return pdf_bytes, 'hotel_receipt.pdf', 'application/pdf'
+
+@job_handler('excel_report')
+def render_excel_report(params, progress):
+    """Job: the Excel report for a check-in date range"""
+    first, last = report_range(params['from'], params['to'])
+    conn = get_db()
+    total = report_rows(conn, first, last)
+    if not total:
+        raise JobError(f'No data available for {first} to {last}')
+    
+    # Rows stream from SQLite into a write-only workbook spooled straight to the artifact store
+    with spool_artifact() as output:
+        try:
+            write_report(conn, first, last, output, lambda rows: progress(rows, total))
+        except BaseException:
+            output.close()
+            os.remove(output.name)
+            raise
+    return output.name, report_filename(first, last), XLSX_MIMETYPE
 
 @app.route('/')
 def index():
@@ -324,17 +579,18 @@ def index():
         return redirect(url_for('login'))
     
     # Get dashboard statistics
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     today = datetime.now().date()
     
-    # Get today's check-ins
-    cursor.execute('SELECT COUNT(*) FROM tourists WHERE check_in_date = ? AND check_in_done = 1', (today,))
-    checked_in_today = cursor.fetchone()[0]
+    # Get today's check-ins from the daily rollup (one row, however many guests there are)
+    today_stats = day_stats(conn, today)
+    checked_in_today = today_stats['check_ins']
     
-    # Calculate available rooms
-    available_today = TOTAL_ROOMS - checked_in_today
+    # Calculate available rooms (guests from earlier days may still be staying tonight)
+    occupied_today = room_occupancy.occupied_count(today)
+    available_today = TOTAL_ROOMS - occupied_today
     
     # Get recent check-ins for table display
     cursor.execute('''
@@ -348,12 +604,12 @@ def index():
     ''')
     recent_checkins = cursor.fetchall()
     
-    conn.close()
-    
     dashboard_stats = {
         'total_rooms': TOTAL_ROOMS,
         'checked_in_today': checked_in_today,
         'available_today': available_today,
+        'total_occupied': occupied_today,
+        'pending_checkins': today_stats['registrations'] - today_stats['check_ins'],
         'recent_checkins': recent_checkins
     }
     
@@ -363,43 +619,32 @@ def index():
 def login():
     """User login route"""
     if request.method == 'POST':
-        print("=== LOGIN ATTEMPT ===")  # Debug
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '').strip()
         
-        print(f"Username: '{username}'")  # Debug
-        print(f"Password length: {len(password)}")  # Debug
-        
         if not username or not password:
             flash('Please enter both username and password', 'error')
             return render_template('login.html')
         
         # Hash password for comparison
         password_hash = hashlib.sha256(password.encode()).hexdigest()
-        print(f"Password hash: {password_hash}")  # Debug
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT id, username FROM users WHERE username = ? AND password_hash = ?', 
                       (username, password_hash))
         user = cursor.fetchone()
         
-        # Debug: Check if user exists
-        cursor.execute('SELECT COUNT(*) FROM users WHERE username = ?', (username,))
-        user_exists = cursor.fetchone()[0]
-        print(f"User exists: {user_exists}")  # Debug
-        
-        conn.close()
-        
         if user:
+            session.regenerate()
             session['user_id'] = user[0]
             session['username'] = user[1]
             flash('Login successful!', 'success')
-            print("Login successful, redirecting to dashboard")  # Debug
+            logger.info("Login: %s", username)
             return redirect(url_for('index'))
         else:
             flash('Invalid username or password', 'error')
-            print("Login failed")  # Debug
+            logger.warning("Failed login for %r from %s", username, request.remote_addr)
     
     return render_template('login.html')
 
@@ -407,45 +652,21 @@ def login():
 def logout():
     """User logout route"""
     session.clear()
+    session.regenerate()
     flash('You have been logged out successfully', 'info')
     return redirect(url_for('login'))
 
 @app.route('/checkin', methods=['GET', 'POST'])
 def checkin():
     """Tourist check-in form route"""
-    print(f"=== CHECKIN ROUTE ===")
-    print(f"Method: {request.method}")
-    print(f"Session user_id: {session.get('user_id')}")
-    
     if 'user_id' not in session:
-        print("No user session, redirecting to login")
         return redirect(url_for('login'))
     
     # Get available rooms for the form
     today = datetime.now().date()
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Get occupied rooms for today
-    cursor.execute('SELECT room_number FROM tourists WHERE check_in_date = ? AND check_in_done = 1', 
-                   (today,))
-    occupied_rooms = [row[0] for row in cursor.fetchall()]
-    
-    # Get available rooms
-    available_rooms = []
-    for room_num in range(1, TOTAL_ROOMS + 1):
-        if room_num not in occupied_rooms:
-            available_rooms.append(room_num)
-    
-    conn.close()
-    print(f"Available rooms: {len(available_rooms)} out of {TOTAL_ROOMS}")
+    available_rooms = room_occupancy.free_rooms(today)
     
     if request.method == 'POST':
-        print("=== FORM SUBMISSION RECEIVED ===")
-        print(f"Request headers: {dict(request.headers)}")
-        print(f"Form data keys: {list(request.form.keys())}")
-        print(f"Form data values: {dict(request.form)}")
-        
         # Get form data with proper type handling
         form_data = {
             'full_name': request.form.get('full_name', '').strip(),
@@ -458,47 +679,52 @@ def checkin():
             'room_number': request.form.get('room_number', '').strip(),
             'payment_mode': request.form.get('payment_mode', 'Cash').strip(),
             'male_count': request.form.get('male_count', '0').strip(),
-            'female_count': request.form.get('female_count', '0').strip()
+            'female_count': request.form.get('female_count', '0').strip(),
+            'check_out_date': request.form.get('check_out_date', '').strip(),
+            'check_out_time': request.form.get('check_out_time', '').strip()
         }
         
-        print(f"Processed form data: {form_data}")
-        
         # Validate form data
         validation_errors = validate_form_data(form_data)
         
-        # Validate room selection
+        # Validate the expected check-out date (the stay runs up to the night before it)
+        check_out_date = None
+        if form_data['check_out_date']:
+            try:
+                check_out_date = datetime.strptime(form_data['check_out_date'], '%Y-%m-%d').date()
+                if check_out_date <= today:
+                    validation_errors.append('Check-out date must be after today')
+                    check_out_date = None
+                else:
+                    available_rooms = room_occupancy.free_rooms_for_stay(today, check_out_date)
+            except ValueError:
+                validation_errors.append('Invalid check-out date')
+        
+        # Validate room selection (free every night of the stay)
         if not form_data['room_number']:
             validation_errors.append('Please select a room number')
         else:
             try:
                 selected_room = int(form_data['room_number'])
-                if selected_room not in available_rooms:
-                    validation_errors.append('Selected room is not available')
-                    print(f"❌ Room {selected_room} not available. Available rooms: {available_rooms[:10]}...")
+                if not room_occupancy.is_free_for_stay(selected_room, today, check_out_date):
+                    validation_errors.append('Selected room is not available for the whole stay')
             except ValueError:
                 validation_errors.append('Invalid room number selected')
-                print(f"❌ Invalid room number: {form_data['room_number']}")
-        
-        print(f"Validation errors: {validation_errors}")
         
         if validation_errors:
-            print("❌ Validation failed, returning form with errors")
+            logger.debug("Check-in rejected: %s", validation_errors)
             for error in validation_errors:
                 flash(error, 'error')
             return render_template('checkin.html', form_data=form_data, available_rooms=available_rooms)
         
         # Use selected room number
         room_number = int(form_data['room_number'])
-        print(f"Assigning room: {room_number}")
         
         # Save to database
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         try:
-            print(f"📝 Executing database insert...")
-            print(f"   SQL: INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today, remaining_amount, check_in_done, room_number, check_in_date)")
-            
             # Convert data types safely
             try:
                 amount_paid_float = float(form_data['amount_paid_today']) if form_data['amount_paid_today'] else 0.0
@@ -509,20 +735,11 @@ def checkin():
                 female_count_int = int(form_data['female_count']) if form_data.get('female_count') and form_data['female_count'].strip() else 0
                 extra_bed_bool = form_data.get('extra_bed') == 'on'
             except ValueError as ve:
-                print(f"❌ Type conversion error: {str(ve)}")
-                print(f"   amount_paid_today: '{form_data['amount_paid_today']}'")
-                print(f"   remaining_amount: '{form_data['remaining_amount']}'")
-                print(f"   age: '{form_data.get('age', '')}'")
-                print(f"   children_count: '{form_data.get('children_count', '')}'")
-                print(f"   male_count: '{form_data.get('male_count', '')}'")
-                print(f"   female_count: '{form_data.get('female_count', '')}'")
                 raise ValueError(f"Invalid number format in form data: {str(ve)}")
             
-            print(f"   Values: {(form_data['full_name'], form_data['address'], form_data['aadhar_number'], form_data['mobile_number'], amount_paid_float, remaining_amount_float, form_data['check_in_done'], room_number, datetime.now().date())}")
-            
-            # Generate automatic receipt number
-            receipt_number = generate_receipt_number()
-            print(f"📄 Generated receipt number: {receipt_number}")
+            # Allocate the receipt number in the same transaction as the insert,
+            # so a failed check-in does not leave a gap in the sequence
+            receipt_number = allocate_receipt_number(conn)
             
             cursor.execute('''
                 INSERT INTO tourists 
@@ -541,154 +758,266 @@ def checkin():
                 receipt_number, form_data.get('comments', ''), form_data.get('payment_mode', 'Cash')
             ))
             
-            print(f"📝 Database insert executed, committing...")
-            conn.commit()
-            print("✅ Database insert successful")
+            # Add the guest to the daily rollup (same transaction)
+            record_stay_change(conn, new=stay_row(conn, cursor.lastrowid))
             
-            # Verify the insert worked
-            cursor.execute("SELECT COUNT(*) FROM tourists WHERE room_number = ? AND check_in_date = ?", 
-                          (room_number, datetime.now().date()))
-            count = cursor.fetchone()[0]
-            print(f"✅ Verification: {count} record(s) found for room {room_number} today")
+            # Tell other worker processes the occupancy changed (same transaction)
+            occupancy_generation = bump_generation(conn) if form_data['check_in_done'] else None
             
-            # Add receipt number to form_data for PDF generation
+            # Queue the PDF receipt for the job workers (same transaction, so it cannot be lost)
             form_data['recipe_number'] = receipt_number
+            receipt_job = enqueue_job('checkin_receipt', {'tourist': form_data, 'room_number': room_number}, conn,
+                                      session['user_id'])
             
-            # Generate PDF receipt
-            pdf_path = generate_pdf_receipt(form_data, room_number)
-            print(f"✅ PDF generated: {pdf_path}")
+            conn.commit()
+            logger.info("Check-in: room %s, receipt %s", room_number, receipt_number)
             
-            success_message = f'✅ Check-in successful! Room {room_number} assigned to {form_data["full_name"]}. Receipt No: {receipt_number}. PDF receipt generated.'
-            flash(success_message, 'success')
-            print(f"✅ Success message: {success_message}")
+            if occupancy_generation is not None:
+                first_night, last_night = stay_nights(datetime.now().date(), check_out_date)
+                room_occupancy.record_check_in(occupancy_generation, first_night, room_number, last_night)
+                room_feed.publish(conn)
+            
+            logger.debug("Receipt %s queued as job %s", receipt_number, receipt_job)
             
-            # Store PDF path in session for download
-            session['latest_receipt'] = pdf_path
-            print(f"✅ PDF stored in session for download")
+            success_message = f'✅ Check-in successful! Room {room_number} assigned to {form_data["full_name"]}. Receipt No: {receipt_number}. PDF receipt is being generated.'
+            flash(success_message, 'success')
             
-            conn.close()
-            print("✅ Redirecting to dashboard...")
             return redirect(url_for('index'))
             
         except sqlite3.IntegrityError as e:
-            print(f"❌ Database integrity error: {str(e)}")
+            logger.error("Check-in integrity error: %s", e)
             conn.rollback()
-            conn.close()
             flash(f'Database integrity error: {str(e)}. Please check if the room is already occupied.', 'error')
             return render_template('checkin.html', form_data=form_data, available_rooms=available_rooms)
         except sqlite3.OperationalError as e:
-            print(f"❌ Database operational error: {str(e)}")
+            logger.error("Check-in operational error: %s", e)
             conn.rollback()
-            conn.close()
             flash(f'Database operational error: {str(e)}. Please try again.', 'error')
             return render_template('checkin.html', form_data=form_data, available_rooms=available_rooms)
         except ValueError as e:
-            print(f"❌ Data conversion error: {str(e)}")
+            logger.warning("Check-in data conversion error: %s", e)
             conn.rollback()
-            conn.close()
             flash(f'Data format error: {str(e)}. Please check your input values.', 'error')
             return render_template('checkin.html', form_data=form_data, available_rooms=available_rooms)
         except Exception as e:
-            print(f"❌ Unexpected database error: {str(e)}")
-            print(f"❌ Error type: {type(e).__name__}")
-            import traceback
-            print(f"❌ Traceback: {traceback.format_exc()}")
+            logger.exception("Unexpected check-in error")
             conn.rollback()
-            conn.close()
             flash(f'Unexpected error during check-in: {str(e)}', 'error')
             return render_template('checkin.html', form_data=form_data, available_rooms=available_rooms)
     
-    print("Rendering checkin form")
     return render_template('checkin.html', available_rooms=available_rooms)
 
+def _check_in_group(members, shared):
+    """Validate and check in a group; returns (GroupCheckIn or None, errors, HTTP status)"""
+    today = datetime.now().date()
+    members = group_members(members, shared)
+    errors = validate_group(members, validate_form_data)
+    
+    check_out_date = None
+    if shared.get('check_out_date'):
+        try:
+            check_out_date = datetime.strptime(str(shared['check_out_date']).strip(), '%Y-%m-%d').date()
+            if check_out_date <= today:
+                errors.append('Check-out date must be after today')
+        except ValueError:
+            errors.append('Invalid check-out date')
+    if errors:
+        return None, errors, 400
+    
+    conn = get_db()
+    group, errors = check_in_group(conn, members, room_occupancy, today, check_out_date,
+                                   str(shared.get('group_name') or '').strip(), session['user_id'])
+    if errors:
+        return None, errors, 409
+    
+    room_feed.publish(conn)
+    logger.info("Group check-in: %d rooms (%s), receipts %s-%s", len(group.rooms),
+                ', '.join(map(str, group.rooms)), group.receipt_numbers[0], group.receipt_numbers[-1])
+    return group, [], 201
+
+@app.route('/group_checkin', methods=['GET', 'POST'])
+def group_checkin():
+    """Check in a yatra party: one line per room, shared address, payment and check-out date"""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    available_rooms = room_occupancy.free_rooms(datetime.now().date())
+    if request.method == 'POST':
+        form_data = {name: request.form.get(name, '').strip()
+                     for name in SHARED_FIELDS + ('check_out_date', 'group_name', 'members')}
+        try:
+            group, errors, _ = _check_in_group(parse_member_lines(form_data['members']), form_data)
+        except sqlite3.Error as e:
+            logger.exception("Group check-in failed")
+            group, errors = None, [f'Database error: {str(e)}. Please try again.']
+        if errors:
+            for error in errors:
+                flash(error, 'error')
+            return render_template('group_checkin.html', form_data=form_data, available_rooms=available_rooms,
+                                   max_members=GROUP_MAX_MEMBERS)
+        
+        # The merged receipt for the whole group is rendered by a job worker
+        flash(f'✅ Group check-in successful! {len(group.rooms)} rooms assigned '
+              f'({", ".join(map(str, group.rooms))}). Receipts {group.receipt_numbers[0]}'
+              f'–{group.receipt_numbers[-1]}. Group receipt is being generated.', 'success')
+        return redirect(url_for('index'))
+    
+    return render_template('group_checkin.html', available_rooms=available_rooms, max_members=GROUP_MAX_MEMBERS)
+
+@app.route('/api/group_checkin', methods=['POST'])
+def api_group_checkin():
+    """API endpoint for a group check-in: {"members": [{...}], shared fields, "check_out_date", "group_name"}"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('members'), list) \
+            or not all(isinstance(member, dict) for member in payload['members']):
+        return jsonify({'error': 'Expected a JSON object with a list of members'}), 400
+    
+    group, errors, status = _check_in_group(payload['members'], payload)
+    if errors:
+        return jsonify({'errors': errors}), status
+    
+    ids = ','.join(map(str, group.tourist_ids))
+    return jsonify({
+        'members': [{'tourist_id': tourist_id, 'room_number': room, 'receipt_number': receipt_number,
+                     'receipt_url': url_for('download_custom_receipt', tourist_id=tourist_id)}
+                    for tourist_id, room, receipt_number in zip(group.tourist_ids, group.rooms, group.receipt_numbers)],
+        'group_receipt_url': url_for('download_receipt_batch', ids=ids, format='pdf'),
+        'group_receipt_job_url': url_for('api_job_status', job_id=group.receipt_job),
+        'member_receipts_job_url': url_for('api_job_status', job_id=group.members_job)
+    }), 201
+
 @app.route('/download_receipt')
 def download_receipt():
     """Download the latest generated PDF receipt"""
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
-    pdf_path = session.get('latest_receipt')
-    if pdf_path and os.path.exists(pdf_path):
-        return send_file(pdf_path, as_attachment=True, download_name='hotel_receipt.pdf')
+    job = latest_job(session['user_id'], RECEIPT_JOB_KINDS)
+    if job and job['state'] in ('queued', 'running'):
+        # Not rendered yet: the job page offers the download once it is
+        return redirect(url_for('job_page', job_id=job['job_id']))
+    if job and job['state'] == 'failed':
+        flash(f"Receipt could not be generated: {job['error']}", 'error')
+        return redirect(url_for('index'))
+    
+    artifact = load_artifact(job['artifact_id']) if job else None
+    if artifact:
+        path, filename, mimetype = artifact
+        return send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
     else:
         flash('No receipt available for download', 'error')
         return redirect(url_for('index'))
 
 @app.route('/export_excel')
 def export_excel():
-    """Export monthly report to Excel"""
+    """Export report to Excel for ?from=YYYY-MM-DD&to=YYYY-MM-DD (default: current month)"""
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
-    # Get current month's data
-    current_month = datetime.now().replace(day=1)
-    next_month = (current_month + timedelta(days=32)).replace(day=1)
+    try:
+        first, last = report_range(request.args.get('from', '').strip(), request.args.get('to', '').strip())
+    except ValueError as e:
+        flash(f'Invalid export date range: {str(e)}', 'error')
+        return redirect(url_for('index'))
     
-    conn = sqlite3.connect(DATABASE_PATH)
+    if not report_rows(get_db(), first, last):
+        flash(f'No data available for {first} to {last}', 'info')
+        return redirect(url_for('index'))
     
-    # Query for current month
-    query = '''
-        SELECT check_in_date, full_name, mobile_number, aadhar_number, 
-               amount_paid_today, remaining_amount, check_in_done, room_number
-        FROM tourists 
-        WHERE check_in_date >= ? AND check_in_date < ?
-        ORDER BY check_in_date, created_at
-    '''
+    if export_queue_full(sum(job_counts(kind='excel_report').values())):
+        return busy_response(EXPORT_RETRY_AFTER)
+    
+    # The workbook is written by a job worker; its page links the file when it is ready
+    job_id = enqueue_job('excel_report', {'from': first.isoformat(), 'to': last.isoformat()}, owner=session['user_id'])
+    return redirect(url_for('job_page', job_id=job_id))
+
+def job_payload(job):
+    """Public fields of a job, its percentage done and (when finished) the download URL"""
+    payload = {name: job[name] for name in ('job_id', 'kind', 'state', 'progress', 'total', 'attempts', 'error',
+                                            'created_at', 'started_at', 'finished_at')}
+    payload['label'] = JOB_LABELS.get(job['kind'], job['kind'])
+    if job['state'] == 'done':
+        payload['percent'] = 100
+    else:
+        payload['percent'] = int(100 * job['progress'] / job['total']) if job['total'] else 0
+    payload['download_url'] = url_for('download_job_result', job_id=job['job_id']) if job['artifact_id'] else None
+    return payload
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """API endpoint for the state and progress of a background job"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    job = job_status(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_payload(job))
+
+@app.route('/jobs/<job_id>')
+def job_page(job_id):
+    """Progress of a background job, with the download link once it is done"""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
     
-    df = pd.read_sql_query(query, conn, params=(current_month.date(), next_month.date()))
-    conn.close()
+    job = job_status(job_id)
+    if not job:
+        flash('Job not found', 'error')
+        return redirect(url_for('index'))
+    return render_template('job_status.html', job=job_payload(job))
+
+@app.route('/jobs/<job_id>/download')
+def download_job_result(job_id):
+    """Download the file a finished job produced"""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
     
-    if df.empty:
-        flash('No data available for current month', 'info')
+    job = job_status(job_id)
+    if job and job['state'] != 'done':
+        return redirect(url_for('job_page', job_id=job_id))
+    artifact = load_artifact(job['artifact_id']) if job else None
+    if not artifact:
+        flash('The file is no longer available, please generate it again', 'error')
         return redirect(url_for('index'))
+    path, filename, mimetype = artifact
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request, SQL and PDF histograms of this worker in Prometheus text format (admin only)"""
+    if not is_authorized(session, request.headers):
+        return jsonify({'error': 'Unauthorized'}), 401
     
-    # Create Excel file with formatting
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-    temp_filename = temp_file.name
-    temp_file.close()
+    return app.response_class(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """Slowest sampled requests (admin only)"""
+    if session.get('username') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
     
-    with pd.ExcelWriter(temp_filename, engine='openpyxl') as writer:
-        # Group by date and create formatted sheet
-        current_row = 0
-        
-        for date, group in df.groupby('check_in_date'):
-            # Write date header
-            date_df = pd.DataFrame([['Date: ' + str(date)]], columns=[''])
-            date_df.to_excel(writer, sheet_name='Monthly Report', 
-                           startrow=current_row, index=False, header=False)
-            current_row += 2
-            
-            # Write group data
-            group_display = group[['full_name', 'mobile_number', 'aadhar_number', 
-                                 'amount_paid_today', 'remaining_amount', 'check_in_done', 'room_number']]
-            group_display.columns = ['Name', 'Mobile', 'Aadhar', 'Amount Paid Today', 
-                                   'Remaining Amount', 'Check-In', 'Room Number']
-            
-            group_display.to_excel(writer, sheet_name='Monthly Report', 
-                                 startrow=current_row, index=False)
-            current_row += len(group_display) + 1
-            
-            # Add subtotal row
-            daily_paid = group['amount_paid_today'].sum()
-            daily_remaining = group['remaining_amount'].sum()
-            subtotal_df = pd.DataFrame([['', '', '', f'Daily Total: ₹{daily_paid:.2f}', 
-                                       f'₹{daily_remaining:.2f}', '', '']], 
-                                     columns=group_display.columns)
-            subtotal_df.to_excel(writer, sheet_name='Monthly Report', 
-                                startrow=current_row, index=False, header=False)
-            current_row += 3
-        
-        # Add grand total
-        total_paid = df['amount_paid_today'].sum()
-        total_remaining = df['remaining_amount'].sum()
-        grand_total_df = pd.DataFrame([['', '', 'GRAND TOTAL:', f'₹{total_paid:.2f}', 
-                                      f'₹{total_remaining:.2f}', '', '']], 
-                                     columns=['', '', '', '', '', '', ''])
-        grand_total_df.to_excel(writer, sheet_name='Monthly Report', 
-                               startrow=current_row, index=False, header=False)
-    
-    return send_file(temp_filename, as_attachment=True, 
-                    download_name=f'hotel_report_{current_month.strftime("%Y_%m")}.xlsx')
+    profiles = list_profiles()
+    for profile in profiles:
+        profile['recorded'] = datetime.fromtimestamp(profile['started_at']).strftime('%Y-%m-%d %H:%M:%S')
+    return render_template('profiles.html', profiles=profiles, sample_rate=PROFILE_SAMPLE_RATE)
+
+@app.route('/admin/profiles/<name>')
+def admin_profile(name):
+    """One profile as text (top functions or hottest stacks), or the raw file with ?download=1"""
+    if session.get('username') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    found = profile_file(name)
+    if found is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    path, meta = found
+    if request.args.get('download'):
+        return send_file(path, as_attachment=True, download_name=os.path.basename(path))
+    header = f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration_ms']} ms ({meta['kind']})\n\n"
+    return app.response_class(header + profile_summary(path), mimetype='text/plain')
 
 @app.route('/api/room_status')
 def api_room_status():
@@ -698,56 +1027,92 @@ def api_room_status():
     
     today = datetime.now().date()
     
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT room_number FROM tourists WHERE check_in_date = ? AND check_in_done = 1', 
-                   (today,))
-    occupied_rooms = [row[0] for row in cursor.fetchall()]
-    
-    conn.close()
-    
-    room_status = {}
-    for room_num in range(1, TOTAL_ROOMS + 1):
-        room_status[room_num] = 'occupied' if room_num in occupied_rooms else 'available'
+    room_status = room_occupancy.room_status(today)
     
     return jsonify(room_status)
 
+@app.route('/api/room_events')
+def api_room_events():
+    """Server-Sent Events feed of today's room status (snapshot, then deltas)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    feed, snapshot = room_feed.subscribe(get_db())
+    return app.response_class(room_feed.stream(feed, snapshot), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/available_rooms')
 def api_available_rooms():
-    """API endpoint to get available rooms for today"""
+    """API endpoint to get rooms free from `from` (default today) up to `to` (exclusive, default the next day)"""
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    today = datetime.now().date()
-    
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Get occupied rooms for today
-    cursor.execute('SELECT room_number FROM tourists WHERE check_in_date = ? AND check_in_done = 1', 
-                   (today,))
-    occupied_rooms = [row[0] for row in cursor.fetchall()]
+    try:
+        arrival = datetime.strptime(request.args.get('from') or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d').date()
+        departure = (datetime.strptime(request.args['to'], '%Y-%m-%d').date()
+                     if request.args.get('to') else arrival + timedelta(days=1))
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    if departure <= arrival:
+        return jsonify({'error': "'to' must be after 'from'"}), 400
     
-    conn.close()
-    
-    # Get available rooms
-    available_rooms = []
-    for room_num in range(1, TOTAL_ROOMS + 1):
-        if room_num not in occupied_rooms:
-            available_rooms.append(room_num)
+    # One night comes from the cached bitmap, longer stays from one R*Tree overlap query
+    available_rooms = room_occupancy.free_rooms_for_stay(arrival, departure)
     
     return jsonify({
+        'from': arrival.isoformat(),
+        'to': departure.isoformat(),
         'available_rooms': available_rooms,
         'total_rooms': TOTAL_ROOMS,
-        'occupied_count': len(occupied_rooms),
+        'occupied_count': TOTAL_ROOMS - len(available_rooms),
         'available_count': len(available_rooms)
     })
 
+@app.route('/api/calendar')
+def api_calendar():
+    """API endpoint for the room x day occupancy and revenue matrix of a month (or a whole year)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    month = request.args.get('month') or datetime.now().strftime('%Y-%m')
+    try:
+        first_day, days = month_range(month)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    occupied, revenue = room_calendar.matrix(first_day, days)
+    payload = calendar_payload(first_day, occupied, revenue)
+    payload['month'] = month
+    return jsonify(payload)
+
+@app.route('/api/daily_stats')
+def api_daily_stats():
+    """API endpoint for per-day totals from the rollup (?from=YYYY-MM-DD&to=YYYY-MM-DD, default: current month)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        first, last = report_range(request.args.get('from', '').strip(), request.args.get('to', '').strip())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    conn = get_db()
+    days = stats_between(conn, first, last)
+    totals = {name: round(sum(day[name] for day in days), 2)
+              for name in ('registrations', 'check_ins', 'amount_paid', 'remaining_amount',
+                           'male_guests', 'female_guests', 'children')}
+    return jsonify({
+        'from': first.isoformat(),
+        'to': last.isoformat(),
+        'days': days,
+        'totals': totals,
+        'payment_modes': payment_totals(conn, first, last)
+    })
+
 @app.route('/test_db')
 def test_db():
     """Test route to check database setup"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Check if users table exists
@@ -758,8 +1123,6 @@ def test_db():
     cursor.execute("SELECT username, password_hash FROM users")
     users = cursor.fetchall()
     
-    conn.close()
-    
     result = {
         'table_exists': table_exists is not None,
         'users_count': len(users),
@@ -771,10 +1134,7 @@ def test_db():
 @app.route('/test_login', methods=['POST'])
 def test_login():
     """Test route to check form submission"""
-    print("=== TEST LOGIN ROUTE ===")
-    print(f"Form data: {request.form}")
-    print(f"Username: {request.form.get('username')}")
-    print(f"Password: {request.form.get('password')}")
+    logger.debug("Test login form fields: %s", sorted(request.form))
     return jsonify({
         'form_data': dict(request.form),
         'method': request.method
@@ -798,80 +1158,39 @@ def simple_checkin():
     
     # Get available rooms
     today = datetime.now().date()
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT room_number FROM tourists WHERE check_in_date = ? AND check_in_done = 1', 
-                   (today,))
-    occupied_rooms = [row[0] for row in cursor.fetchall()]
-    
-    available_rooms = []
-    for room_num in range(1, TOTAL_ROOMS + 1):
-        if room_num not in occupied_rooms:
-            available_rooms.append(room_num)
-    
-    conn.close()
+    available_rooms = room_occupancy.free_rooms(today)
     
     return render_template('simple_checkin.html', available_rooms=available_rooms)
 
 # Tourist Profile Management Routes
 @app.route('/tourist_profiles')
 def tourist_profiles():
-    """Display all tourist profiles"""
+    """Display tourist profiles, newest first, one page at a time"""
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Get all tourists with their information (using actual database schema)
-    cursor.execute('''
-        SELECT id, full_name, father_spouse_name, age, work, address, 
-               aadhar_number, mobile_number, alternate_mobile, gender, 
-               male_count, female_count, children_count, amount_paid_today, 
-               remaining_amount, check_in_done, room_number, check_in_date, 
-               check_out_date, check_out_time, extra_bed, recipe_number, 
-               comments, created_at, payment_mode
-        FROM tourists 
-        ORDER BY created_at DESC
-    ''')
+    conn = get_db()
+    try:
+        page = ProfilePage(conn, request.args.get('cursor'))
+    except ValueError:
+        return redirect(url_for('tourist_profiles'))
     
-    tourists = []
-    for row in cursor.fetchall():
-        tourist = {
-            'id': row[0],
-            'full_name': row[1],
-            'father_spouse_name': row[2] or '',  # Handle None values
-            'age': row[3],
-            'work': row[4] or '',  # Handle None values
-            'address': row[5],
-            'aadhar_number': row[6],
-            'mobile_number': row[7],
-            'alternate_mobile': row[8] or '',  # Handle None values
-            'gender': row[9] or '',  # Handle None values
-            'male_count': row[10] or 0,  # Handle None values
-            'female_count': row[11] or 0,  # Handle None values
-            'children_count': row[12] or 0,  # Handle None values
-            'amount_paid_today': row[13],
-            'remaining_amount': row[14],
-            'check_in_done': row[15],
-            'room_number': row[16],
-            'check_in_date': row[17],
-            'check_out_date': row[18] or '',  # Handle None values
-            'check_out_time': row[19] or '',  # Handle None values
-            'extra_bed': row[20] or False,  # Handle None values
-            'recipe_number': row[21] or '',  # Handle None values
-            'comments': row[22] or '',  # Handle None values
-            'created_at': row[23],
-            'payment_mode': row[24] or 'Cash',  # Handle None values
-            'receipt_generated': bool(row[21]),  # True if recipe_number exists
-            'receipt_number': row[21] or ''  # Use recipe_number
-        }
-        tourists.append(tourist)
+    # Cards are rendered and sent while rows are still being read
+    return stream_template('tourist_profiles.html', tourists=page, counts=profile_counts(conn))
+
+@app.route('/api/tourist_profiles')
+def tourist_profiles_api():
+    """API endpoint for scrolling through tourist profiles (keyset pagination)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
     
-    conn.close()
+    limit = min(max(request.args.get('limit', PROFILE_PAGE_SIZE, type=int), 1), PROFILE_PAGE_MAX)
+    try:
+        tourists, next_cursor = profile_page(get_db(), request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return render_template('tourist_profiles.html', tourists=tourists)
+    return jsonify({'tourists': tourists, 'next_cursor': next_cursor})
 
 @app.route('/tourist_profile/<int:tourist_id>')
 def tourist_profile_detail(tourist_id):
@@ -879,7 +1198,7 @@ def tourist_profile_detail(tourist_id):
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -893,7 +1212,6 @@ def tourist_profile_detail(tourist_id):
     ''', (tourist_id,))
     
     row = cursor.fetchone()
-    conn.close()
     
     if not row:
         flash('Tourist profile not found', 'error')
@@ -937,7 +1255,7 @@ def edit_tourist_profile(tourist_id):
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     if request.method == 'POST':
@@ -962,6 +1280,7 @@ def edit_tourist_profile(tourist_id):
                 remaining_amount_float = float(form_data['remaining_amount']) if form_data['remaining_amount'] else 0.0
                 
                 # Update tourist profile (only fields that exist in current schema)
+                before = stay_row(conn, tourist_id)
                 cursor.execute('''
                     UPDATE tourists 
                     SET full_name = ?, address = ?, aadhar_number = ?, 
@@ -973,8 +1292,15 @@ def edit_tourist_profile(tourist_id):
                     form_data['mobile_number'], amount_paid_float, remaining_amount_float, 
                     form_data['payment_mode'], tourist_id
                 ))
+                record_stay_change(conn, old=before, new=stay_row(conn, tourist_id))
+                
+                # Cached receipt PDFs of this guest are out of date now
+                invalidate_receipts(tourist_id, conn)
+                # So is the revenue in every worker's calendar
+                bump_generation(conn)
                 
                 conn.commit()
+                room_feed.publish(conn)
                 flash('Tourist profile updated successfully!', 'success')
                 return redirect(url_for('tourist_profile_detail', tourist_id=tourist_id))
                 
@@ -998,7 +1324,6 @@ def edit_tourist_profile(tourist_id):
     ''', (tourist_id,))
     
     row = cursor.fetchone()
-    conn.close()
     
     if not row:
         flash('Tourist profile not found', 'error')
@@ -1042,18 +1367,27 @@ def delete_tourist_profile(tourist_id):
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
-        # Get tourist name before deletion
-        cursor.execute('SELECT full_name FROM tourists WHERE id = ?', (tourist_id,))
+        # Get tourist name (and the stay it occupied) before deletion
+        cursor.execute('SELECT full_name, check_in_date, check_out_date, check_in_done FROM tourists WHERE id = ?',
+                       (tourist_id,))
         result = cursor.fetchone()
         
         if result:
-            tourist_name = result[0]
+            tourist_name, check_in_date, check_out_date, check_in_done = result
+            before = stay_row(conn, tourist_id)
             cursor.execute('DELETE FROM tourists WHERE id = ?', (tourist_id,))
+            record_stay_change(conn, old=before)
+            invalidate_receipts(tourist_id, conn)
+            occupancy_generation = bump_generation(conn) if check_in_done else None
             conn.commit()
+            if occupancy_generation is not None:
+                first_night, last_night = stay_nights(check_in_date, check_out_date)
+                room_occupancy.record_release(occupancy_generation, first_night, last_night)
+                room_feed.publish(conn)
             flash(f'Tourist profile for {tourist_name} has been deleted successfully!', 'success')
         else:
             flash('Tourist profile not found', 'error')
@@ -1061,7 +1395,6 @@ def delete_tourist_profile(tourist_id):
     except Exception as e:
         flash(f'Error deleting profile: {str(e)}', 'error')
     
-    conn.close()
     return redirect(url_for('tourist_profiles'))
 
 @app.route('/generate_receipt/<int:tourist_id>', methods=['POST'])
@@ -1093,19 +1426,67 @@ def generate_receipt(tourist_id):
         receipt_number = receipt_result[0]
         message = receipt_result[1]
         
-        # Generate custom Hindi receipt PDF
-        pdf_path = generate_custom_hindi_receipt(tourist_data, receipt_number)
-        
-        # Store PDF path in session for download
-        session['latest_receipt'] = pdf_path
+        # The custom Hindi receipt PDF is rendered by a job worker; /download_receipt finds the user's newest
+        enqueue_job('custom_receipt', {'tourist_id': tourist_id, 'receipt_number': receipt_number},
+                    owner=session['user_id'])
         
-        flash(f'Receipt #{receipt_number} generated successfully!', 'success')
+        flash(f'Receipt #{receipt_number} generated successfully! The PDF will be ready to download shortly.', 'success')
         
     except Exception as e:
         flash(f'Error generating receipt: {str(e)}', 'error')
     
     return redirect(url_for('index'))
 
+def send_receipt_pdf(tourist_data, receipt_number):
+    """Send a receipt PDF from the receipt cache, answering 304 if the browser has it already"""
+    etag = receipt_cache_key(tourist_data, receipt_number)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    pdf_bytes, etag = cached_receipt_pdf(tourist_data, receipt_number, etag)
+    return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf', as_attachment=True,
+                     download_name=f'receipt_{receipt_number}.pdf', etag=etag, conditional=True)
+
+@app.route('/receipts/batch')
+def download_receipt_batch():
+    """Download many receipts at once: ?from=&to= (check-in dates) and/or ?ids=1,2,3; ?format=zip|pdf"""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    date_from = request.args.get('from', '').strip() or None
+    date_to = request.args.get('to', '').strip() or None
+    output_format = request.args.get('format', 'zip')
+    try:
+        ids = request.args.get('ids', '').strip()
+        tourist_ids = [int(tourist_id) for tourist_id in ids.split(',') if tourist_id.strip()] if ids else None
+    except ValueError:
+        return jsonify({'error': 'ids must be comma separated numbers'}), 400
+    
+    if output_format not in BATCH_FORMATS:
+        return jsonify({'error': f'format must be one of {", ".join(BATCH_FORMATS)}'}), 400
+    if not (date_from or date_to or tourist_ids):
+        return jsonify({'error': 'give a date range (from/to) or ids'}), 400
+    
+    tourists = get_receipt_batch_data(date_from, date_to, tourist_ids)
+    if not tourists:
+        return jsonify({'error': 'No receipts match the selection'}), 404
+    
+    def generate():
+        started = time.perf_counter()
+        yield from stream_batch(tourists, output_format)
+        elapsed = time.perf_counter() - started
+        logger.info("Batch of %d receipts rendered in %.2fs (%.0f receipts/s)",
+                    len(tourists), elapsed, len(tourists) / elapsed)
+    
+    label = '_'.join(part for part in (date_from, date_to) if part) or f'{len(tourists)}_receipts'
+    mimetype = 'application/zip' if output_format == 'zip' else 'application/pdf'
+    return app.response_class(generate(), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=receipts_{label}.{output_format}',
+        'X-Receipt-Count': str(len(tourists)),
+    })
+
 @app.route('/download_custom_receipt/<int:tourist_id>')
 def download_custom_receipt(tourist_id):
     """Download custom Hindi receipt for a tourist (only if check-in is completed)"""
@@ -1113,24 +1494,20 @@ def download_custom_receipt(tourist_id):
         return redirect(url_for('login'))
     
     try:
-        print(f"🔍 Download request for tourist_id: {tourist_id}")
-        
         # Get tourist data using simple SQL query
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT full_name, recipe_number, check_in_done 
             FROM tourists WHERE id = ?
         ''', (tourist_id,))
         result = cursor.fetchone()
-        conn.close()
         
         if not result:
             flash('Tourist not found', 'error')
             return redirect(url_for('index'))
         
         full_name, recipe_number, check_in_done = result
-        print(f"✅ Tourist: {full_name}")
         
         # Check if check-in is completed
         if not check_in_done:
@@ -1143,7 +1520,7 @@ def download_custom_receipt(tourist_id):
             flash('No receipt generated for this tourist', 'error')
             return redirect(url_for('index'))
         
-        print(f"📄 Receipt number: {final_receipt_number}")
+        logger.debug("Receipt %s download for tourist %s", final_receipt_number, tourist_id)
         
         # Get full tourist data for PDF generation
         tourist_data = get_tourist_full_data(tourist_id)
@@ -1151,22 +1528,11 @@ def download_custom_receipt(tourist_id):
             flash('Error retrieving tourist data', 'error')
             return redirect(url_for('index'))
         
-        # Generate custom Hindi receipt PDF
-        pdf_path = generate_custom_hindi_receipt(tourist_data, final_receipt_number)
-        
-        if pdf_path and os.path.exists(pdf_path):
-            print(f"✅ PDF generated successfully: {pdf_path}")
-            return send_file(pdf_path, as_attachment=True, 
-                           download_name=f'receipt_{final_receipt_number}.pdf')
-        else:
-            print(f"❌ Failed to generate PDF")
-            flash('Error generating receipt PDF', 'error')
-            return redirect(url_for('index'))
+        # Serve the custom Hindi receipt PDF (rendered only if not cached)
+        return send_receipt_pdf(tourist_data, final_receipt_number)
         
     except Exception as e:
-        print(f"❌ Download error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Receipt download failed for tourist %s", tourist_id)
         flash(f'Error downloading receipt: {str(e)}', 'error')
         return redirect(url_for('index'))
 
@@ -1178,7 +1544,9 @@ def search_tourists_route():
     
     results = []
     search_params = {}
-    
+    page = 1
+    has_next = False
+
     if request.method == 'POST':
         search_params = {
             'name': request.form.get('name', '').strip(),
@@ -1191,12 +1559,30 @@ def search_tourists_route():
             'receipt_issued': request.form.get('receipt_issued', '').strip()
         }
         
+        page = max(request.form.get('page', 1, type=int) or 1, 1)
+
         try:
-            results = search_tourists(search_params)
+            # One extra row tells whether there is a next page
+            results, error = search_tourists(
+                name=search_params['name'],
+                mobile=search_params['mobile'],
+                aadhar=search_params['aadhar'],
+                receipt_number=search_params['receipt_number'],
+                receipt_filter=search_params['receipt_issued'],
+                date_from=search_params['date_from'] or search_params['date'],
+                date_to=search_params['date_to'] or search_params['date'],
+                limit=SEARCH_PAGE_SIZE + 1,
+                offset=(page - 1) * SEARCH_PAGE_SIZE
+            )
+            if error:
+                flash(error, 'error')
+            has_next = len(results) > SEARCH_PAGE_SIZE
+            results = results[:SEARCH_PAGE_SIZE]
         except Exception as e:
             flash(f'Error searching tourists: {str(e)}', 'error')
-    
-    return render_template('search_tourists.html', results=results, search_params=search_params)
+
+    return render_template('search_tourists.html', results=results, search_params=search_params,
+                           page=page, has_next=has_next, page_size=SEARCH_PAGE_SIZE)
 
 @app.route('/api/tourist_details/<int:tourist_id>')
 def get_tourist_details_api(tourist_id):
@@ -1233,78 +1619,28 @@ def download_receipt_by_id(tourist_id):
             flash('No receipt available for this guest', 'error')
             return redirect(url_for('index'))
         
-        # Generate PDF using the receipt number
-        pdf_file_path = generate_custom_hindi_receipt(tourist_data, recipe_number)
-        
-        # Ensure we have a valid file path string
-        if pdf_file_path and isinstance(pdf_file_path, str) and os.path.exists(pdf_file_path):
-            return send_file(pdf_file_path, as_attachment=True, 
-                           download_name=f'receipt_{recipe_number}.pdf')
-        else:
-            flash('Error generating receipt PDF', 'error')
-            return redirect(url_for('index'))
+        # Serve the PDF for this receipt number (rendered only if not cached)
+        return send_receipt_pdf(tourist_data, recipe_number)
             
     except Exception as e:
         flash(f'Error downloading receipt: {str(e)}', 'error')
         return redirect(url_for('index'))
 
 def generate_receipt_number():
-    """Generate a unique receipt number"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    try:
-        # Get the current date for the receipt number prefix
-        today = datetime.now()
-        date_prefix = today.strftime('%Y%m%d')  # Format: YYYYMMDD
-        
-        # Find the highest receipt number for today
-        cursor.execute('''
-            SELECT recipe_number FROM tourists 
-            WHERE recipe_number LIKE ? 
-            ORDER BY recipe_number DESC 
-            LIMIT 1
-        ''', (f'RCP{date_prefix}%',))
-        
-        result = cursor.fetchone()
-        
-        if result:
-            # Extract the sequence number from the last receipt
-            last_receipt = result[0]
-            try:
-                # Extract the last 4 digits (sequence number)
-                last_sequence = int(last_receipt[-4:])
-                new_sequence = last_sequence + 1
-            except (ValueError, IndexError):
-                # If parsing fails, start from 1
-                new_sequence = 1
-        else:
-            # No receipts for today, start from 1
-            new_sequence = 1
-        
-        # Generate the new receipt number: RCP + YYYYMMDD + 4-digit sequence
-        receipt_number = f'RCP{date_prefix}{new_sequence:04d}'
-        
-        # Verify the receipt number is unique (just in case)
-        cursor.execute('SELECT COUNT(*) FROM tourists WHERE recipe_number = ?', (receipt_number,))
-        if cursor.fetchone()[0] > 0:
-            # If somehow it exists, try with a random suffix
-            import random
-            receipt_number = f'RCP{date_prefix}{new_sequence:04d}{random.randint(10,99)}'
-        
-        conn.close()
-        return receipt_number
-        
-    except Exception as e:
-        print(f"Error generating receipt number: {e}")
-        # Fallback: use timestamp-based receipt number
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        conn.close()
-        return f'RCP{timestamp}'
+    """Generate a unique receipt number (shared sequential counter in receipt_system)"""
+    return get_next_receipt_number()
 
 if __name__ == '__main__':
     # Initialize database on startup
-    init_database()
+    with app.app_context():
+        init_database()
+    warm_receipt_templates()
+    clean_artifact_files()
+    
+    # Receipts and reports are rendered by job worker processes (started in the reloader's child,
+    # the process that serves requests)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_job_processes(default_job_workers())
     
     # Run the Flask application
     print("🏨 Aggarwal Bhawan Management System Starting...")
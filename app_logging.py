@@ -0,0 +1,132 @@
+"""
+Logging Pipeline for Hotel Management
+This module provides:
+1. One queue-backed handler on the root logger: request threads only put the
+   record on an in-memory queue, and a listener thread formats and writes it,
+   so no request ever waits on stdout/stderr
+2. Leveled output: INFO and above by default (HOTEL_LOG_LEVEL), with
+   per-module levels from HOTEL_LOG_LEVELS, e.g. "app=DEBUG,werkzeug=WARNING"
+3. Redaction of Aadhaar numbers and password hashes in every written line
+4. A fresh listener in every forked worker (the parent's thread does not survive fork)
+5. shutdown_logging() for processes that end with os._exit, which skips atexit
+"""
+
+import os
+import re
+import sys
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+LOG_LEVEL = os.environ.get('HOTEL_LOG_LEVEL', 'INFO')
+
+# Comma-separated logger=LEVEL pairs applied on top of LOG_LEVEL
+LOG_LEVELS = os.environ.get('HOTEL_LOG_LEVELS', '')
+
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(process)d %(name)s: %(message)s'
+
+# 12-digit Aadhaar numbers, optionally grouped 4-4-4; the last four digits are kept
+AADHAR_PATTERN = re.compile(r'(?<!\d)\d{4}[ -]?\d{4}[ -]?(\d{4})(?!\d)')
+# SHA-256 hex digests (stored password hashes)
+HASH_PATTERN = re.compile(r'\b[0-9a-fA-F]{64}\b')
+
+_lock = threading.Lock()
+_listener = None
+
+
+def mask_aadhar(value):
+    """'123456789012' -> 'XXXX-XXXX-9012'"""
+    digits = re.sub(r'\D', '', str(value or ''))
+    return f'XXXX-XXXX-{digits[-4:]}' if len(digits) >= 4 else 'XXXX'
+
+
+def redact(text):
+    """Mask Aadhaar numbers and password hashes in a log line"""
+    text = AADHAR_PATTERN.sub(r'XXXX-XXXX-\1', text)
+    return HASH_PATTERN.sub('[hash]', text)
+
+
+class RedactingFilter(logging.Filter):
+    """Applies redact() to the fully formatted message (and traceback) of a record"""
+
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+        return True
+
+
+def parse_levels(spec):
+    """'app=DEBUG, werkzeug=warning' -> {'app': 'DEBUG', 'werkzeug': 'WARNING'}"""
+    levels = {}
+    for item in spec.split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _start_listener(stream=None):
+    """Point the queue at a new listener thread writing to `stream` (lock held)"""
+    global _listener
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(RedactingFilter())
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return records
+
+
+def _restart_after_fork():
+    global _lock, _listener
+    if _listener is None:
+        return
+    # The parent's listener thread (and any lock it held) did not survive the fork: start afresh
+    _lock = threading.Lock()
+    stream = _listener.handlers[0].stream
+    new_queue = _start_listener(stream)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.handlers.QueueHandler):
+            handler.queue = new_queue
+
+
+def setup_logging(level=None, levels=None, stream=None):
+    """Install the queue handler on the root logger (once per process) and apply the levels"""
+    with _lock:
+        root = logging.getLogger()
+        if _listener is None:
+            root.addHandler(logging.handlers.QueueHandler(_start_listener(stream)))
+        root.setLevel(level or LOG_LEVEL)
+    for name, module_level in dict(parse_levels(LOG_LEVELS), **(levels or {})).items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+def flush_logging():
+    """Write out everything queued so far (the listener keeps running)"""
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+def shutdown_logging():
+    """Write out everything queued and stop the listener; later records go to logging.lastResort"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            if isinstance(handler, logging.handlers.QueueHandler):
+                root.removeHandler(handler)
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
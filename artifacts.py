@@ -0,0 +1,148 @@
+"""
+Generated Artifact Store for Hotel Management
+This module provides:
+1. Generated receipts and reports kept as files in ARTIFACT_DIR, indexed by a
+   SQLite table, so any worker process on the host can serve them by ID and
+   send them straight from disk
+2. Opaque artifact IDs to keep in the session instead of filesystem paths
+3. Spool files for large artifacts (the Excel report) written in place, so
+   they are never held in memory
+4. A janitor for expired artifacts, abandoned spool files and the receipt and
+   report files the app used to leave in the temp directory
+"""
+
+import os
+import time
+import glob
+import secrets
+import sqlite3
+import tempfile
+
+from database import get_db
+
+# Seconds a stored artifact can still be downloaded
+ARTIFACT_TTL = 24 * 3600
+
+# Temp files older than this are removed by the janitor
+ARTIFACT_FILE_MAX_AGE = 3600
+
+# Files the app used to leave behind (NamedTemporaryFile receipts and reports)
+ARTIFACT_FILE_PATTERNS = ('tmp*.pdf', 'tmp*.xlsx')
+
+# Directory of the artifact files (shared by every worker process of the host)
+ARTIFACT_DIR = os.environ.get('HOTEL_ARTIFACT_DIR') or os.path.join(tempfile.gettempdir(), 'hotel_artifacts')
+
+# Suffix of a spool file still being written
+SPOOL_SUFFIX = '.part'
+
+
+def ensure_artifact_schema(conn):
+    """Create the artifact table"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(generated_artifacts)')}
+    if 'data' in columns:
+        # Table of the BLOB store: its artifacts (at most ARTIFACT_TTL old) are given up
+        conn.execute('DROP TABLE generated_artifacts')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS generated_artifacts (
+            artifact_id TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            mimetype TEXT NOT NULL,
+            path TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_generated_artifacts_created ON generated_artifacts (created_at)')
+    conn.commit()
+
+
+def artifact_dir():
+    """ARTIFACT_DIR, created on first use"""
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    return ARTIFACT_DIR
+
+
+def spool_artifact():
+    """A binary file in ARTIFACT_DIR to write a large artifact into; pass its name to store_artifact"""
+    return tempfile.NamedTemporaryFile(dir=artifact_dir(), suffix=SPOOL_SUFFIX, delete=False)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # already gone
+
+
+def store_artifact(data, filename, mimetype='application/pdf', conn=None):
+    """Save a generated file and return its artifact ID.
+
+    `data` is bytes (or a memoryview), or the path of a finished spool_artifact() file, which is moved.
+    """
+    conn = conn or get_db()
+    ensure_artifact_schema(conn)
+    artifact_id = secrets.token_urlsafe(16)
+    path = os.path.join(artifact_dir(), artifact_id + os.path.splitext(filename)[1])
+    if isinstance(data, str):
+        os.replace(data, path)
+    else:
+        with open(path, 'wb') as output:
+            output.write(data)
+    now = time.time()
+    try:
+        expired = [row[0] for row in conn.execute(
+            'SELECT path FROM generated_artifacts WHERE created_at < ?', (now - ARTIFACT_TTL,))]
+        conn.execute('DELETE FROM generated_artifacts WHERE created_at < ?', (now - ARTIFACT_TTL,))
+        conn.execute('''
+            INSERT INTO generated_artifacts (artifact_id, filename, mimetype, path, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (artifact_id, filename, mimetype, path, now))
+        conn.commit()
+    except Exception:
+        _remove(path)
+        raise
+    for old in expired:
+        _remove(old)
+    return artifact_id
+
+
+def load_artifact(artifact_id, conn=None):
+    """Return (path, filename, mimetype) for an artifact ID, or None if unknown, expired or gone"""
+    if not artifact_id:
+        return None
+    conn = conn or get_db()
+    try:
+        row = conn.execute('''
+            SELECT path, filename, mimetype FROM generated_artifacts
+            WHERE artifact_id = ? AND created_at >= ?
+        ''', (artifact_id, time.time() - ARTIFACT_TTL)).fetchone()
+    except sqlite3.OperationalError:
+        return None  # artifact table not created yet
+    if row is None or not os.path.exists(row[0]):
+        return None
+    return row
+
+
+def clean_artifact_files(directory=None, max_age=ARTIFACT_FILE_MAX_AGE, now=None, store=None):
+    """Remove stale receipt/report temp files and expired files of the artifact store (ARTIFACT_DIR)
+    owned by this user; returns how many"""
+    directory = directory or tempfile.gettempdir()
+    store = store or ARTIFACT_DIR
+    now = now or time.time()
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    # Artifacts live for ARTIFACT_TTL; a spool file nobody finished is as stale as a temp file
+    candidates = [(os.path.join(directory, pattern), max_age) for pattern in ARTIFACT_FILE_PATTERNS]
+    candidates += [(os.path.join(store, '*' + SPOOL_SUFFIX), max_age), (os.path.join(store, '*'), ARTIFACT_TTL)]
+    removed = 0
+    for pattern, age in candidates:
+        for path in glob.glob(pattern):
+            try:
+                stat = os.stat(path)
+                if uid is not None and stat.st_uid != uid:
+                    continue
+                if now - stat.st_mtime < age:
+                    continue
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass  # already gone or still open on Windows
+    return removed
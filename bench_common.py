@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the benchmark scripts
+Loads the Flask app, builds seeded copies of the hotel database (spread
+evenly, or with festival rushes, weekends and returning guests) and runs
+concurrent request loops through the Flask test client or any other caller.
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DATABASE = os.path.join(BASE_DIR, 'hotel_management.db')
+
+sys.path.insert(0, BASE_DIR)
+
+from serve import load_app
+
+FIRST_NAMES = ['Ramesh', 'Suresh', 'Sita', 'Geeta', 'Mohan', 'Radha', 'Amit', 'Priya',
+               'Vijay', 'Anita', 'Rajesh', 'Kavita', 'Sunil', 'Pooja', 'Deepak', 'Meena']
+LAST_NAMES = ['Aggarwal', 'Sharma', 'Gupta', 'Verma', 'Singh', 'Mittal', 'Goel', 'Bansal']
+CITIES = ['Delhi', 'Meerut', 'Jaipur', 'Ludhiana', 'Ambala', 'Hisar', 'Agra', 'Dehradun']
+PAYMENT_MODES = ['Cash', 'Cash', 'Cash', 'Online', 'Online', 'Card', 'Cheque']
+
+# Festival rushes around Haridwar: (month, first day, length in days, check-ins relative to a normal day)
+FESTIVALS = [
+    (1, 13, 3, 4.0),    # Makar Sankranti
+    (3, 12, 4, 3.0),    # Holi
+    (4, 12, 3, 3.0),    # Baisakhi
+    (6, 3, 5, 5.0),     # Ganga Dussehra
+    (7, 11, 14, 6.0),   # Kanwar Yatra
+    (10, 18, 5, 3.0),   # Diwali
+    (11, 13, 3, 4.0),   # Kartik Purnima
+]
+WEEKEND_WEIGHT = 1.5
+
+# Share of check-ins by a guest who stayed before (same name, Aadhaar and mobile)
+REPEAT_GUEST_SHARE = 0.3
+
+
+def prepare_app(database_path, pool_size=None):
+    """Load the app against `database_path` (its sessions are stored there too)"""
+    module = load_app()
+    import database
+
+    database.configure(database_path, pool_size)
+    return module
+
+
+def create_empty_database(path):
+    """Create a database with the same schema (and users) as hotel_management.db"""
+    source = sqlite3.connect(SOURCE_DATABASE)
+    target = sqlite3.connect(path)
+    # FTS5 creates its own shadow tables along with the virtual table
+    shadow = {row[1] for row in source.execute('PRAGMA table_list') if row[2] == 'shadow'}
+    for name, sql in source.execute(
+            "SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"):
+        if name not in shadow:
+            target.execute(sql)
+    for row in source.execute('SELECT id, username, password_hash, created_at FROM users'):
+        target.execute('INSERT INTO users VALUES (?, ?, ?, ?)', row)
+    for row in source.execute('SELECT id, current_number, last_updated FROM receipt_counter'):
+        target.execute('INSERT INTO receipt_counter VALUES (?, ?, ?)', row)
+    target.commit()
+    source.close()
+    target.close()
+
+
+def synthetic_tourist(rng, check_in_date, room_number, sequence, guest=None):
+    """Build one tourists row (column order matches TOURIST_COLUMNS); `guest` reuses a known identity"""
+    male = rng.randint(0, 3)
+    female = rng.randint(0, 3)
+    paid = float(rng.choice([500, 800, 1000, 1200, 1500, 2000]))
+    created = datetime.combine(check_in_date, datetime.min.time()) + timedelta(
+        seconds=rng.randint(6 * 3600, 22 * 3600))
+    row = (
+        f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+        f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+        rng.randint(18, 80),
+        '',
+        f'{rng.randint(1, 500)}, Main Road, {rng.choice(CITIES)}',
+        f'{rng.randint(10**11, 10**12 - 1)}',
+        f'{rng.randint(6 * 10**9, 10**10 - 1)}',
+        '',
+        rng.choice(['M', 'F']),
+        male,
+        female,
+        rng.randint(0, 2),
+        paid,
+        float(rng.choice([0, 0, 0, 200, 500])),
+        1,
+        room_number,
+        check_in_date.isoformat(),
+        (check_in_date + timedelta(days=rng.randint(1, 3))).isoformat(),
+        '11:00',
+        0,
+        f'RCP{check_in_date.strftime("%Y%m%d")}{sequence:04d}',
+        '',
+        created.strftime('%Y-%m-%d %H:%M:%S'),
+        rng.choice(PAYMENT_MODES),
+    )
+    if guest is None:
+        return row
+    row = list(row)
+    for index, value in zip(GUEST_FIELDS, guest):
+        row[index] = value
+    return tuple(row)
+
+
+# Row positions of what stays the same when a guest returns: name, father/spouse, age, address, Aadhaar, mobile, gender
+GUEST_FIELDS = (0, 1, 2, 4, 5, 6, 8)
+
+
+def guest_identity(row):
+    """The GUEST_FIELDS of a tourists row"""
+    return tuple(row[index] for index in GUEST_FIELDS)
+
+
+TOURIST_COLUMNS = (
+    'full_name, father_spouse_name, age, work, address, aadhar_number, mobile_number, '
+    'alternate_mobile, gender, male_count, female_count, children_count, amount_paid_today, '
+    'remaining_amount, check_in_done, room_number, check_in_date, check_out_date, '
+    'check_out_time, extra_bed, recipe_number, comments, created_at, payment_mode'
+)
+
+
+def seed_tourists(path, rows, days=365, seed=42, end_date=None):
+    """Fill the tourists table with synthetic guests spread evenly over `days` days"""
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now().date()
+    placeholders = ', '.join('?' * len(TOURIST_COLUMNS.split(',')))
+    sql = f'INSERT INTO tourists ({TOURIST_COLUMNS}) VALUES ({placeholders})'
+    conn = sqlite3.connect(path)
+    batch = []
+    for i in range(rows):
+        check_in_date = end_date - timedelta(days=i % days)
+        sequence = i // days
+        batch.append(synthetic_tourist(rng, check_in_date, sequence % 157 + 1, sequence + 1))
+        if len(batch) >= 10000:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def day_weights(days, end_date):
+    """Relative check-in volume of each of the `days` days up to end_date"""
+    weights = []
+    for offset in range(days - 1, -1, -1):
+        day = end_date - timedelta(days=offset)
+        weight = WEEKEND_WEIGHT if day.weekday() >= 5 else 1.0
+        for month, first, length, rush in FESTIVALS:
+            start = day.replace(month=month, day=first)
+            if start <= day < start + timedelta(days=length):
+                weight *= rush
+        weights.append((day, weight))
+    return weights
+
+
+def seed_realistic_tourists(path, rows, days=365, seed=42, end_date=None):
+    """Fill the tourists table chronologically with festival rushes, busier weekends and returning guests"""
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now().date()
+    calendar = day_weights(days, end_date)
+    check_in_dates = sorted(rng.choices([day for day, _ in calendar],
+                                        weights=[weight for _, weight in calendar], k=rows))
+    placeholders = ', '.join('?' * len(TOURIST_COLUMNS.split(',')))
+    sql = f'INSERT INTO tourists ({TOURIST_COLUMNS}) VALUES ({placeholders})'
+    conn = sqlite3.connect(path)
+    guests = []
+    batch = []
+    sequence = 0
+    for index, check_in_date in enumerate(check_in_dates):
+        sequence = sequence + 1 if index and check_in_dates[index - 1] == check_in_date else 1
+        guest = None
+        if guests and rng.random() < REPEAT_GUEST_SHARE:
+            # Regulars come back most: favour the earliest guests
+            guest = guests[int(len(guests) * rng.random() ** 2)]
+        row = synthetic_tourist(rng, check_in_date, (sequence - 1) % 157 + 1, sequence, guest)
+        if guest is None:
+            guests.append(guest_identity(row))
+        batch.append(row)
+        if len(batch) >= 10000:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def make_seeded_database(rows, days=365, seed=42, realistic=False):
+    """Create a temporary seeded database and return its path"""
+    fd, path = tempfile.mkstemp(suffix='.db', prefix='bench_hotel_')
+    os.close(fd)
+    os.remove(path)
+    create_empty_database(path)
+    seeder = seed_realistic_tourists if realistic else seed_tourists
+    seeder(path, rows, days=days, seed=seed)
+    return path
+
+
+def logged_in_client(flask_app):
+    """Return a test client with an authenticated admin session"""
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['username'] = 'admin'
+    return client
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_concurrent(flask_app, path, threads=8, requests_per_thread=50):
+    """Hit `path` from several threads and summarise the request latencies (ms)"""
+    def make_caller():
+        client = logged_in_client(flask_app)
+        return lambda: client.get(path).status_code
+
+    return run_load(make_caller, threads, requests_per_thread)
+
+
+def run_load(make_caller, threads=8, requests_per_thread=50):
+    """Call make_caller() once per thread, then its result (returning an HTTP status) repeatedly; summarise"""
+    latencies = []
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        call = make_caller()
+        local = []
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            status = call()
+            local.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors.append(status)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
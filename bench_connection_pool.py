@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the pooled SQLite connection layer
+Compares p50/p99 latency of / and /api/room_status under concurrent load
+with the pool disabled (connect per request) and enabled (WAL + tuned PRAGMAs).
+"""
+
+import os
+import sys
+
+from bench_common import make_seeded_database, prepare_app, run_concurrent
+
+ROUTES = ['/', '/api/room_status']
+THREADS = 8
+REQUESTS_PER_THREAD = 100
+SEED_ROWS = 20000
+
+
+def benchmark_connection_pool(rows=SEED_ROWS, threads=THREADS, requests_per_thread=REQUESTS_PER_THREAD):
+    """Run both modes against the same seeded database and return the results"""
+    db_path = make_seeded_database(rows)
+    results = {}
+    try:
+        for label, pool_size in (('connect-per-request', 0), ('pooled', 8)):
+            module = prepare_app(db_path, pool_size)
+            for route in ROUTES:
+                # Warm-up pass so template compilation is not measured
+                run_concurrent(module.app, route, threads=1, requests_per_thread=5)
+                results[(label, route)] = run_concurrent(
+                    module.app, route, threads=threads, requests_per_thread=requests_per_thread)
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    return results
+
+
+def main():
+    """Print a latency comparison table"""
+    print("🏨 Connection pool benchmark")
+    print("=" * 72)
+    results = benchmark_connection_pool()
+
+    print(f"{'mode':<22}{'route':<20}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>10}")
+    for (label, route), stats in results.items():
+        print(f"{label:<22}{route:<20}{stats['p50_ms']:>9}{stats['p99_ms']:>9}{stats['throughput_rps']:>10}")
+
+    print("-" * 72)
+    for route in ROUTES:
+        before = results[('connect-per-request', route)]
+        after = results[('pooled', route)]
+        print(f"{route}: p50 {before['p50_ms']} -> {after['p50_ms']} ms, "
+              f"p99 {before['p99_ms']} -> {after['p99_ms']} ms")
+
+    failed = sum(stats['errors'] for stats in results.values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Load-test benchmark for the hotel management app
+Seeds a database with the production schema at 10k/100k/1M tourists
+(festival rushes, busier weekends, returning guests, mixed payment modes),
+drives the main pages, check-in, search, Excel export, receipts and the
+JSON APIs through the Flask test client and over HTTP against pre-forked
+workers, and writes a JSON results file that --compare diffs against the
+results of another commit.
+
+    python bench_load.py --size 100k --output results.json
+    python bench_load.py --size 100k --compare results.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import socket
+import sqlite3
+import logging
+import argparse
+import platform
+import subprocess
+import http.client
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from bench_common import (
+    make_seeded_database,
+    prepare_app,
+    logged_in_client,
+    run_load,
+    FIRST_NAMES,
+    LAST_NAMES,
+    CITIES,
+    PAYMENT_MODES
+)
+
+SIZES = {'10k': 10000, '100k': 100000, '1m': 1000000}
+DAYS = 365
+SEED = 42
+THREADS = 4
+REQUESTS_PER_THREAD = 25
+
+# p50 or p99 changes smaller than this (percent) are reported as unchanged by --compare
+NOISE_PERCENT = 10
+
+
+class Workload:
+    """Request parameters drawn from the seeded data (same seed, same requests)"""
+
+    def __init__(self, db_path, seed=SEED):
+        conn = sqlite3.connect(db_path)
+        self.max_id = conn.execute('SELECT MAX(id) FROM tourists').fetchone()[0]
+        self.aadhars = [row[0] for row in conn.execute(
+            'SELECT aadhar_number FROM tourists GROUP BY aadhar_number HAVING COUNT(*) > 1 LIMIT 500')]
+        self.last_day = datetime.strptime(
+            conn.execute('SELECT MAX(check_in_date) FROM tourists').fetchone()[0], '%Y-%m-%d').date()
+        conn.close()
+        self.seed = seed
+
+    def rng(self, thread_seed):
+        return random.Random(self.seed * 1000 + thread_seed)
+
+    def tourist_id(self, rng):
+        return rng.randint(1, self.max_id)
+
+    def checkin_form(self, rng):
+        return {
+            'full_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'address': f'{rng.randint(1, 500)}, Main Road, {rng.choice(CITIES)}',
+            'aadhar_number': str(rng.randint(10**11, 10**12 - 1)),
+            'mobile_number': str(rng.randint(6 * 10**9, 10**10 - 1)),
+            'amount_paid_today': str(rng.choice([500, 800, 1000, 1500])),
+            'remaining_amount': '0',
+            'check_in_done': 'yes',
+            'room_number': str(rng.randint(1, 157)),
+            'payment_mode': rng.choice(PAYMENT_MODES),
+            'male_count': str(rng.randint(0, 3)),
+            'female_count': str(rng.randint(0, 3)),
+            'check_out_date': (datetime.now().date() + timedelta(days=rng.randint(1, 3))).isoformat(),
+        }
+
+    def week(self, rng):
+        last = self.last_day - timedelta(days=rng.randint(0, 300))
+        return {'from': (last - timedelta(days=6)).isoformat(), 'to': last.isoformat()}
+
+
+# name -> (method, function(workload, rng) -> (path, form data or None))
+ROUTES = {
+    'dashboard': ('GET', lambda w, rng: ('/', None)),
+    'checkin_form': ('GET', lambda w, rng: ('/checkin', None)),
+    'checkin_submit': ('POST', lambda w, rng: ('/checkin', w.checkin_form(rng))),
+    'search_name': ('POST', lambda w, rng: ('/search_tourists', {'name': rng.choice(FIRST_NAMES)})),
+    'search_aadhar': ('POST', lambda w, rng: ('/search_tourists', {'aadhar': rng.choice(w.aadhars)})),
+    'export_excel_week': ('GET', lambda w, rng: ('/export_excel?' + urlencode(w.week(rng)), None)),
+    'receipt_pdf': ('GET', lambda w, rng: (f'/download_custom_receipt/{w.tourist_id(rng)}', None)),
+    'api_room_status': ('GET', lambda w, rng: ('/api/room_status', None)),
+    'api_available_rooms': ('GET', lambda w, rng: ('/api/available_rooms', None)),
+    'api_calendar': ('GET', lambda w, rng: ('/api/calendar', None)),
+    'api_daily_stats': ('GET', lambda w, rng: ('/api/daily_stats?' + urlencode(w.week(rng)), None)),
+    'api_tourist_profiles': ('GET', lambda w, rng: ('/api/tourist_profiles', None)),
+    'api_tourist_details': ('GET', lambda w, rng: (f'/api/tourist_details/{w.tourist_id(rng)}', None)),
+}
+
+
+def test_client_caller(flask_app, workload, route):
+    """make_caller for run_load: one logged-in test client per thread"""
+    method, build = ROUTES[route]
+    thread_seeds = iter(range(10**6))
+
+    def make_caller():
+        client = logged_in_client(flask_app)
+        rng = workload.rng(next(thread_seeds))
+
+        def call():
+            path, data = build(workload, rng)
+            response = client.open(path, method=method, data=data)
+            response.get_data()
+            return response.status_code
+        return call
+    return make_caller
+
+
+def http_caller(port, cookie, workload, route):
+    """make_caller for run_load: one keep-alive HTTP connection per thread"""
+    method, build = ROUTES[route]
+    thread_seeds = iter(range(10**6))
+
+    def make_caller():
+        rng = workload.rng(next(thread_seeds))
+        state = {'conn': http.client.HTTPConnection('127.0.0.1', port, timeout=120)}
+
+        def call():
+            path, data = build(workload, rng)
+            headers = {'Cookie': cookie}
+            body = None
+            if data is not None:
+                body = urlencode(data)
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            for attempt in (1, 2):
+                try:
+                    state['conn'].request(method, path, body=body, headers=headers)
+                    response = state['conn'].getresponse()
+                    response.read()
+                    if response.will_close:
+                        state['conn'].close()
+                    return response.status
+                except (http.client.HTTPException, OSError):
+                    # The server closed an idle keep-alive connection: reconnect once
+                    state['conn'].close()
+                    if attempt == 2:
+                        return 599
+        return call
+    return make_caller
+
+
+def session_cookie(flask_app):
+    """Cookie header of a logged-in admin session (sessions are stored server side)"""
+    client = logged_in_client(flask_app)
+    name = flask_app.config.get('SESSION_COOKIE_NAME', 'session')
+    return f'{name}={client.get_cookie(name).value}'
+
+
+def start_http_server(module, workers):
+    """Serve the warmed app from pre-forked workers on a free port; returns (port, stop)"""
+    import serve
+
+    listener = socket.create_server(('127.0.0.1', 0), backlog=serve.LISTEN_BACKLOG)
+    port = listener.getsockname()[1]
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            status = serve.PreforkServer(module.app, listener, workers).run()
+        finally:
+            os._exit(status)
+    listener.close()
+
+    def stop():
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    return port, stop
+
+
+def run_routes(make_caller_for, routes, threads, requests_per_thread):
+    """Warm each route with a few requests, then load it; returns {route: summary}"""
+    results = {}
+    for route in routes:
+        run_load(make_caller_for(route), threads=1, requests_per_thread=3)
+        results[route] = run_load(make_caller_for(route), threads=threads, requests_per_thread=requests_per_thread)
+        print(f"   {route:<22}{results[route]['p50_ms']:>10}{results[route]['p99_ms']:>10}"
+              f"{results[route]['throughput_rps']:>10}{results[route]['errors']:>8}")
+    return results
+
+
+def git_revision():
+    """(commit, has uncommitted changes) of the tree being measured"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        return commit or None, bool(dirty)
+    except OSError:
+        return None, None
+
+
+def run_benchmark(rows, routes=None, threads=THREADS, requests_per_thread=REQUESTS_PER_THREAD, modes=('test_client', 'http'),
+                  workers=None, seed=SEED):
+    """Seed a database, load every route in every mode and return the results document"""
+    import serve
+    import app_logging
+    import admission
+
+    routes = list(routes or ROUTES)
+    workers = workers or serve.default_workers()
+    # One log line per request would measure the log stream, not the app
+    quiet = {'werkzeug': 'WARNING', 'app': 'WARNING'}
+    saved_levels = {name: logging.getLogger(name).level for name in quiet}
+    saved_depth = admission.EXPORT_QUEUE_DEPTH
+    app_logging.setup_logging(levels=quiet)
+    # No job worker runs here: export_excel_week measures queueing the export, so the queue never drains
+    admission.EXPORT_QUEUE_DEPTH = 10**9
+    try:
+        return _run_benchmark(rows, routes, threads, requests_per_thread, modes, workers, seed)
+    finally:
+        # The levels and the queue depth were for this run only
+        admission.EXPORT_QUEUE_DEPTH = saved_depth
+        for name, level in saved_levels.items():
+            logging.getLogger(name).setLevel(level)
+
+
+def _run_benchmark(rows, routes, threads, requests_per_thread, modes, workers, seed):
+    """run_benchmark under the benchmark's log levels and export queue depth"""
+    import serve
+
+    commit, dirty = git_revision()
+    document = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'cpu_count': os.cpu_count(),
+        'config': {'rows': rows, 'days': DAYS, 'seed': seed, 'threads': threads,
+                   'requests_per_thread': requests_per_thread, 'workers': workers},
+        'results': {},
+    }
+
+    started = time.perf_counter()
+    db_path = make_seeded_database(rows, days=DAYS, seed=seed, realistic=True)
+    document['seed_seconds'] = round(time.perf_counter() - started, 2)
+    try:
+        workload = Workload(db_path, seed)
+        module = prepare_app(db_path)
+        started = time.perf_counter()
+        serve.warm_up(module)
+        document['warm_up_seconds'] = round(time.perf_counter() - started, 2)
+
+        print(f"   {'route':<22}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}")
+        if 'test_client' in modes:
+            print("🧪 Flask test client")
+            document['results']['test_client'] = run_routes(
+                lambda route: test_client_caller(module.app, workload, route), routes, threads, requests_per_thread)
+            # Test-client requests opened pooled connections: none may cross the fork below
+            serve.warm_up(module)
+        if 'http' in modes and hasattr(os, 'fork'):
+            print(f"🌐 HTTP, {workers} pre-forked workers")
+            cookie = session_cookie(module.app)
+            port, stop = start_http_server(module, workers)
+            try:
+                document['results']['http'] = run_routes(
+                    lambda route: http_caller(port, cookie, workload, route), routes, threads, requests_per_thread)
+            finally:
+                stop()
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    return document
+
+
+def compare(baseline, current):
+    """Lines describing p50/p99 changes per mode and route between two results documents"""
+    lines = []
+    for key, value in current['config'].items():
+        if baseline.get('config', {}).get(key) != value:
+            lines.append(f"⚠️ {key} differs: {baseline.get('config', {}).get(key)} -> {value}")
+    for mode, routes in current['results'].items():
+        for route, now in routes.items():
+            before = baseline.get('results', {}).get(mode, {}).get(route)
+            if before is None:
+                lines.append(f"{mode:<12}{route:<22} new")
+                continue
+            changes = []
+            for key in ('p50_ms', 'p99_ms'):
+                delta = (now[key] - before[key]) * 100 / before[key] if before[key] else 0.0
+                mark = '' if abs(delta) < NOISE_PERCENT else (' ⚠️' if delta > 0 else ' 🚀')
+                changes.append(f"{key[:3]} {before[key]:.1f} -> {now[key]:.1f} ms ({delta:+.0f}%){mark}")
+            lines.append(f"{mode:<12}{route:<22} " + ', '.join(changes))
+    return lines
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Load-test the hotel management app')
+    parser.add_argument('--size', choices=sorted(SIZES), default='10k', help='tourists to seed')
+    parser.add_argument('--rows', type=int, help='tourists to seed (overrides --size)')
+    parser.add_argument('--routes', help='comma-separated subset of: ' + ', '.join(ROUTES))
+    parser.add_argument('--mode', choices=['test_client', 'http', 'both'], default='both')
+    parser.add_argument('--threads', type=int, default=THREADS)
+    parser.add_argument('--requests', type=int, default=REQUESTS_PER_THREAD, help='requests per thread and route')
+    parser.add_argument('--workers', type=int, help='HTTP worker processes (default: as serve.py)')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--output', help='write the results JSON here')
+    parser.add_argument('--compare', help='results JSON of another commit to compare against')
+    args = parser.parse_args(argv)
+
+    routes = args.routes.split(',') if args.routes else None
+    unknown = set(routes or ()) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+    rows = args.rows or SIZES[args.size]
+    modes = ('test_client', 'http') if args.mode == 'both' else (args.mode,)
+
+    print(f"🏨 Load test: {rows} tourists, {args.threads} threads x {args.requests} requests per route")
+    print("=" * 72)
+    document = run_benchmark(rows, routes, args.threads, args.requests, modes, args.workers, args.seed)
+    print("-" * 72)
+    print(f"Seeded in {document['seed_seconds']} s, warmed up in {document['warm_up_seconds']} s")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(document, output, indent=2)
+        print(f"💾 Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"📊 Compared with {(baseline.get('commit') or 'unknown')[:10]}:")
+        for line in compare(baseline, document):
+            print('   ' + line)
+
+    failed = sum(stats['errors'] for mode in document['results'].values() for stats in mode.values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for session load/save cost per request
+Compares the SQLite session store with Flask-Session's filesystem store (when
+installed) and Flask's signed cookie, with many sessions already stored:
+open + save of a session on a read-only request and on one that changes it.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+from werkzeug.test import EnvironBuilder
+
+import database
+from bench_common import create_empty_database, percentile
+from sessions import SqliteSessionInterface, ensure_session_schema
+
+STORED_SESSIONS = 10000
+REQUESTS = 2000
+
+
+def _app():
+    app = Flask(__name__)
+    app.secret_key = 'session-benchmark'
+    app.teardown_appcontext(database.close_db)
+    return app
+
+
+def _request(app, cookie=None):
+    headers = {'Cookie': f"{app.config['SESSION_COOKIE_NAME']}={cookie}"} if cookie else {}
+    return app.request_class(EnvironBuilder(path='/', headers=headers).get_environ())
+
+
+def _cookie(app, response):
+    prefix = app.config['SESSION_COOKIE_NAME'] + '='
+    for header in response.headers.getlist('Set-Cookie'):
+        if header.startswith(prefix):
+            return header[len(prefix):].split(';', 1)[0]
+    return None
+
+
+def _backends(workdir, stored):
+    """(name, Flask app using that session backend) pairs"""
+    backends = []
+    try:
+        from flask_session import Session
+        app = _app()
+        # Past SESSION_FILE_THRESHOLD (500 by default) files it evicts sessions, signing their users out
+        app.config.update(SESSION_TYPE='filesystem', SESSION_FILE_DIR=os.path.join(workdir, 'flask_session'),
+                          SESSION_FILE_THRESHOLD=stored + 1)
+        Session(app)
+        backends.append(('filesystem', app))
+    except ImportError:
+        print("⚠️ Flask-Session not installed: filesystem store skipped")
+    app = _app()
+    app.session_interface = SqliteSessionInterface()
+    backends.append(('sqlite', app))
+    app = _app()
+    app.session_interface = SecureCookieSessionInterface()
+    backends.append(('signed-cookie', app))
+    return backends
+
+
+def _timed(app, cookies, requests, change, rng):
+    interface = app.session_interface
+    samples = []
+    for number in range(requests):
+        request = _request(app, rng.choice(cookies))
+        started = time.perf_counter()
+        session = interface.open_session(app, request)
+        assert session.get('user_id') == 1, 'stored session not found'
+        if change:
+            session['last_seen'] = number
+        interface.save_session(app, session, app.response_class())
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {'p50_us': round(percentile(samples, 50), 1), 'p99_us': round(percentile(samples, 99), 1),
+            'mean_us': round(sum(samples) / len(samples), 1)}
+
+
+def benchmark_sessions(stored=STORED_SESSIONS, requests=REQUESTS, seed=42):
+    """{(backend, 'read' | 'write'): timings in microseconds} with `stored` sessions in each store"""
+    workdir = tempfile.mkdtemp(prefix='bench_sessions_')
+    db_path = os.path.join(workdir, 'sessions.db')
+    create_empty_database(db_path)
+    previous = database.DATABASE_PATH
+    database.configure(db_path)
+    results = {}
+    try:
+        for name, app in _backends(workdir, stored):
+            with app.app_context():
+                ensure_session_schema(database.get_db())
+                database.get_db().commit()
+                cookies = []
+                for _ in range(stored):
+                    session = app.session_interface.open_session(app, _request(app))
+                    session.update(user_id=1, username='admin')
+                    response = app.response_class()
+                    app.session_interface.save_session(app, session, response)
+                    cookies.append(_cookie(app, response))
+                for mode in ('read', 'write'):
+                    results[(name, mode)] = _timed(app, cookies, requests, mode == 'write', random.Random(seed))
+    finally:
+        database.configure(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    """Print a per-request session cost table"""
+    print(f"🍪 Session store benchmark ({STORED_SESSIONS} stored sessions, {REQUESTS} requests each)")
+    print("=" * 64)
+    results = benchmark_sessions()
+    print(f"{'store':<16}{'request':<10}{'p50 µs':>12}{'p99 µs':>12}{'mean µs':>12}")
+    for (name, mode), stats in results.items():
+        print(f"{name:<16}{mode:<10}{stats['p50_us']:>12}{stats['p99_us']:>12}{stats['mean_us']:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
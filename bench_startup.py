@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Start-up benchmark for the hotel management app
+Imports the app (and the CLI tools) in fresh interpreters under
+`python -X importtime`, reports the wall time and the slowest top-level
+imports, and lists any heavy library (NumPy, openpyxl, ReportLab, pandas)
+that was loaded although nothing needed it yet.
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+import time
+
+from bench_common import BASE_DIR, percentile
+
+# What a worker, a test script or a CLI tool imports before doing anything
+STARTUP_TARGETS = {
+    'app': 'import serve; serve.load_app()',
+    'receipt_batch': 'import receipt_batch',
+    'daily_stats': 'import daily_stats',
+}
+
+# Loaded on first use only: the Excel export, receipts and the calendar import them
+HEAVY_MODULES = ('numpy', 'openpyxl', 'reportlab', 'pandas')
+
+RUNS = 5
+
+
+def parse_importtime(stderr):
+    """[(module, self µs, cumulative µs, depth)] from -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def measure_startup(code, runs=RUNS):
+    """Median wall time and import profile of running `code` in fresh interpreters"""
+    wall_ms, profiles = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BASE_DIR,
+                                capture_output=True, text=True)
+        wall_ms.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f'{code!r} failed:\n{result.stderr[-2000:]}')
+        profiles.append(parse_importtime(result.stderr))
+
+    imports = profiles[wall_ms.index(percentile(wall_ms, 50))]
+    top_level = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: entry[2], reverse=True)
+    loaded = {entry[0] for entry in imports}
+    return {
+        'wall_ms': round(percentile(wall_ms, 50), 1),
+        'imports_ms': round(sum(entry[2] for entry in top_level) / 1000, 1),
+        'slowest': [(name, round(cumulative / 1000, 1)) for name, _, cumulative, _ in top_level[:10]],
+        'heavy_loaded': sorted(name for name in HEAVY_MODULES if name in loaded),
+    }
+
+
+def main(argv=None):
+    """Print the start-up profile of every target"""
+    parser = argparse.ArgumentParser(description='Measure import time of the app and CLI tools')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--target', choices=sorted(STARTUP_TARGETS), action='append',
+                        help='measure only this target (repeatable)')
+    args = parser.parse_args(argv)
+
+    baseline = measure_startup('pass', args.runs)['wall_ms']
+    print(f"🚀 Start-up times (median of {args.runs}; an empty interpreter takes {baseline} ms)")
+    print("=" * 60)
+    heavy = False
+    for name in args.target or STARTUP_TARGETS:
+        profile = measure_startup(STARTUP_TARGETS[name], args.runs)
+        print(f"{name}: {profile['wall_ms']} ms wall, {profile['imports_ms']} ms in imports")
+        for module, cumulative in profile['slowest']:
+            print(f"   {module:<32}{cumulative:>8} ms")
+        if profile['heavy_loaded']:
+            heavy = True
+            print(f"   ⚠️ loaded at start-up: {', '.join(profile['heavy_loaded'])}")
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
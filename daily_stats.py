@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Daily Statistics Rollup for Hotel Management
+This module provides:
+1. daily_stats and daily_payment_stats tables with one row per check-in date
+   (and payment mode): registrations, check-ins, amounts, guests by M/F/children,
+   and rooms occupied per night
+2. Incremental maintenance inside the caller's transaction for every check-in,
+   edit and delete, so readers touch O(days) rows instead of O(guests)
+3. A full rebuild from the tourists table (python daily_stats.py --rebuild)
+"""
+
+import sys
+import sqlite3
+import argparse
+from datetime import date
+
+from occupancy import stay_nights, ensure_stay_index
+
+# Summed per check-in date (column of daily_stats -> expression over one tourists row)
+STAT_COLUMNS = {
+    'registrations': '1',
+    'check_ins': 'check_in_done = 1',
+    'amount_paid': 'COALESCE(amount_paid_today, 0)',
+    'remaining_amount': 'COALESCE(remaining_amount, 0)',
+    'male_guests': 'COALESCE(male_count, 0)',
+    'female_guests': 'COALESCE(female_count, 0)',
+    'children': 'COALESCE(children_count, 0)',
+}
+
+# tourists columns needed to roll one guest up
+STAY_COLUMNS = ('check_in_date', 'check_out_date', 'check_in_done', 'amount_paid_today', 'remaining_amount',
+                'male_count', 'female_count', 'children_count', 'payment_mode')
+
+
+def ensure_daily_stats_schema(conn):
+    """Create the rollup tables, filling them from tourists the first time"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_stats'").fetchone()
+    if not exists:
+        _create_tables(conn)
+        rebuild_daily_stats(conn)
+
+
+def _create_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            stat_date TEXT PRIMARY KEY,
+            registrations INTEGER NOT NULL DEFAULT 0,
+            check_ins INTEGER NOT NULL DEFAULT 0,
+            occupied_rooms INTEGER NOT NULL DEFAULT 0,
+            amount_paid REAL NOT NULL DEFAULT 0,
+            remaining_amount REAL NOT NULL DEFAULT 0,
+            male_guests INTEGER NOT NULL DEFAULT 0,
+            female_guests INTEGER NOT NULL DEFAULT 0,
+            children INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_payment_stats (
+            stat_date TEXT NOT NULL,
+            payment_mode TEXT NOT NULL,
+            registrations INTEGER NOT NULL DEFAULT 0,
+            amount_paid REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (stat_date, payment_mode)
+        ) WITHOUT ROWID
+    ''')
+
+
+def rebuild_daily_stats(conn):
+    """Recompute both tables from tourists; returns the number of days.
+
+    Commits only when it opened the transaction itself, so a lazy rebuild lands with the caller's write.
+    """
+    commit = not conn.in_transaction
+    ensure_stay_index(conn)
+    _create_tables(conn)
+    conn.execute('DELETE FROM daily_stats')
+    conn.execute('DELETE FROM daily_payment_stats')
+    sums = ', '.join(f'SUM({expression})' for expression in STAT_COLUMNS.values())
+    conn.execute(f'''
+        INSERT INTO daily_stats (stat_date, {', '.join(STAT_COLUMNS)})
+        SELECT substr(check_in_date, 1, 10), {sums} FROM tourists
+        WHERE check_in_date IS NOT NULL
+        GROUP BY substr(check_in_date, 1, 10)
+    ''')
+    conn.execute('''
+        INSERT INTO daily_payment_stats (stat_date, payment_mode, registrations, amount_paid)
+        SELECT substr(check_in_date, 1, 10), COALESCE(NULLIF(payment_mode, ''), 'Cash'),
+               COUNT(*), SUM(COALESCE(amount_paid_today, 0))
+        FROM tourists
+        WHERE check_in_date IS NOT NULL
+        GROUP BY 1, 2
+    ''')
+    # Every night of every checked-in stay, from the stay index (julian day N + 0.5 = noon of that date)
+    conn.execute('''
+        WITH RECURSIVE nights (night, last_night) AS (
+            SELECT first_night, last_night FROM stay_index
+            UNION ALL
+            SELECT night + 1, last_night FROM nights WHERE night < last_night
+        )
+        INSERT INTO daily_stats (stat_date, occupied_rooms)
+        SELECT date(night + 0.5), COUNT(*) FROM nights WHERE true GROUP BY night
+        ON CONFLICT (stat_date) DO UPDATE SET occupied_rooms = excluded.occupied_rooms
+    ''')
+    if commit:
+        conn.commit()
+    return conn.execute('SELECT COUNT(*) FROM daily_stats').fetchone()[0]
+
+
+def stay_row(conn, tourist_id):
+    """The STAY_COLUMNS of one guest as a dict (None if there is no such guest)"""
+    row = conn.execute(f'SELECT {", ".join(STAY_COLUMNS)} FROM tourists WHERE id = ?', (tourist_id,)).fetchone()
+    return dict(zip(STAY_COLUMNS, row)) if row else None
+
+
+def _apply(conn, stay, sign):
+    day = str(stay['check_in_date'] or '')[:10]
+    if not day:
+        return
+    checked_in = 1 if stay['check_in_done'] else 0
+    values = {
+        'registrations': 1,
+        'check_ins': checked_in,
+        'amount_paid': stay['amount_paid_today'] or 0,
+        'remaining_amount': stay['remaining_amount'] or 0,
+        'male_guests': stay['male_count'] or 0,
+        'female_guests': stay['female_count'] or 0,
+        'children': stay['children_count'] or 0,
+    }
+    updates = ', '.join(f'{name} = {name} + excluded.{name}' for name in values)
+    conn.execute(f'''
+        INSERT INTO daily_stats (stat_date, {', '.join(values)}) VALUES (?{', ?' * len(values)})
+        ON CONFLICT (stat_date) DO UPDATE SET {updates}
+    ''', [day] + [sign * value for value in values.values()])
+    conn.execute('''
+        INSERT INTO daily_payment_stats (stat_date, payment_mode, registrations, amount_paid) VALUES (?, ?, ?, ?)
+        ON CONFLICT (stat_date, payment_mode) DO UPDATE SET
+            registrations = registrations + excluded.registrations,
+            amount_paid = amount_paid + excluded.amount_paid
+    ''', (day, stay['payment_mode'] or 'Cash', sign, sign * values['amount_paid']))
+    if checked_in:
+        first, last = stay_nights(day, stay['check_out_date'])
+        nights = [(date.fromordinal(ordinal).isoformat(), sign)
+                  for ordinal in range(first.toordinal(), last.toordinal() + 1)]
+        conn.executemany('''
+            INSERT INTO daily_stats (stat_date, occupied_rooms) VALUES (?, ?)
+            ON CONFLICT (stat_date) DO UPDATE SET occupied_rooms = occupied_rooms + excluded.occupied_rooms
+        ''', nights)
+
+
+def record_stay_change(conn, old=None, new=None):
+    """Move one guest's contribution from `old` to `new` (stay_row dicts; None for insert/delete).
+
+    Call after the tourists write and before the commit, so both land together.
+    """
+    try:
+        if old:
+            _apply(conn, old, -1)
+        if new:
+            _apply(conn, new, 1)
+    except sqlite3.OperationalError:
+        # Database created before the rollup existed: build it from the tourists table as it is now
+        # (that already includes this change)
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'daily_stats'").fetchone():
+            raise
+        rebuild_daily_stats(conn)
+
+
+def day_stats(conn, day):
+    """Rollup row for one date as a dict (zeros when nothing happened that day)"""
+    rows = stats_between(conn, day, day)
+    if rows:
+        return rows[0]
+    return dict({name: 0 for name in STAT_COLUMNS}, stat_date=str(day)[:10], occupied_rooms=0)
+
+
+def stats_between(conn, first, last):
+    """Rollup rows for the dates first..last (inclusive), oldest first"""
+    columns = ['stat_date', 'occupied_rooms'] + list(STAT_COLUMNS)
+    query = f'''
+        SELECT {', '.join(columns)} FROM daily_stats
+        WHERE stat_date BETWEEN ? AND ? ORDER BY stat_date
+    '''
+    try:
+        cursor = conn.execute(query, (str(first)[:10], str(last)[:10]))
+    except sqlite3.OperationalError:
+        # Database created before the rollup existed
+        ensure_daily_stats_schema(conn)
+        cursor = conn.execute(query, (str(first)[:10], str(last)[:10]))
+    rows = [dict(zip(columns, row)) for row in cursor]
+    for row in rows:
+        row['amount_paid'] = round(row['amount_paid'], 2)
+        row['remaining_amount'] = round(row['remaining_amount'], 2)
+    return rows
+
+
+def payment_totals(conn, first, last):
+    """{payment_mode: {'registrations': n, 'amount_paid': x}} over the dates first..last"""
+    query = '''
+        SELECT payment_mode, SUM(registrations), SUM(amount_paid) FROM daily_payment_stats
+        WHERE stat_date BETWEEN ? AND ? GROUP BY payment_mode HAVING SUM(registrations) != 0
+    '''
+    try:
+        cursor = conn.execute(query, (str(first)[:10], str(last)[:10]))
+    except sqlite3.OperationalError:
+        # Database created before the rollup existed
+        ensure_daily_stats_schema(conn)
+        cursor = conn.execute(query, (str(first)[:10], str(last)[:10]))
+    return {mode: {'registrations': count, 'amount_paid': round(amount, 2)} for mode, count, amount in cursor}
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Maintain the daily statistics rollup')
+    parser.add_argument('--rebuild', action='store_true', help='recompute the rollup from the tourists table')
+    parser.add_argument('--db', help='database path (default: hotel_management.db)')
+    args = parser.parse_args(argv)
+
+    import database
+    from occupancy import ensure_occupancy_schema
+
+    conn = database.open_connection(args.db)
+    try:
+        ensure_occupancy_schema(conn)
+        if args.rebuild:
+            days = rebuild_daily_stats(conn)
+            print(f"✅ Daily statistics rebuilt: {days} days")
+        else:
+            ensure_daily_stats_schema(conn)
+        today = date.today().isoformat()
+        stats = day_stats(conn, today)
+        print(f"📊 {today}: {stats['check_ins']} check-ins, {stats['occupied_rooms']} rooms occupied, "
+              f"₹{stats['amount_paid']:.2f} paid, ₹{stats['remaining_amount']:.2f} remaining")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Shared SQLite Connection Layer for Hotel Management
+This module provides:
+1. A bounded connection pool with WAL mode and tuned PRAGMAs applied once per connection
+2. Request-scoped connections via flask.g (returned to the pool on teardown)
+3. Per-thread connections for scripts and background threads outside a request,
+   opened outside the pool so a long-lived thread never holds one of its slots
+4. The managed set of secondary indexes on the tourists table
+"""
+
+import sqlite3
+import threading
+import queue
+
+try:
+    from flask import g, has_app_context
+except ImportError:  # receipt_system can still be used from plain scripts
+    g = None
+
+    def has_app_context():
+        return False
+
+DATABASE_PATH = 'hotel_management.db'
+
+# Maximum number of open connections held by the pool (0 disables pooling)
+POOL_SIZE = 8
+
+# Seconds a caller waits for a free connection before giving up
+POOL_TIMEOUT = 10
+
+# Class of every connection opened here (the app installs metrics.TimedConnection)
+CONNECTION_FACTORY = sqlite3.Connection
+
+# PRAGMAs applied once when a connection is opened
+CONNECTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('mmap_size', 268435456),   # 256 MB memory-mapped I/O
+    ('cache_size', -16000),     # ~16 MB page cache (negative = KiB)
+    ('temp_store', 'MEMORY'),
+    ('busy_timeout', 5000),
+)
+
+# Secondary indexes maintained by ensure_indexes() (name -> definition)
+TOURIST_INDEXES = {
+    # Covers room availability: WHERE check_in_date = ? AND check_in_done = 1 -> room_number
+    'idx_tourists_checkin_room': 'tourists (check_in_date, check_in_done, room_number)',
+    'idx_tourists_recipe_number': 'tourists (recipe_number)',
+    'idx_tourists_created_at': 'tourists (created_at)',
+    # Tourist profiles page newest first by this key (legacy rows without created_at sort last)
+    'idx_tourists_profile_order': "tourists (COALESCE(created_at, ''))",
+    # Excel export streams rows in check-in date, then arrival order without a sort
+    'idx_tourists_checkin_created': 'tourists (check_in_date, created_at)',
+    'idx_tourists_aadhar_number': 'tourists (aadhar_number)',
+    'idx_tourists_mobile_number': 'tourists (mobile_number)',
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def open_connection(database_path=None, tuned=True):
+    """Open a new SQLite connection with the standard PRAGMAs applied"""
+    conn = sqlite3.connect(database_path or DATABASE_PATH, check_same_thread=False, factory=CONNECTION_FACTORY)
+    if tuned:
+        for name, value in CONNECTION_PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections for one database file"""
+
+    def __init__(self, database_path, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.database_path = database_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size) if max_size > 0 else None
+        self._all = set()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Check out a connection, opening a new one if none are idle"""
+        if self._slots is None:
+            # Pooling disabled: plain connect-per-use, as before
+            return open_connection(self.database_path, tuned=False)
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f'Connection pool exhausted ({self.max_size} connections in use)')
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            conn = open_connection(self.database_path)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._all.add(conn)
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        if self._slots is None:
+            conn.close()
+            return
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection: drop it instead of handing it out again
+            with self._lock:
+                self._all.discard(conn)
+            conn.close()
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def close_all(self):
+        """Close every connection owned by the pool"""
+        with self._lock:
+            connections = list(self._all)
+            self._all.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._idle = queue.LifoQueue()
+
+    def stats(self):
+        """Return pool usage counters"""
+        return {
+            'database_path': self.database_path,
+            'max_size': self.max_size,
+            'open': len(self._all),
+            'idle': self._idle.qsize(),
+        }
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_PATH, POOL_SIZE)
+    return _pool
+
+
+def configure(database_path=None, pool_size=None, connection_factory=None):
+    """Point the connection layer at another database, resize the pool or change the connection class"""
+    global _pool, DATABASE_PATH, POOL_SIZE, CONNECTION_FACTORY
+    with _pool_lock:
+        if database_path is not None:
+            DATABASE_PATH = database_path
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if connection_factory is not None:
+            CONNECTION_FACTORY = connection_factory
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+    release_thread_connection()
+
+
+def get_db():
+    """Get the SQLite connection for the current request (or thread)"""
+    if has_app_context():
+        if 'db' not in g:
+            g.db = get_pool().acquire()
+        return g.db
+
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        # Not from the pool: job workers and other threads keep theirs for their lifetime, and one
+        # that ends without release_thread_connection() leaves it to the garbage collector, not a slot
+        conn = _local.conn = open_connection(DATABASE_PATH)
+    return conn
+
+
+def close_db(exception=None):
+    """Return the request's connection to the pool (Flask teardown handler)"""
+    conn = g.pop('db', None) if g is not None else None
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def release_thread_connection():
+    """Close the calling thread's connection (the next get_db() in the thread opens a new one)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        _local.conn = None
+        conn.close()
+
+
+def ensure_indexes(conn):
+    """Create any missing managed index and drop managed ones no longer listed"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_tourists_%'")
+    existing = {row[0] for row in cursor.fetchall()}
+
+    for name in existing - set(TOURIST_INDEXES):
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+    created = []
+    for name, definition in TOURIST_INDEXES.items():
+        if name not in existing:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+            created.append(name)
+
+    if created:
+        # Refresh planner statistics so the new indexes are actually chosen
+        cursor.execute('ANALYZE tourists')
+    conn.commit()
+    return created
@@ -0,0 +1,198 @@
+"""
+Group Check-in for Hotel Management
+This module provides:
+1. The member list of a yatra party, one line per room ("name, aadhar[, mobile
+   [, males[, females[, room]]]]"), merged with the values the whole group shares
+2. Validation of every member in one pass, including Aadhaar numbers repeated
+   within the group
+3. Room assignment under the database write lock: requested rooms are kept, the
+   others get the tightest run of free rooms so the party stays together
+4. One transaction for the group: receipt numbers from a single counter update,
+   one executemany INSERT, the daily rollup and a single occupancy generation bump
+5. Job handlers for the merged group receipt and for rendering each member's own
+   receipt into the receipt cache; both jobs are queued with the group
+"""
+
+import logging
+from collections import namedtuple
+
+from daily_stats import ensure_daily_stats_schema, record_stay_change, stay_row
+from occupancy import bump_generation, stay_nights
+from receipt_system import allocate_receipt_numbers, get_receipt_batch_data, get_tourist_full_data
+from receipt_batch import stream_batch
+from jobs import enqueue_job, job_handler
+
+logger = logging.getLogger(__name__)
+
+# Members (rooms) one group check-in may take
+GROUP_MAX_MEMBERS = 60
+
+# Positions of the comma-separated values on a member line
+MEMBER_FIELDS = ('full_name', 'aadhar_number', 'mobile_number', 'male_count', 'female_count', 'room_number')
+
+# Values a member line may leave out, taken from the group form (or API body)
+SHARED_FIELDS = ('address', 'mobile_number', 'amount_paid_today', 'remaining_amount', 'payment_mode',
+                 'male_count', 'female_count')
+
+MEMBER_DEFAULTS = {'amount_paid_today': '0', 'remaining_amount': '0', 'payment_mode': 'Cash',
+                   'male_count': '0', 'female_count': '0', 'room_number': ''}
+
+MEMBER_BLANKS = dict(MEMBER_DEFAULTS, full_name='', address='', aadhar_number='', mobile_number='')
+
+GroupCheckIn = namedtuple('GroupCheckIn', 'tourist_ids rooms receipt_numbers generation receipt_job members_job')
+
+
+def parse_member_lines(text):
+    """Member dicts from the form's textarea (blank lines skipped)"""
+    members = []
+    for line in (text or '').splitlines():
+        values = [value.strip() for value in line.split(',')]
+        if any(values):
+            members.append({name: value for name, value in zip(MEMBER_FIELDS, values) if value})
+    return members
+
+
+def group_members(members, shared):
+    """Complete member dicts: the member's own values, else the group's, else the defaults"""
+    common = {name: str(shared[name]).strip() for name in SHARED_FIELDS if str(shared.get(name) or '').strip()}
+    complete = []
+    for member in members:
+        own = {name: str(value).strip() for name, value in member.items() if str(value or '').strip()}
+        complete.append({**MEMBER_BLANKS, **common, **own})
+    return complete
+
+
+def validate_group(members, validate):
+    """Every problem with the group at once; `validate` is the single check-in form validator"""
+    if not members:
+        return ['Add at least one group member']
+    if len(members) > GROUP_MAX_MEMBERS:
+        return [f'A group check-in takes at most {GROUP_MAX_MEMBERS} members ({len(members)} given)']
+
+    errors = []
+    seen = {}
+    for number, member in enumerate(members, 1):
+        label = f"Member {number} ({member['full_name'] or 'no name'})"
+        problems = ([] if member['full_name'] else ['Name is required']) + validate(member)
+        if not member['address']:
+            problems.append('Address is required')
+        errors.extend(f'{label}: {problem}' for problem in problems)
+        aadhar = member['aadhar_number']
+        if aadhar in seen:
+            errors.append(f'{label}: same Aadhar number as member {seen[aadhar]}')
+        seen.setdefault(aadhar, number)
+    return errors
+
+
+def assign_rooms(members, free_rooms):
+    """(room per member, errors): requested rooms if free, then the tightest run of the remaining free rooms"""
+    errors = []
+    requested = {}
+    for number, member in enumerate(members, 1):
+        if not member.get('room_number'):
+            continue
+        try:
+            room = int(member['room_number'])
+        except ValueError:
+            errors.append(f'Member {number}: invalid room number {member["room_number"]!r}')
+            continue
+        if room in requested.values():
+            errors.append(f'Member {number}: room {room} is already requested by another member')
+        elif room not in free_rooms:
+            errors.append(f'Member {number}: room {room} is not available for the whole stay')
+        requested[number] = room
+
+    free = sorted(set(free_rooms) - set(requested.values()))
+    needed = len(members) - len(requested)
+    if needed > len(free):
+        errors.append(f'Only {len(free)} free rooms for the {needed} members without a room')
+    if errors:
+        return None, errors
+
+    # Smallest span of `needed` consecutive free rooms keeps the party on one floor where possible
+    start = min(range(len(free) - needed + 1), key=lambda i: free[i + needed - 1] - free[i]) if needed else 0
+    chosen = iter(free[start:start + needed])
+    return [requested.get(number) or next(chosen) for number in range(1, len(members) + 1)], []
+
+
+def _tourist_row(member, room_number, receipt_number, today, check_out_date, comments):
+    return (
+        member['full_name'], '', None, '', member['address'], member['aadhar_number'], member['mobile_number'],
+        '', '', int(member['male_count'] or 0), int(member['female_count'] or 0), 0,
+        float(member['amount_paid_today'] or 0), float(member['remaining_amount'] or 0), True, room_number,
+        today, check_out_date.isoformat() if check_out_date else '', '', False, receipt_number, comments,
+        member['payment_mode'] or 'Cash',
+    )
+
+
+def check_in_group(conn, members, occupancy, today, check_out_date=None, group_name='', owner=None):
+    """Allocate rooms and insert the whole group in one transaction.
+
+    Returns (GroupCheckIn, []) or (None, errors) when the rooms cannot be assigned.
+    """
+    # Take the write lock before reading availability, so no other desk can take the rooms in between
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+    try:
+        free_rooms = occupancy.free_rooms_for_stay(today, check_out_date, conn)
+        rooms, errors = assign_rooms(members, free_rooms)
+        if errors:
+            conn.rollback()
+            return None, errors
+
+        # A rollup built lazily inside the loop below would count the rest of the group twice
+        ensure_daily_stats_schema(conn)
+        receipt_numbers = allocate_receipt_numbers(len(members), conn)
+        comments = f'Group: {group_name or members[0]["full_name"]} ({len(members)} rooms)'
+        conn.executemany('''
+            INSERT INTO tourists
+            (full_name, father_spouse_name, age, work, address, aadhar_number,
+             mobile_number, alternate_mobile, gender, male_count, female_count, children_count, amount_paid_today,
+             remaining_amount, check_in_done, room_number, check_in_date, check_out_date,
+             check_out_time, extra_bed, recipe_number, comments, payment_mode)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [_tourist_row(member, room, number, today, check_out_date, comments)
+              for member, room, number in zip(members, rooms, receipt_numbers)])
+        # AUTOINCREMENT ids of one statement under the write lock are consecutive
+        last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        tourist_ids = list(range(last_id - len(members) + 1, last_id + 1))
+
+        for tourist_id in tourist_ids:
+            record_stay_change(conn, new=stay_row(conn, tourist_id))
+        generation = bump_generation(conn)
+        # The receipts are rendered by the job workers; queued with the group so none is lost
+        receipt_job = enqueue_job('group_receipt', {'tourist_ids': tourist_ids}, conn, owner)
+        members_job = enqueue_job('member_receipts', {'tourist_ids': tourist_ids}, conn, owner)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    first_night, last_night = stay_nights(today, check_out_date)
+    occupancy.record_check_ins(generation, first_night, rooms, last_night)
+    return GroupCheckIn(tourist_ids, rooms, receipt_numbers, generation, receipt_job, members_job), []
+
+
+def group_receipt_pdf(tourist_ids, conn=None):
+    """One PDF with a receipt page per member"""
+    tourists = get_receipt_batch_data(tourist_ids=tourist_ids, conn=conn)
+    return b''.join(stream_batch(tourists, 'pdf', workers=1))
+
+
+@job_handler('group_receipt')
+def render_group_receipt(params, progress):
+    """Job: the merged group receipt"""
+    return group_receipt_pdf(params['tourist_ids']), 'group_receipt.pdf', 'application/pdf'
+
+
+@job_handler('member_receipts')
+def render_member_receipts(params, progress):
+    """Job: render each member's own receipt into the receipt cache"""
+    from receipt_cache import cached_receipt_pdf
+
+    tourist_ids = params['tourist_ids']
+    for done, tourist_id in enumerate(tourist_ids, 1):
+        tourist_data = get_tourist_full_data(tourist_id)
+        if tourist_data:
+            cached_receipt_pdf(tourist_data, tourist_data['recipe_number'])
+        progress(done, len(tourist_ids))
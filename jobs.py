@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Background Jobs for Hotel Management
+This module provides:
+1. A durable job queue in the app's own SQLite database (no broker): jobs are
+   enqueued in the same transaction as the change that needs them
+2. Job claiming with one UPDATE ... RETURNING under the write lock, so any
+   number of worker processes can share the queue
+3. Progress, and a heartbeat every JOB_HEARTBEAT_SECONDS from a thread of the
+   running job, written on a connection of their own; a job whose worker died
+   is queued again (up to JOB_MAX_ATTEMPTS) once its heartbeat is
+   JOB_STALE_SECONDS old
+4. Handlers registered per job kind with @job_handler; their result (bytes or a
+   spooled file) is kept as a generated artifact the job status points to
+5. The worker loop, worker processes for servers that cannot fork them, and a
+   command line runner (python jobs.py --workers 2 / --once)
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import secrets
+import sqlite3
+import argparse
+import traceback
+import threading
+
+from database import get_db, open_connection
+from artifacts import store_artifact
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+
+# Seconds an idle worker waits before looking at the queue again
+JOB_POLL_INTERVAL = 0.2
+
+# Seconds between the heartbeats of a running job, whether or not its handler reports progress
+JOB_HEARTBEAT_SECONDS = 15
+
+# A running job whose heartbeat is older than this lost its worker
+JOB_STALE_SECONDS = 60
+
+# Times a job is started before it is given up
+JOB_MAX_ATTEMPTS = 3
+
+# Seconds finished jobs are kept (their artifacts expire after ARTIFACT_TTL)
+JOB_TTL = 24 * 3600
+
+# Handlers by job kind: handler(params, progress) -> (data, filename, mimetype) or None, where data is
+# bytes or the path of a finished artifacts.spool_artifact() file
+JOB_HANDLERS = {}
+
+
+class JobError(Exception):
+    """A job that cannot succeed; the message is shown to the user and the job is not retried"""
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler of `kind` jobs"""
+    def register(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def default_job_workers(cores=None):
+    """Job worker processes for this machine: half the cores, at least one"""
+    cores = cores or os.cpu_count() or 1
+    return max(1, cores // 2)
+
+
+def ensure_job_schema(conn):
+    """Create the jobs table (the caller commits)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'queued',
+            progress INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            artifact_id TEXT,
+            error TEXT,
+            worker TEXT,
+            owner INTEGER,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            heartbeat_at REAL,
+            finished_at REAL
+        )
+    ''')
+    if 'owner' not in {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}:
+        # Queue created before jobs recorded the user who started them
+        conn.execute('ALTER TABLE jobs ADD COLUMN owner INTEGER')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_state_created ON jobs (state, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_owner_created ON jobs (owner, created_at)')
+
+
+def enqueue_job(kind, params, conn=None, owner=None):
+    """Queue a job (started by user `owner`) and return its ID; commits only when it opened the transaction itself"""
+    conn = conn or get_db()
+    job_id = secrets.token_urlsafe(16)
+    commit = not conn.in_transaction
+    row = (job_id, kind, json.dumps(params), owner, time.time())
+    insert = 'INSERT INTO jobs (job_id, kind, params, owner, created_at) VALUES (?, ?, ?, ?, ?)'
+    try:
+        conn.execute(insert, row)
+    except sqlite3.OperationalError:
+        # Database created before the queue existed
+        ensure_job_schema(conn)
+        conn.execute(insert, row)
+    if commit:
+        conn.commit()
+    return job_id
+
+
+def job_status(job_id, conn=None):
+    """The job as a dict (params decoded), or None if unknown"""
+    if not job_id:
+        return None
+    conn = conn or get_db()
+    try:
+        cursor = conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,))
+    except sqlite3.OperationalError:
+        return None  # queue not created yet
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    job = dict(zip([column[0] for column in cursor.description], row))
+    job['params'] = json.loads(job['params'])
+    return job
+
+
+def latest_job(owner, kinds, conn=None):
+    """The newest job of one of `kinds` started by user `owner` (see job_status), or None"""
+    if owner is None:
+        return None
+    conn = conn or get_db()
+    try:
+        row = conn.execute(f'''
+            SELECT job_id FROM jobs WHERE owner = ? AND kind IN ({', '.join('?' * len(kinds))})
+            ORDER BY created_at DESC, rowid DESC LIMIT 1
+        ''', (owner, *kinds)).fetchone()
+    except sqlite3.OperationalError:
+        return None  # queue not created yet
+    return job_status(row[0], conn) if row else None
+
+
+def job_counts(conn=None, kind=None):
+    """{(kind, state): count} of the queued and running jobs, of one kind or all"""
+    conn = conn or get_db()
+    query = "SELECT kind, state, COUNT(*) FROM jobs WHERE state IN ('queued', 'running')"
+    params = ()
+    if kind is not None:
+        query += ' AND kind = ?'
+        params = (kind,)
+    try:
+        rows = conn.execute(query + ' GROUP BY kind, state', params).fetchall()
+    except sqlite3.OperationalError:
+        return {}  # queue not created yet
+    return {(row[0], row[1]): row[2] for row in rows}
+
+
+def worker_name():
+    """host:pid of this worker, stored on the jobs it runs"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_job(conn, worker=None, now=None):
+    """Mark the oldest queued job running and return (job_id, kind, params), or None if there is none"""
+    now = now or time.time()
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Jobs of a worker that died: queue them again, or give up after JOB_MAX_ATTEMPTS
+        conn.execute('''
+            UPDATE jobs SET state = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END,
+                            error = CASE WHEN attempts < ? THEN error ELSE 'Worker stopped responding' END,
+                            finished_at = CASE WHEN attempts < ? THEN NULL ELSE ? END
+            WHERE state = 'running' AND heartbeat_at < ?
+        ''', (JOB_MAX_ATTEMPTS, JOB_MAX_ATTEMPTS, JOB_MAX_ATTEMPTS, now, now - JOB_STALE_SECONDS))
+        row = conn.execute('''
+            UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?,
+                            started_at = ?, heartbeat_at = ?, error = NULL
+            WHERE job_id = (SELECT job_id FROM jobs WHERE state = 'queued' ORDER BY created_at LIMIT 1)
+            RETURNING job_id, kind, params
+        ''', (worker or worker_name(), now, now)).fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if row is None:
+        return None
+    return row[0], row[1], json.loads(row[2])
+
+
+def report_progress(conn, job_id, done, total):
+    """Record how far a running job got (also its heartbeat)"""
+    conn.execute('UPDATE jobs SET progress = ?, total = ?, heartbeat_at = ? WHERE job_id = ?',
+                 (done, total, time.time(), job_id))
+    conn.commit()
+
+
+def _progress_connection(conn):
+    """A connection of its own to the database of `conn`, for progress and heartbeats"""
+    # A handler may stream a SELECT on `conn` while it reports progress; writing on that
+    # connection would upgrade a read snapshot another commit has made stale (SQLITE_BUSY_SNAPSHOT)
+    path = conn.execute('PRAGMA database_list').fetchone()[2]
+    return open_connection(path)
+
+
+def _heartbeat(conn, job_id, lock, stop, interval=None):
+    """Touch heartbeat_at every `interval` seconds until `stop` is set (runs in a thread of its own)"""
+    while not stop.wait(interval or JOB_HEARTBEAT_SECONDS):
+        with lock:
+            try:
+                conn.execute('UPDATE jobs SET heartbeat_at = ? WHERE job_id = ?', (time.time(), job_id))
+                conn.commit()
+            except sqlite3.Error as e:
+                # Database busy past the connection timeout: the next beat tries again
+                conn.rollback()
+                logger.warning("Job %s missed a heartbeat: %s", job_id, e)
+
+
+def _finish(conn, job_id, state, artifact_id=None, error=None):
+    now = time.time()
+    conn.execute('''
+        UPDATE jobs SET state = ?, artifact_id = ?, error = ?, finished_at = ?, heartbeat_at = ?
+        WHERE job_id = ?
+    ''', (state, artifact_id, error, now, now, job_id))
+    conn.execute("DELETE FROM jobs WHERE state IN ('done', 'failed') AND finished_at < ?", (now - JOB_TTL,))
+    conn.commit()
+
+
+def run_job(conn, job_id, kind, params):
+    """Run one claimed job to completion; returns its final state"""
+    handler = JOB_HANDLERS.get(kind)
+    started = time.perf_counter()
+    progress_conn = _progress_connection(conn)
+    # The heartbeat thread and the handler's progress calls share progress_conn
+    lock = threading.Lock()
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(progress_conn, job_id, lock, stop),
+                                 name=f'job-heartbeat-{job_id}', daemon=True)
+    heartbeat.start()
+
+    def progress(done, total):
+        with lock:
+            report_progress(progress_conn, job_id, done, total)
+
+    try:
+        if handler is None:
+            raise JobError(f'Unknown job kind {kind!r}')
+        result = handler(params, progress)
+        artifact_id = store_artifact(*result, conn=conn) if result else None
+    except Exception as e:
+        # Drop the handler's frames (and any cursor still reading in them) so the rollback
+        # ends its read snapshot and the failure can be recorded
+        traceback.clear_frames(e.__traceback__)
+        conn.rollback()
+        if isinstance(e, JobError):
+            _finish(conn, job_id, 'failed', error=str(e))
+            logger.warning("Job %s (%s) failed: %s", job_id, kind, e)
+        else:
+            _finish(conn, job_id, 'failed', error=f'{type(e).__name__}: {e}')
+            logger.exception("Job %s (%s) raised", job_id, kind)
+        return 'failed'
+    finally:
+        stop.set()
+        heartbeat.join()
+        progress_conn.close()
+    _finish(conn, job_id, 'done', artifact_id)
+    logger.info("Job %s (%s) done in %.2fs", job_id, kind, time.perf_counter() - started)
+    return 'done'
+
+
+def run_pending_jobs(conn=None, limit=None):
+    """Run queued jobs in this process until the queue is empty (or `limit` ran); returns how many"""
+    conn = conn or get_db()
+    ran = 0
+    while limit is None or ran < limit:
+        try:
+            job = claim_job(conn)
+        except sqlite3.OperationalError:
+            ensure_job_schema(conn)
+            conn.commit()
+            job = claim_job(conn)
+        if job is None:
+            break
+        run_job(conn, *job)
+        ran += 1
+    return ran
+
+
+def run_worker(database_path=None, stop=None, poll_interval=JOB_POLL_INTERVAL):
+    """Worker process body: run jobs until `stop` (a threading/multiprocessing Event) is set"""
+    import database
+    from serve import load_app
+
+    # The handlers are registered by the app and the modules it imports
+    load_app()
+    database.configure(database_path)
+    conn = get_db()
+    ensure_job_schema(conn)
+    conn.commit()
+    stop = stop or threading.Event()
+    logger.info("Job worker %s started", worker_name())
+    try:
+        while not stop.is_set():
+            try:
+                ran = run_pending_jobs(conn)
+            except sqlite3.OperationalError as e:
+                # Database busy past the connection timeout: try again on the next poll
+                logger.warning("Job worker could not claim a job: %s", e)
+                ran = 0
+            if not ran:
+                stop.wait(poll_interval)
+    finally:
+        database.release_thread_connection()
+
+
+def start_job_processes(count, database_path=None):
+    """Start `count` worker processes next to a server that does not fork its own; returns (processes, stop)"""
+    import multiprocessing
+    import database
+
+    # Spawned, not forked: a child must not inherit the parent's open SQLite connections
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    processes = []
+    for number in range(count):
+        process = context.Process(target=run_worker, args=(database_path or database.DATABASE_PATH, stop),
+                                          name=f'job-worker-{number + 1}', daemon=True)
+        process.start()
+        processes.append(process)
+    return processes, stop
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Run background jobs (receipts, reports) from the job queue')
+    parser.add_argument('--workers', type=int, default=default_job_workers(),
+                        help='worker processes (default: half the cores, at least one)')
+    parser.add_argument('--once', action='store_true', help='run the queued jobs in this process and exit')
+    parser.add_argument('--db', help='database path (default: hotel_management.db)')
+    args = parser.parse_args(argv)
+
+    import database
+    from serve import load_app
+
+    if args.once:
+        load_app()
+        database.configure(args.db)
+        ran = run_pending_jobs()
+        database.release_thread_connection()
+        print(f"✅ {ran} jobs run")
+        return 0
+
+    processes, stop = start_job_processes(args.workers, args.db)
+    print(f"👷 {len(processes)} job workers started: {', '.join(str(process.pid) for process in processes)}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for process in processes:
+            process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+"""
+Request Metrics for Hotel Management
+This module provides:
+1. Per-request measurements: wall time, number of SQL statements and time spent
+   in SQLite (every pooled connection hands out timed cursors), PDF render time
+   and response size, including streamed responses
+2. Histograms per route, exposed in Prometheus text format by the admin-only
+   /metrics endpoint (values are per worker process)
+3. An opt-in slow-query log: statements slower than HOTEL_SLOW_QUERY_MS are
+   logged with their EXPLAIN QUERY PLAN
+4. Admission control counters and gauges (see admission.py) and the background
+   job queue depth
+"""
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+import functools
+
+# Log statements slower than this many milliseconds (unset = slow-query log off)
+SLOW_QUERY_MS = float(os.environ['HOTEL_SLOW_QUERY_MS']) if os.environ.get('HOTEL_SLOW_QUERY_MS') else None
+
+# Lets a Prometheus server scrape /metrics with "Authorization: Bearer <token>" (unset = admin session only)
+METRICS_TOKEN = os.environ.get('HOTEL_METRICS_TOKEN')
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# Rows fetched at a time when a timed cursor is iterated
+ITERATION_CHUNK = 256
+
+# Query plans remembered for the slow-query log (statement text -> plan)
+PLAN_CACHE_SIZE = 256
+
+slow_query_logger = logging.getLogger('slow_query')
+
+_local = threading.local()
+_plans = {}
+
+
+class RequestStats:
+    """What one request has spent so far"""
+
+    __slots__ = ('started', 'route', 'method', 'status', 'sql_statements', 'sql_seconds', 'pdf_seconds',
+                 'response_bytes', 'streaming')
+
+    def __init__(self, route, method):
+        self.started = time.perf_counter()
+        self.route = route
+        self.method = method
+        self.status = 0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.pdf_seconds = 0.0
+        self.response_bytes = 0
+        self.streaming = False
+
+
+def current_stats():
+    """RequestStats of the request running on this thread, if any"""
+    return getattr(_local, 'stats', None)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with one series per label tuple"""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, counts[:], count, total) for labels, (counts, count, total) in self._series.items())
+        for label_values, counts, count, total in series:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values))
+            prefix = labels + ',' if labels else ''
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+        return lines
+
+
+class Counter:
+    """Prometheus counter with one value per label tuple"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = ','.join(f'{name}="{_escape(v)}"' for name, v in zip(self.labels, label_values))
+            lines.append(f'{self.name}{{{labels}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_SECONDS = Histogram('hotel_request_duration_seconds', 'Wall time per request',
+                            ('route', 'method', 'status'), SECONDS_BUCKETS)
+RESPONSE_BYTES = Histogram('hotel_response_size_bytes', 'Response body size', ('route',), BYTES_BUCKETS)
+SQL_STATEMENTS = Histogram('hotel_request_sql_statements', 'SQL statements run per request', ('route',),
+                           COUNT_BUCKETS)
+SQL_SECONDS = Histogram('hotel_request_sql_seconds', 'Time spent in SQLite per request', ('route',),
+                        SECONDS_BUCKETS)
+PDF_SECONDS = Histogram('hotel_request_pdf_seconds', 'Time spent rendering PDFs per request', ('route',),
+                        SECONDS_BUCKETS)
+SLOW_QUERIES = Counter('hotel_slow_queries_total', 'Statements slower than the slow-query threshold')
+ADMISSION_WAIT_SECONDS = Histogram('hotel_admission_wait_seconds', 'Time admitted requests waited for a slot',
+                                   ('class',), SECONDS_BUCKETS)
+ADMISSION_REJECTED = Counter('hotel_admission_rejected_total', 'Requests turned away with 503',
+                             ('class', 'reason'))
+
+METRICS = (REQUEST_SECONDS, RESPONSE_BYTES, SQL_STATEMENTS, SQL_SECONDS, PDF_SECONDS, SLOW_QUERIES,
+           ADMISSION_WAIT_SECONDS, ADMISSION_REJECTED)
+
+
+def start_request(route, method):
+    """Begin measuring the request on this thread"""
+    _local.stats = RequestStats(route, method)
+    return _local.stats
+
+
+def finish_request(stats):
+    """Record a finished request in the histograms"""
+    if getattr(_local, 'stats', None) is stats:
+        _local.stats = None
+    route = stats.route
+    REQUEST_SECONDS.observe((route, stats.method, str(stats.status)), time.perf_counter() - stats.started)
+    RESPONSE_BYTES.observe((route,), stats.response_bytes)
+    SQL_STATEMENTS.observe((route,), stats.sql_statements)
+    SQL_SECONDS.observe((route,), stats.sql_seconds)
+    if stats.pdf_seconds:
+        PDF_SECONDS.observe((route,), stats.pdf_seconds)
+
+
+def finish_streamed(stats):
+    """finish_request for a streamed body, once: at its end or when the response is closed"""
+    if stats.streaming:
+        stats.streaming = False
+        finish_request(stats)
+
+
+def count_streamed(chunks, stats):
+    """Pass a streamed body through, counting its bytes and finishing the request at the end.
+
+    A body that is never iterated (HEAD, client gone) never runs this generator's finally: also
+    register finish_streamed with response.call_on_close.
+    """
+    _local.stats = stats
+    try:
+        for chunk in chunks:
+            stats.response_bytes += len(chunk.encode() if isinstance(chunk, str) else chunk)
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+        finish_streamed(stats)
+
+
+def timed_pdf(function):
+    """Decorator adding the function's run time to the current request's PDF time"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats = current_stats()
+            if stats is not None:
+                stats.pdf_seconds += time.perf_counter() - started
+    return wrapper
+
+
+def _explain(conn, sql, parameters):
+    """EXPLAIN QUERY PLAN lines for a statement (cached per statement text)"""
+    plan = _plans.get(sql)
+    if plan is None:
+        try:
+            # The base class method uses a plain cursor, so this is not timed itself
+            rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', parameters)
+            plan = [row[3] for row in rows]
+        except (sqlite3.Error, ValueError):
+            plan = ['(no plan)']
+        if len(_plans) >= PLAN_CACHE_SIZE:
+            _plans.clear()
+        _plans[sql] = plan
+    return plan
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that charges its execute and fetch time to the current request"""
+
+    _sql = None
+    _parameters = ()
+    _elapsed = 0.0
+
+    def _charge(self, seconds, new_statement=False):
+        stats = current_stats()
+        if stats is not None:
+            stats.sql_seconds += seconds
+            stats.sql_statements += new_statement
+        self._elapsed += seconds
+
+    def _finish(self):
+        """Statement done: log it if it was slow"""
+        sql, self._sql = self._sql, None
+        if sql is not None and SLOW_QUERY_MS is not None and self._elapsed * 1000 >= SLOW_QUERY_MS:
+            SLOW_QUERIES.inc()
+            stats = current_stats()
+            plan = _explain(self.connection, sql, self._parameters)
+            slow_query_logger.warning('%.1f ms%s: %s\n    %s', self._elapsed * 1000,
+                                      f' ({stats.method} {stats.route})' if stats else '',
+                                      ' '.join(sql.split()), '\n    '.join(plan))
+
+    def _begin(self, sql, parameters):
+        self._finish()
+        self._sql, self._parameters, self._elapsed = sql, parameters, 0.0
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._charge(time.perf_counter() - started, True)
+            if self.description is None:
+                self._finish()
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, ())
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._charge(time.perf_counter() - started, True)
+            self._finish()
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._charge(time.perf_counter() - started, True)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._charge(time.perf_counter() - started)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._charge(time.perf_counter() - started)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._charge(time.perf_counter() - started)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        # Timing every row costs more than the row itself: fetch and time in chunks instead
+        while True:
+            rows = self.fetchmany(ITERATION_CHUNK)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are TimedCursors"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def is_authorized(session, headers):
+    """/metrics is for the admin user, or a scraper holding HOTEL_METRICS_TOKEN"""
+    if METRICS_TOKEN and headers.get('Authorization') == f'Bearer {METRICS_TOKEN}':
+        return True
+    return session.get('username') == 'admin'
+
+
+def render_metrics():
+    """Every metric of this process in Prometheus text format"""
+    import database
+    import admission
+    from jobs import job_counts
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    pool = database.get_pool().stats()
+    lines.append('# HELP hotel_db_pool_connections Pooled SQLite connections of this process')
+    lines.append('# TYPE hotel_db_pool_connections gauge')
+    lines.append(f'hotel_db_pool_connections{{state="open"}} {pool["open"]}')
+    lines.append(f'hotel_db_pool_connections{{state="idle"}} {pool["idle"]}')
+    lines.append(f'hotel_db_pool_connections{{state="max"}} {pool["max_size"]}')
+
+    lines.append('# HELP hotel_admission_requests Requests of each route class running, waiting, and the limits')
+    lines.append('# TYPE hotel_admission_requests gauge')
+    for name, gate in sorted(admission.gates().items()):
+        for state, value in zip(('running', 'queued', 'max_running', 'max_queued'), gate.snapshot()):
+            lines.append(f'hotel_admission_requests{{class="{name}",state="{state}"}} {value}')
+
+    # The job queue is shared by every worker process: these are totals, not per process
+    lines.append('# HELP hotel_jobs Background jobs by kind and state (queued and running, all workers)')
+    lines.append('# TYPE hotel_jobs gauge')
+    for (kind, state), count in sorted(job_counts(database.get_db()).items()):
+        lines.append(f'hotel_jobs{{kind="{_escape(kind)}",state="{state}"}} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,284 @@
+"""
+Room Occupancy Bitmap for Hotel Management
+This module provides:
+1. Stays as night intervals (check-in date up to the night before check-out) in
+   an R*Tree index kept in step with the tourists table by triggers
+2. A compact per-date bitset of occupied rooms (bit N-1 set = room N occupied)
+3. Find-first-free-room, room status and date-range availability lookups without
+   querying the tourists table
+4. Write-through updates on check-in/delete, reconciled across worker processes
+   through a generation counter stored in SQLite
+"""
+
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+from database import get_db
+
+# Number of dates kept in memory per process (today plus recent look-ups)
+MAX_CACHED_DATES = 32
+
+# date.toordinal() + this = SQLite's CAST(julianday(day) AS INTEGER) for the same day
+JULIAN_DAY_OFFSET = 1721424
+
+# Night numbers of a tourists row (first night = check-in date, last night = the one
+# before check-out; no or invalid check-out date = a single night)
+_FIRST_NIGHT = 'CAST(julianday(date({row}.check_in_date)) AS INTEGER)'
+_LAST_NIGHT = ('CASE WHEN julianday(date({row}.check_out_date)) > julianday(date({row}.check_in_date)) '
+               'THEN CAST(julianday(date({row}.check_out_date)) AS INTEGER) - 1 '
+               'ELSE ' + _FIRST_NIGHT + ' END')
+
+
+def _stay_values(row):
+    """SELECT list for a stay_index row from a tourists row alias"""
+    return (f'{row}.id, {_FIRST_NIGHT.format(row=row)}, {_LAST_NIGHT.format(row=row)}, '
+            f'{row}.room_number, {row}.room_number')
+
+
+STAY_TRIGGERS = {
+    'stay_index_insert': f'''
+        AFTER INSERT ON tourists WHEN new.check_in_done = 1 AND new.check_in_date IS NOT NULL BEGIN
+            INSERT INTO stay_index SELECT {_stay_values('new')};
+        END''',
+    'stay_index_delete': '''
+        AFTER DELETE ON tourists BEGIN
+            DELETE FROM stay_index WHERE id = old.id;
+        END''',
+    'stay_index_update': f'''
+        AFTER UPDATE OF check_in_date, check_out_date, room_number, check_in_done ON tourists BEGIN
+            DELETE FROM stay_index WHERE id = old.id;
+            INSERT INTO stay_index SELECT {_stay_values('new')}
+            WHERE new.check_in_done = 1 AND new.check_in_date IS NOT NULL;
+        END''',
+}
+
+
+def _as_date(day):
+    if isinstance(day, datetime):
+        return day.date()
+    if isinstance(day, date):
+        return day
+    return date.fromisoformat(str(day)[:10])
+
+
+def night_number(day):
+    """Night number of a date as stored in stay_index"""
+    return _as_date(day).toordinal() + JULIAN_DAY_OFFSET
+
+
+def stay_nights(check_in_date, check_out_date=None):
+    """(first night, last night) of a stay; no or invalid check-out date = one night"""
+    first = _as_date(check_in_date)
+    try:
+        departure = _as_date(check_out_date) if check_out_date else None
+    except ValueError:
+        departure = None
+    if departure is None or departure <= first:
+        return first, first
+    return first, departure - timedelta(days=1)
+
+
+def ensure_stay_index(conn):
+    """Create the R*Tree of checked-in stays and its triggers, filling it from tourists.
+
+    Commits only when it opened the transaction itself.
+    """
+    commit = not conn.in_transaction
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stay_index'").fetchone()
+    if not exists:
+        conn.execute('''
+            CREATE VIRTUAL TABLE stay_index USING rtree_i32 (
+                id,                         -- tourists.id
+                first_night, last_night,    -- night numbers (julian day)
+                room_min, room_max          -- room number (a one-room-wide box)
+            )
+        ''')
+        conn.execute(f'''
+            INSERT INTO stay_index
+            SELECT {_stay_values('tourists')} FROM tourists
+            WHERE tourists.check_in_done = 1 AND tourists.check_in_date IS NOT NULL
+        ''')
+    for name, body in STAY_TRIGGERS.items():
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+    if commit:
+        conn.commit()
+
+
+def _create_state_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS room_occupancy_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO room_occupancy_state (id, generation) VALUES (1, 0)')
+
+
+def ensure_occupancy_schema(conn):
+    """Create the single-row generation counter shared by all worker processes"""
+    _create_state_table(conn)
+    conn.commit()
+    ensure_stay_index(conn)
+
+
+def current_generation(conn):
+    """Shared generation counter (moves on every committed stay change)"""
+    try:
+        row = conn.execute('SELECT generation FROM room_occupancy_state WHERE id = 1').fetchone()
+    except sqlite3.OperationalError:
+        # Database created before the counter existed
+        ensure_occupancy_schema(conn)
+        row = (0,)
+    return row[0] if row else 0
+
+
+def bump_generation(conn):
+    """Advance the shared generation inside the caller's write transaction"""
+    try:
+        conn.execute('UPDATE room_occupancy_state SET generation = generation + 1 WHERE id = 1')
+    except sqlite3.OperationalError:
+        # Database created before the counter existed (created in the same transaction)
+        _create_state_table(conn)
+        conn.execute('UPDATE room_occupancy_state SET generation = generation + 1 WHERE id = 1')
+    return conn.execute('SELECT generation FROM room_occupancy_state WHERE id = 1').fetchone()[0]
+
+
+def _date_key(day):
+    if isinstance(day, date):
+        return day.isoformat()
+    return str(day)
+
+
+class RoomOccupancy:
+    """Process-wide cache of occupied rooms per date, stored as integer bitsets"""
+
+    def __init__(self, total_rooms):
+        self.total_rooms = total_rooms
+        self.full_mask = (1 << total_rooms) - 1
+        self._bitmaps = {}
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _stays(self, conn, first_night, last_night):
+        """Bitset of rooms with a stay overlapping the nights first..last (inclusive)"""
+        query = 'SELECT DISTINCT room_min FROM stay_index WHERE first_night <= ? AND last_night >= ?'
+        try:
+            cursor = conn.execute(query, (last_night, first_night))
+        except sqlite3.OperationalError:
+            # Database created before the stay index existed
+            ensure_stay_index(conn)
+            cursor = conn.execute(query, (last_night, first_night))
+        mask = 0
+        for (room_number,) in cursor:
+            if 1 <= room_number <= self.total_rooms:
+                mask |= 1 << (room_number - 1)
+        return mask
+
+    def _load(self, conn, key):
+        night = night_number(key)
+        return self._stays(conn, night, night)
+
+    def bitmap(self, day, conn=None):
+        """Return the occupancy bitset for a date, rebuilding it if another process wrote"""
+        conn = conn or get_db()
+        key = _date_key(day)
+        generation = current_generation(conn)
+        with self._lock:
+            if generation != self._generation:
+                # Another worker checked someone in or deleted a stay: start over
+                self._bitmaps.clear()
+                self._generation = generation
+            mask = self._bitmaps.get(key)
+            if mask is None:
+                mask = self._load(conn, key)
+                if len(self._bitmaps) >= MAX_CACHED_DATES:
+                    self._bitmaps.pop(next(iter(self._bitmaps)))
+                self._bitmaps[key] = mask
+            return mask
+
+    def is_free(self, room_number, day, conn=None):
+        """True if the room exists and is not occupied on the date"""
+        if not 1 <= room_number <= self.total_rooms:
+            return False
+        return not (self.bitmap(day, conn) >> (room_number - 1)) & 1
+
+    def first_free(self, day, conn=None):
+        """Lowest free room number on the date, or None when the hotel is full"""
+        free = ~self.bitmap(day, conn) & self.full_mask
+        if not free:
+            return None
+        return (free & -free).bit_length()
+
+    def free_rooms(self, day, conn=None):
+        """List of free room numbers on the date"""
+        mask = self.bitmap(day, conn)
+        return [room for room in range(1, self.total_rooms + 1) if not (mask >> (room - 1)) & 1]
+
+    def occupied_count(self, day, conn=None):
+        """Number of occupied rooms on the date"""
+        return bin(self.bitmap(day, conn)).count('1')
+
+    def stay_bitmap(self, arrival, departure=None, conn=None):
+        """Occupancy bitset for a whole stay: rooms taken on any night from arrival to departure"""
+        first, last = stay_nights(arrival, departure)
+        if first == last:
+            return self.bitmap(first, conn)
+        # One R*Tree range query; not cached since ranges rarely repeat
+        return self._stays(conn or get_db(), night_number(first), night_number(last))
+
+    def is_free_for_stay(self, room_number, arrival, departure=None, conn=None):
+        """True if the room exists and is free every night of the stay"""
+        if not 1 <= room_number <= self.total_rooms:
+            return False
+        return not (self.stay_bitmap(arrival, departure, conn) >> (room_number - 1)) & 1
+
+    def free_rooms_for_stay(self, arrival, departure=None, conn=None):
+        """List of room numbers free every night from arrival up to (not including) departure"""
+        mask = self.stay_bitmap(arrival, departure, conn)
+        return [room for room in range(1, self.total_rooms + 1) if not (mask >> (room - 1)) & 1]
+
+    def room_status(self, day, conn=None):
+        """{room_number: 'occupied' | 'available'} for every room"""
+        mask = self.bitmap(day, conn)
+        return {room: 'occupied' if (mask >> (room - 1)) & 1 else 'available'
+                for room in range(1, self.total_rooms + 1)}
+
+    def record_check_in(self, generation, day, room_number, last_day=None):
+        """Apply a committed check-in (generation from bump_generation) to the local bitsets
+        of every night from day to last_day"""
+        self.record_check_ins(generation, day, [room_number], last_day)
+
+    def record_check_ins(self, generation, day, room_numbers, last_day=None):
+        """Apply several rooms checked in together under one bump_generation (group check-in)"""
+        mask = 0
+        for room_number in room_numbers:
+            if 1 <= room_number <= self.total_rooms:
+                mask |= 1 << (room_number - 1)
+        self._apply(generation, _date_key(day), _date_key(last_day or day), mask, occupied=True)
+
+    def record_release(self, generation, day, last_day=None):
+        """Apply a committed delete; the nights are rebuilt on next use in case rooms were shared"""
+        self._apply(generation, _date_key(day), _date_key(last_day or day), 0, occupied=False)
+
+    def _apply(self, generation, first_key, last_key, mask, occupied):
+        with self._lock:
+            if self._generation != generation - 1:
+                # Missed a write from another process: drop everything and resync lazily
+                self._bitmaps.clear()
+                self._generation = None
+                return
+            self._generation = generation
+            # ISO dates compare in calendar order
+            for key in [key for key in self._bitmaps if first_key <= key <= last_key]:
+                if occupied and mask:
+                    self._bitmaps[key] |= mask
+                else:
+                    del self._bitmaps[key]
+
+    def invalidate(self):
+        """Forget every cached bitset"""
+        with self._lock:
+            self._bitmaps.clear()
+            self._generation = None
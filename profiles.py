@@ -0,0 +1,139 @@
+"""
+Tourist Profile Listing for Hotel Management
+This module provides:
+1. Keyset (cursor) pagination over tourists, newest first, on (created_at, id),
+   so every page is an index range read no matter how deep the history goes;
+   legacy rows without created_at come last
+2. Opaque cursor tokens shared by the HTML page and the JSON scrolling endpoint
+3. A lazily fetched page object that templates can stream card by card
+"""
+
+import json
+import base64
+import binascii
+
+# Profile cards per page (HTML page and default JSON page)
+PROFILE_PAGE_SIZE = 60
+
+# Largest page the JSON endpoint hands out
+PROFILE_PAGE_MAX = 200
+
+# Rows fetched from SQLite per round trip while streaming a page
+PROFILE_FETCH_SIZE = 20
+
+# Sort key of a row (indexed): a NULL created_at, on rows older than the column, sorts before every timestamp
+PROFILE_ORDER_KEY = "COALESCE(created_at, '')"
+
+PROFILE_COLUMNS = '''
+    id, full_name, father_spouse_name, age, work, address,
+    aadhar_number, mobile_number, alternate_mobile, gender,
+    male_count, female_count, children_count, amount_paid_today,
+    remaining_amount, check_in_done, room_number, check_in_date,
+    check_out_date, check_out_time, extra_bed, recipe_number,
+    comments, created_at, payment_mode
+'''
+
+
+def profile_from_row(row):
+    """Profile dict from a row selected with PROFILE_COLUMNS"""
+    return {
+        'id': row[0],
+        'full_name': row[1],
+        'father_spouse_name': row[2] or '',  # Handle None values
+        'age': row[3],
+        'work': row[4] or '',  # Handle None values
+        'address': row[5],
+        'aadhar_number': row[6],
+        'mobile_number': row[7],
+        'alternate_mobile': row[8] or '',  # Handle None values
+        'gender': row[9] or '',  # Handle None values
+        'male_count': row[10] or 0,  # Handle None values
+        'female_count': row[11] or 0,  # Handle None values
+        'children_count': row[12] or 0,  # Handle None values
+        'amount_paid_today': row[13],
+        'remaining_amount': row[14],
+        'check_in_done': row[15],
+        'room_number': row[16],
+        'check_in_date': row[17],
+        'check_out_date': row[18] or '',  # Handle None values
+        'check_out_time': row[19] or '',  # Handle None values
+        'extra_bed': row[20] or False,  # Handle None values
+        'recipe_number': row[21] or '',  # Handle None values
+        'comments': row[22] or '',  # Handle None values
+        'created_at': row[23],
+        'payment_mode': row[24] or 'Cash',  # Handle None values
+        'receipt_generated': bool(row[21]),  # True if recipe_number exists
+        'receipt_number': row[21] or ''  # Use recipe_number
+    }
+
+
+def encode_cursor(created_at, tourist_id):
+    """Opaque token for the position after the row (created_at, tourist_id); created_at may be None"""
+    raw = json.dumps([created_at, tourist_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(created_at or None, tourist_id) from a token; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, tourist_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid page cursor')
+    if not isinstance(created_at, (str, type(None))) or not isinstance(tourist_id, int):
+        raise ValueError('Invalid page cursor')
+    return created_at, tourist_id
+
+
+class ProfilePage:
+    """One page of profiles, newest first, read from SQLite as it is iterated.
+
+    next_cursor is set once iteration has finished (None on the last page).
+    """
+
+    def __init__(self, conn, cursor=None, limit=PROFILE_PAGE_SIZE):
+        self.conn = conn
+        self.after = decode_cursor(cursor) if cursor else None
+        self.limit = limit
+        self.next_cursor = None
+        self.count = 0
+
+    def __iter__(self):
+        query = f'SELECT {PROFILE_COLUMNS} FROM tourists'
+        params = []
+        if self.after:
+            created_at, tourist_id = self.after
+            key = created_at or ''
+            # The first comparison alone bounds the index range; the row value breaks ties by ID
+            query += f' WHERE {PROFILE_ORDER_KEY} <= ? AND ({PROFILE_ORDER_KEY}, id) < (?, ?)'
+            params.extend((key, key, tourist_id))
+        # One extra row tells whether there is a next page
+        query += f' ORDER BY {PROFILE_ORDER_KEY} DESC, id DESC LIMIT ?'
+        params.append(self.limit + 1)
+
+        rows = self.conn.execute(query, params)
+        last = None
+        while True:
+            batch = rows.fetchmany(PROFILE_FETCH_SIZE)
+            if not batch:
+                break
+            for row in batch:
+                if self.count == self.limit:
+                    self.next_cursor = encode_cursor(last['created_at'], last['id'])
+                    return
+                last = profile_from_row(row)
+                self.count += 1
+                yield last
+
+
+def profile_page(conn, cursor=None, limit=PROFILE_PAGE_SIZE):
+    """(profiles, next_cursor) for one page"""
+    page = ProfilePage(conn, cursor, limit)
+    return list(page), page.next_cursor
+
+
+def profile_counts(conn):
+    """Total, checked-in and pending guest counts for the page header"""
+    total, checked_in = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(check_in_done = 1), 0) FROM tourists').fetchone()
+    return {'total': total, 'checked_in': checked_in, 'pending': total - checked_in}
@@ -0,0 +1,238 @@
+"""
+Request Profiler for Hotel Management
+This module provides:
+1. Profiling of single production requests: an admin can ask for it with an
+   "X-Profile: cprofile|stacks" header or "?_profile=cprofile|stacks", and 1 in
+   HOTEL_PROFILE_SAMPLE_RATE of all requests is sampled automatically
+2. Two profilers: cProfile (exact call counts, pstats output) and a
+   low-overhead stack sampler (one background thread reading the request
+   thread's stack every few ms, collapsed-stack output for flame graphs)
+3. A bounded on-disk ring of results (PROFILES_PER_ROUTE per route and
+   PROFILE_RING_SIZE overall, oldest dropped first) with JSON metadata, listed
+   slowest first for the admin page
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import glob
+import time
+import itertools
+import random
+import pstats
+import cProfile
+import tempfile
+import threading
+from collections import Counter
+
+# Profile 1 in this many requests automatically (0 = only when an admin asks)
+PROFILE_SAMPLE_RATE = int(os.environ.get('HOTEL_PROFILE_SAMPLE_RATE', '0'))
+
+# Where profiles are kept (shared by all worker processes)
+PROFILE_DIR = os.environ.get('HOTEL_PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'hotel_profiles')
+
+# Profiles kept per route, and in total
+PROFILES_PER_ROUTE = 20
+PROFILE_RING_SIZE = 200
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = '_profile'
+PROFILE_KINDS = ('cprofile', 'stacks')
+
+# Profile file names: <epoch ms>-<pid>-<sequence in the process>-<route slug>
+PROFILE_NAME = re.compile(r'^\d+-\d+-\d+-\w+$')
+
+# Sequence numbers of this process's profiles; two requests of one route can finish in the same millisecond
+_profile_sequence = itertools.count()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{os.path.basename(code.co_filename)}:{code.co_name}'
+
+
+def collapse_stack(frame):
+    """'outer;...;inner' for a frame and its callers (collapsed-stack format)"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """One background thread sampling the stacks of every thread being profiled"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._targets = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add(self, thread_id):
+        """Start sampling a thread; returns the Counter its stacks are added to"""
+        samples = Counter()
+        with self._lock:
+            self._targets[thread_id] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        return samples
+
+    def remove(self, thread_id):
+        """Stop sampling a thread and return its stack counts"""
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                targets = list(self._targets.items())
+            frames = sys._current_frames()
+            for thread_id, samples in targets:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[collapse_stack(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def reset_after_fork(self):
+        """The sampling thread does not survive fork"""
+        self._targets = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+
+sampler = StackSampler()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=sampler.reset_after_fork)
+
+
+def requested_kind(headers, args, session):
+    """Profiler to run for this request ('cprofile', 'stacks') or None"""
+    asked = (headers.get(PROFILE_HEADER) or args.get(PROFILE_PARAM) or '').strip().lower()
+    # Only the admin may ask (the session is not touched for requests that do not ask)
+    if asked and session.get('username') == 'admin':
+        return asked if asked in PROFILE_KINDS else 'cprofile'
+    if PROFILE_SAMPLE_RATE > 0 and random.randrange(PROFILE_SAMPLE_RATE) == 0:
+        return 'stacks'
+    return None
+
+
+class RequestProfile:
+    """A profiler running over one request on the current thread"""
+
+    def __init__(self, kind, route, method, path):
+        self.kind = kind
+        self.route = route
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self._thread_id = threading.get_ident()
+        if kind == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._samples = sampler.add(self._thread_id)
+
+    def stop(self, status=None, extra=None, directory=None):
+        """Stop profiling, write the result into the ring and return its name"""
+        duration = time.perf_counter() - self.started
+        if self.kind == 'cprofile':
+            self._profiler.disable()
+            data = self._profiler
+        else:
+            data = sampler.remove(self._thread_id)
+        meta = {
+            'route': self.route, 'method': self.method, 'path': self.path, 'status': status,
+            'kind': self.kind, 'started_at': self.started_at, 'duration_ms': round(duration * 1000, 2),
+            'pid': os.getpid(),
+        }
+        meta.update(extra or {})
+        return save_profile(meta, data, directory)
+
+
+def _slug(route):
+    return re.sub(r'\W+', '_', route).strip('_') or 'root'
+
+
+def save_profile(meta, data, directory=None):
+    """Write a profile (cProfile.Profile or stack Counter) and its metadata; trim the ring"""
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = f"{int(meta['started_at'] * 1000)}-{meta['pid']}-{next(_profile_sequence)}-{_slug(meta['route'])}"
+    base = os.path.join(directory, name)
+    if isinstance(data, cProfile.Profile):
+        data.dump_stats(base + '.pstats')
+        meta['file'] = name + '.pstats'
+    else:
+        meta['samples'] = sum(data.values())
+        with open(base + '.collapsed', 'w') as output:
+            output.writelines(f'{stack} {count}\n' for stack, count in data.most_common())
+        meta['file'] = name + '.collapsed'
+    # Metadata last: a listed profile always has its data file
+    with open(base + '.json', 'w') as output:
+        json.dump(meta, output)
+    _trim(directory, f'*-{_slug(meta["route"])}.json', PROFILES_PER_ROUTE)
+    _trim(directory, '*.json', PROFILE_RING_SIZE)
+    return name
+
+
+def _trim(directory, pattern, keep):
+    """Delete the oldest profiles matching pattern beyond `keep`"""
+    names = sorted(glob.glob(os.path.join(directory, pattern)), key=lambda path: int(os.path.basename(path).split('-')[0]))
+    for path in names[:-keep] if len(names) > keep else []:
+        base = path[:-len('.json')]
+        for suffix in ('.json', '.pstats', '.collapsed'):
+            try:
+                os.remove(base + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(limit=50, directory=None):
+    """Metadata of kept profiles, slowest first"""
+    profiles = []
+    for path in glob.glob(os.path.join(directory or PROFILE_DIR, '*.json')):
+        try:
+            with open(path) as meta:
+                entry = json.load(meta)
+        except (OSError, ValueError):
+            continue
+        entry['name'] = os.path.basename(path)[:-len('.json')]
+        profiles.append(entry)
+    profiles.sort(key=lambda entry: entry['duration_ms'], reverse=True)
+    return profiles[:limit]
+
+
+def profile_file(name, directory=None):
+    """(path, metadata) of a kept profile, or None for an unknown or malformed name"""
+    if not PROFILE_NAME.match(name):
+        return None
+    base = os.path.join(directory or PROFILE_DIR, name)
+    try:
+        with open(base + '.json') as meta:
+            entry = json.load(meta)
+    except (OSError, ValueError):
+        return None
+    path = os.path.join(directory or PROFILE_DIR, entry['file'])
+    return (path, entry) if os.path.exists(path) else None
+
+
+def profile_summary(path, lines=40):
+    """Readable text of a profile: top functions by cumulative time, or the hottest stacks"""
+    if path.endswith('.pstats'):
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(lines)
+        return output.getvalue()
+    with open(path) as collapsed:
+        return ''.join(collapsed.readlines()[:lines])
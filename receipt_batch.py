@@ -0,0 +1,145 @@
+"""
+Bulk Receipt Rendering for Hotel Management
+This module provides:
+1. Batch rendering of receipts (date range or tourist IDs) fanned out across a
+   process pool sized to the machine's cores
+2. Streaming output as a ZIP of single receipts or one merged multi-page PDF
+3. A command line interface for reprints and archives that reports throughput
+
+Usage:
+    python receipt_batch.py --from 2025-07-01 --to 2025-07-31 --format zip -o july.zip
+    python receipt_batch.py --ids 12 15 18 --format pdf -o reprint.pdf
+"""
+
+import os
+import sys
+import time
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from receipt_template import get_receipt_template, receipt_page
+
+# Receipts per task sent to a worker process (amortizes pickling and scheduling)
+BATCH_CHUNK_SIZE = 50
+
+# Batches smaller than this are rendered in the calling process
+BATCH_MIN_PARALLEL = 200
+
+BATCH_FORMATS = ('zip', 'pdf')
+
+
+def _render_chunk(items, now):
+    """Worker: page content streams for (tourist_data, receipt_number) pairs"""
+    return [receipt_page(tourist_data, receipt_number, now) for tourist_data, receipt_number in items]
+
+
+def render_pages(tourists, workers=None, now=None, chunk_size=BATCH_CHUNK_SIZE):
+    """Yield (tourist_data, page) in input order, rendering chunks on a process pool.
+
+    Without `now` each receipt is stamped from its own record (receipt_template.receipt_time).
+    """
+    items = [(tourist, tourist.get('recipe_number')) for tourist in tourists]
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(items) < BATCH_MIN_PARALLEL:
+        for chunk in chunks:
+            yield from zip((tourist for tourist, _ in chunk), _render_chunk(chunk, now))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        for chunk, pages in zip(chunks, pool.map(_render_chunk, chunks, [now] * len(chunks))):
+            yield from zip((tourist for tourist, _ in chunk), pages)
+
+
+class _StreamBuffer:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(pages):
+    """Yield a ZIP archive with one PDF per receipt as it is built"""
+    template = get_receipt_template()
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for tourist, page in pages:
+            name = f"receipt_{tourist.get('recipe_number')}_{tourist.get('id')}.pdf"
+            archive.writestr(name, template.render_document([page]))
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
+
+
+def stream_merged_pdf(pages):
+    """Yield one multi-page PDF with every receipt (the static forms are shared)"""
+    yield get_receipt_template().render_document(page for _, page in pages)
+
+
+def stream_batch(tourists, output_format='zip', workers=None, now=None):
+    """Stream a rendered batch in the requested format ('zip' or 'pdf')"""
+    if output_format not in BATCH_FORMATS:
+        raise ValueError(f"Unknown batch format: {output_format}")
+    pages = render_pages(tourists, workers, now)
+    if output_format == 'zip':
+        return stream_zip(pages)
+    return stream_merged_pdf(pages)
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Render many receipts at once')
+    parser.add_argument('--from', dest='date_from', help='first check-in date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='last check-in date (YYYY-MM-DD)')
+    parser.add_argument('--ids', nargs='+', type=int, help='tourist IDs')
+    parser.add_argument('--format', choices=BATCH_FORMATS, default='zip')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU cores)')
+    parser.add_argument('--db', help='database path (default: hotel_management.db)')
+    parser.add_argument('-o', '--output', required=True, help='output file')
+    args = parser.parse_args(argv)
+
+    import database
+    from receipt_system import get_receipt_batch_data
+
+    if args.db:
+        database.configure(args.db)
+    if not (args.date_from or args.date_to or args.ids):
+        parser.error('give a date range (--from/--to) or --ids')
+
+    started = time.perf_counter()
+    tourists = get_receipt_batch_data(args.date_from, args.date_to, args.ids)
+    if not tourists:
+        print("❌ No receipts match the selection")
+        return 1
+
+    size = 0
+    with open(args.output, 'wb') as output:
+        for data in stream_batch(tourists, args.format, args.workers):
+            output.write(data)
+            size += len(data)
+    elapsed = time.perf_counter() - started
+
+    workers = args.workers or os.cpu_count() or 1
+    mode = f"{workers} worker processes" if workers > 1 and len(tourists) >= BATCH_MIN_PARALLEL else "in-process"
+    print(f"✅ {len(tourists)} receipts written to {args.output} ({size / 1024:.0f} KB)")
+    print(f"⏱️ {elapsed:.2f}s, {len(tourists) / elapsed:,.0f} receipts/s ({mode})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Receipt PDF Cache for Hotel Management
+This module provides:
+1. Content-addressed keys (receipt number + hash of the fields printed on the receipt,
+   including the record timestamp its DATE & TIME and footer are stamped from)
+2. A SQLite BLOB store for rendered receipt PDFs, shared by all worker processes
+3. Size-bounded LRU and TTL eviction, plus invalidation when a guest record changes
+"""
+
+import io
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+
+import receipt_system
+from database import get_db
+from receipt_template import receipt_time
+
+logger = logging.getLogger(__name__)
+
+# Total size of cached PDFs before the least recently used ones are evicted
+RECEIPT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Seconds a cached receipt stays valid after it was rendered
+RECEIPT_CACHE_TTL = 7 * 24 * 3600
+
+# Seconds between last-access updates for the same entry (keeps reads from writing)
+RECEIPT_CACHE_TOUCH_INTERVAL = 60
+
+# Bump when the receipt layout changes so old renders are not served
+RECEIPT_LAYOUT_VERSION = 3
+
+# Fields of tourist_data that end up on the printed receipt (created_at and
+# check_in_date also give its DATE & TIME and "Generated on" stamps)
+RECEIPT_FIELDS = (
+    'full_name', 'father_spouse_name', 'address', 'mobile_number', 'aadhar_number',
+    'room_number', 'extra_bed', 'check_in_date', 'check_out_date',
+    'amount_paid_today', 'remaining_amount', 'payment_mode', 'created_at',
+)
+
+
+def ensure_receipt_cache_schema(conn):
+    """Create the receipt PDF cache table"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS receipt_pdf_cache (
+            cache_key TEXT PRIMARY KEY,
+            receipt_number TEXT NOT NULL,
+            tourist_id INTEGER,
+            pdf BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_receipt_pdf_cache_tourist ON receipt_pdf_cache (tourist_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_receipt_pdf_cache_access ON receipt_pdf_cache (last_access)')
+    conn.commit()
+
+
+def receipt_cache_key(tourist_data, receipt_number):
+    """Hash of everything that determines the rendered receipt (also used as the ETag)"""
+    fields = {name: str(tourist_data.get(name, '')) for name in RECEIPT_FIELDS}
+    payload = json.dumps([RECEIPT_LAYOUT_VERSION, str(receipt_number), fields], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_receipt(cache_key, conn=None):
+    """Return the cached PDF bytes for a key, or None if missing or expired"""
+    conn = conn or get_db()
+    now = time.time()
+    try:
+        row = conn.execute('SELECT pdf, created_at, last_access FROM receipt_pdf_cache WHERE cache_key = ?',
+                           (cache_key,)).fetchone()
+    except sqlite3.OperationalError:
+        return None  # cache table not created yet
+
+    if row is None:
+        return None
+
+    pdf, created_at, last_access = row
+    if now - created_at > RECEIPT_CACHE_TTL:
+        conn.execute('DELETE FROM receipt_pdf_cache WHERE cache_key = ?', (cache_key,))
+        conn.commit()
+        return None
+
+    if now - last_access > RECEIPT_CACHE_TOUCH_INTERVAL:
+        conn.execute('UPDATE receipt_pdf_cache SET last_access = ? WHERE cache_key = ?', (now, cache_key))
+        conn.commit()
+    return bytes(pdf)
+
+
+def store_receipt(cache_key, receipt_number, tourist_id, pdf_bytes, conn=None):
+    """Cache a rendered PDF and evict old entries to stay within the limits"""
+    conn = conn or get_db()
+    ensure_receipt_cache_schema(conn)
+    now = time.time()
+    conn.execute('''
+        INSERT OR REPLACE INTO receipt_pdf_cache
+        (cache_key, receipt_number, tourist_id, pdf, size, created_at, last_access)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (cache_key, str(receipt_number), tourist_id, sqlite3.Binary(pdf_bytes), len(pdf_bytes), now, now))
+    evict_receipts(conn, now)
+    conn.commit()
+
+
+def evict_receipts(conn, now=None):
+    """Drop expired entries, then least recently used ones beyond the size limit"""
+    now = now or time.time()
+    conn.execute('DELETE FROM receipt_pdf_cache WHERE created_at < ?', (now - RECEIPT_CACHE_TTL,))
+    conn.execute('''
+        DELETE FROM receipt_pdf_cache WHERE cache_key IN (
+            SELECT cache_key FROM (
+                SELECT cache_key, SUM(size) OVER (ORDER BY last_access DESC, created_at DESC) AS running_size
+                FROM receipt_pdf_cache
+            ) WHERE running_size > ?
+        )
+    ''', (RECEIPT_CACHE_MAX_BYTES,))
+
+
+def invalidate_receipts(tourist_id, conn=None):
+    """Forget cached receipts of a guest; runs inside the caller's transaction"""
+    conn = conn or get_db()
+    try:
+        conn.execute('DELETE FROM receipt_pdf_cache WHERE tourist_id = ?', (tourist_id,))
+    except sqlite3.OperationalError:
+        pass  # cache table not created yet
+
+
+def cached_receipt_pdf(tourist_data, receipt_number, cache_key=None):
+    """Return (pdf_bytes, cache_key), rendering the receipt only on a cache miss"""
+    cache_key = cache_key or receipt_cache_key(tourist_data, receipt_number)
+    pdf_bytes = get_cached_receipt(cache_key)
+    if pdf_bytes is not None:
+        return pdf_bytes, cache_key
+
+    pdf_bytes = receipt_system.generate_custom_hindi_receipt(tourist_data, receipt_number, io.BytesIO()).getvalue()
+    if receipt_time(tourist_data) is None:
+        # Stamped with the current time: caching it would serve a stale date
+        return pdf_bytes, cache_key
+
+    try:
+        store_receipt(cache_key, receipt_number, tourist_data.get('id'), pdf_bytes)
+    except sqlite3.Error as e:
+        # A busy database must not stop the download; the next request retries
+        get_db().rollback()
+        logger.warning("Could not cache receipt %s: %s", receipt_number, e)
+    return pdf_bytes, cache_key
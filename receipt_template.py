@@ -0,0 +1,527 @@
+"""
+Precompiled Receipt Template for Hotel Management
+This module provides:
+1. The receipt layout, split into static drawing (boxes, headings, terms, signature
+   block) and the variable text printed for each guest
+2. A template engine that renders the static layout once per process into PDF form
+   XObjects and writes each receipt as a small text overlay on top of them
+3. The plain ReportLab canvas renderer of the same layout, used as the reference
+4. A fallback template on ReportLab's public form API (beginForm/endForm/doForm)
+   for ReportLab releases outside TEMPLATE_REPORTLAB_VERSIONS
+
+ReportLab is imported when the first template is compiled or drawn, not with this module.
+"""
+
+import io
+import re
+import zlib
+import logging
+import threading
+from datetime import datetime, timezone
+
+from metrics import timed_pdf
+
+logger = logging.getLogger(__name__)
+
+# A4 in points, computed as reportlab.lib.pagesizes does (210 x 297 mm)
+PAGE_WIDTH, PAGE_HEIGHT = 210 * (72.0 / 2.54 * 0.1), 297 * (72.0 / 2.54 * 0.1)
+
+# Fonts the receipt can reference; Symbol and ZapfDingbats are ReportLab's
+# substitutes for characters Helvetica has no glyph for (₹, ★, emoji)
+RECEIPT_FONTS = ('Helvetica', 'Helvetica-Bold', 'Symbol', 'ZapfDingbats')
+
+# ReportLab releases [from, to) whose canvas internals ReceiptTemplate records
+# drawing with (Canvas._code, the document's font names, rl_accel); requirements.txt
+# pins the same range, and other releases get CanvasReceiptTemplate
+TEMPLATE_REPORTLAB_VERSIONS = ((4, 0), (5, 1))
+
+# Field layers: LAYER_BODY is painted over the background form, LAYER_FOOTER
+# over the terms & signature form (the footer boxes cover what lies under them)
+LAYER_BODY = 0
+LAYER_FOOTER = 1
+
+
+def normalize_receipt_number(receipt_number):
+    """Receipt number as printed (tolerates tuples and empty values)"""
+    if isinstance(receipt_number, tuple):
+        return str(receipt_number[0]) if receipt_number[0] else "UNKNOWN"
+    if not receipt_number:
+        return "UNKNOWN"
+    return str(receipt_number)
+
+
+def layout_variant(tourist_data):
+    """The father/spouse line moves every section below it down by one row"""
+    return bool(tourist_data.get('father_spouse_name', ''))
+
+
+def _stay_details_y(has_father_spouse):
+    """Baseline of the STAY DETAILS heading; later sections are placed relative to it"""
+    return PAGE_HEIGHT - 305 - (20 if has_father_spouse else 0)
+
+
+def draw_receipt_background(c, has_father_spouse):
+    """Static part of the receipt from the header band down to the total amount box"""
+    from reportlab.lib import colors
+
+    width, height = PAGE_WIDTH, PAGE_HEIGHT
+
+    # Header background (Light Grey)
+    c.setFillColor(colors.lightgrey)
+    c.rect(0, height-100, width, 100, fill=1, stroke=1)
+
+    # Hotel name and title (Black text on light grey background)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 26)
+    c.drawCentredString(width/2, height-40, "🏨 HOTEL RECEIPT 🏨")
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(width/2, height-65, "Hotel Management System")
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(width/2, height-85, "★★★★ Premium Hotel Services ★★★★")
+
+    # Receipt number and date boxes side by side
+    box_width = 200
+    box_height = 60
+    box_y = height - 170
+    for box_x, title in ((50, "RECEIPT NUMBER"), (width - 250, "DATE & TIME")):
+        c.setFillColor(colors.white)
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(1.5)
+        c.rect(box_x, box_y, box_width, box_height, fill=1, stroke=1)
+
+        # Header section
+        c.setFillColor(colors.lightgrey)
+        c.setStrokeColor(colors.black)
+        c.rect(box_x, box_y + 35, box_width, 25, fill=1, stroke=1)
+
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica-Bold", 11)
+        c.drawCentredString(box_x + box_width/2, box_y + 44, title)
+
+    # Guest details section header and box
+    y_pos = height - 210
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y_pos, "GUEST DETAILS")
+
+    c.setFillColor(colors.white)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1.5)
+    c.rect(50, y_pos-160, width-100, 150, fill=1, stroke=1)
+
+    # Stay details section header and box
+    y_pos = _stay_details_y(has_father_spouse)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y_pos, "STAY DETAILS")
+
+    c.setFillColor(colors.white)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1.5)
+    c.rect(50, y_pos-120, width-100, 110, fill=1, stroke=1)
+
+    # Payment details section header
+    y_pos -= 105
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y_pos, "PAYMENT DETAILS")
+
+    # Total amount box - white background with thicker border
+    y_pos -= 60
+    table_x = 80
+    box_width = 400
+    box_height = 80
+    c.setFillColor(colors.white)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(2)
+    c.rect(table_x, y_pos, box_width, box_height, fill=1, stroke=1)
+
+    # Header section within the box
+    c.setFillColor(colors.lightgrey)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+    c.rect(table_x, y_pos + 50, box_width, 30, fill=1, stroke=1)
+
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawCentredString(table_x + box_width/2, y_pos + 60, "TOTAL AMOUNT")
+
+
+def draw_receipt_footer(c, has_father_spouse):
+    """Static terms & conditions box and bottom signature section"""
+    from reportlab.lib import colors
+
+    width = PAGE_WIDTH
+    y_pos = _stay_details_y(has_father_spouse) - 265
+
+    # Footer section with terms and conditions
+    c.setFillColor(colors.lightgrey)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+    c.rect(50, y_pos, width-100, 80, fill=1, stroke=1)
+
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawCentredString(width/2, y_pos + 60, "Terms & Conditions")
+
+    c.setFont("Helvetica", 10)
+    terms_text = [
+        "• Check-out time: 11:00 AM",
+        "• Late check-out charges may apply",
+        "• Room charges are non-refundable",
+        "• Damages to hotel property will be charged"
+    ]
+    for i, term in enumerate(terms_text):
+        c.drawString(60, y_pos + 40 - (i * 12), term)
+
+    # Bottom signature section
+    y_pos -= 120
+    c.setFillColor(colors.lightgrey)
+    c.rect(0, 0, width, 150, fill=1, stroke=1)
+
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(width/2, y_pos + 80, "Thank You for Staying with Us!")
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(width/2, y_pos + 60, "We hope you had a pleasant stay!")
+
+    # Signature areas
+    c.setFont("Helvetica", 12)
+    for sign_x, label in ((70, "Guest Signature"), (width-200, "Authorized Signature")):
+        c.drawString(sign_x, y_pos + 30, label)
+        c.drawString(sign_x, y_pos - 5, "_" * 25)
+
+
+def receipt_time(tourist_data):
+    """When the receipt was issued, from the guest record, or None if the record has no date.
+
+    That is created_at (SQLite's CURRENT_TIMESTAMP, in UTC) in local time, else the
+    check-in date, so the same record always prints the same DATE & TIME and footer.
+    """
+    created_at = tourist_data.get('created_at')
+    if created_at:
+        try:
+            stamp = datetime.fromisoformat(str(created_at))
+        except ValueError:
+            pass
+        else:
+            if stamp.tzinfo is None:
+                stamp = stamp.replace(tzinfo=timezone.utc)
+            return stamp.astimezone().replace(tzinfo=None)
+    check_in_date = tourist_data.get('check_in_date')
+    if check_in_date:
+        try:
+            return datetime.fromisoformat(str(check_in_date))
+        except ValueError:
+            pass
+    return None
+
+
+def receipt_fields(tourist_data, receipt_number, now=None):
+    """Variable text of one receipt as (layer, font, size, x, y, text, centred) tuples.
+
+    The receipt is stamped with `now`, else receipt_time(tourist_data), else the current time.
+    """
+    receipt_number = normalize_receipt_number(receipt_number)
+    now = now or receipt_time(tourist_data) or datetime.now()
+    width, height = PAGE_WIDTH, PAGE_HEIGHT
+    box_y = height - 170
+    fields = [
+        (LAYER_BODY, "Helvetica-Bold", 18, 150, box_y + 15, f"#{receipt_number}", True),
+        (LAYER_BODY, "Helvetica-Bold", 14, width - 150, box_y + 22, now.strftime('%d/%m/%Y'), True),
+        (LAYER_BODY, "Helvetica", 12, width - 150, box_y + 8, now.strftime('%I:%M %p'), True),
+    ]
+
+    # Guest details
+    y_pos = height - 235
+    fields.append((LAYER_BODY, "Helvetica", 12, 60, y_pos, f"Name: {tourist_data.get('full_name', '')}", False))
+    y_pos -= 20
+    father_spouse = tourist_data.get('father_spouse_name', '')
+    if father_spouse:
+        fields.append((LAYER_BODY, "Helvetica", 12, 60, y_pos, f"S/o, W/o: {father_spouse}", False))
+        y_pos -= 20
+    fields.append((LAYER_BODY, "Helvetica", 12, 60, y_pos, f"Address: {tourist_data.get('address', '')}", False))
+    y_pos -= 20
+    fields.append((LAYER_BODY, "Helvetica", 12, 60, y_pos, f"Mobile: {tourist_data.get('mobile_number', '')}", False))
+    fields.append((LAYER_BODY, "Helvetica", 12, 350, y_pos, f"Aadhar: {tourist_data.get('aadhar_number', '')}", False))
+
+    # Stay details
+    y_pos = _stay_details_y(bool(father_spouse)) - 25
+    extra_bed = 'Yes' if tourist_data.get('extra_bed') else 'No'
+    fields.append((LAYER_BODY, "Helvetica", 12, 60, y_pos, f"Room No: {tourist_data.get('room_number', '')}", False))
+    fields.append((LAYER_BODY, "Helvetica", 12, 350, y_pos, f"Extra Bed: {extra_bed}", False))
+    y_pos -= 20
+    checkin_date = tourist_data.get('check_in_date', now.strftime('%Y-%m-%d'))
+    checkout_date = tourist_data.get('check_out_date', '___________')
+    fields.append((LAYER_BODY, "Helvetica", 12, 60, y_pos, f"Check-in: {checkin_date}", False))
+    fields.append((LAYER_BODY, "Helvetica", 12, 350, y_pos, f"Check-out: {checkout_date}", False))
+
+    # Total amount and payment mode
+    y_pos -= 120
+    total_amount = float(tourist_data.get('amount_paid_today', 0)) + float(tourist_data.get('remaining_amount', 0))
+    payment_mode = tourist_data.get('payment_mode', 'Cash')
+    payment_mode_english = payment_mode if payment_mode in ('Cash', 'Cheque', 'Online', 'Card') else 'Cash'
+    fields.append((LAYER_BODY, "Helvetica-Bold", 24, 280, y_pos + 25, f"₹ {total_amount:,.2f}", True))
+    fields.append((LAYER_BODY, "Helvetica-Bold", 12, 90, y_pos - 30, f"Payment Mode: {payment_mode_english}", False))
+
+    # Generation info
+    fields.append((LAYER_FOOTER, "Helvetica", 8, width/2, 25,
+                   f"Generated on: {now.strftime('%d/%m/%Y %H:%M:%S')}", True))
+    fields.append((LAYER_FOOTER, "Helvetica", 8, width/2, 15, f"Receipt ID: {receipt_number}", True))
+    return fields
+
+
+def draw_receipt_fields(c, fields, layer):
+    """Draw the variable text of one layer with ReportLab"""
+    from reportlab.lib import colors
+
+    for field_layer, font, size, x, y, text, centred in fields:
+        if field_layer != layer:
+            continue
+        c.setFillColor(colors.black)
+        c.setFont(font, size)
+        if centred:
+            c.drawCentredString(x, y, text)
+        else:
+            c.drawString(x, y, text)
+
+
+def draw_receipt(c, tourist_data, receipt_number, now=None):
+    """Draw a complete receipt on a ReportLab canvas (reference renderer)"""
+    has_father_spouse = layout_variant(tourist_data)
+    fields = receipt_fields(tourist_data, receipt_number, now)
+    draw_receipt_background(c, has_father_spouse)
+    draw_receipt_fields(c, fields, LAYER_BODY)
+    draw_receipt_footer(c, has_father_spouse)
+    draw_receipt_fields(c, fields, LAYER_FOOTER)
+
+
+def render_receipt_canvas(tourist_data, receipt_number, now=None):
+    """Render a receipt through a full ReportLab canvas and return the PDF bytes"""
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    draw_receipt(c, tourist_data, receipt_number, now)
+    c.save()
+    return buffer.getvalue()
+
+
+def _pdf_object(number, body, stream=None):
+    if stream is None:
+        return b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    return b'%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n' % (number, body, stream)
+
+
+class ReceiptTemplate:
+    """Static receipt drawing of both layout variants compiled to form XObjects.
+
+    A document is laid out as: 1 catalog, 2 page tree, 3 info, 4-7 fonts, then the
+    background/footer forms of each variant it uses, then a page and content stream
+    per receipt. Everything before the pages is precomputed per variant combination.
+
+    The form streams are recorded from Canvas._code and the text is written with
+    rl_accel, so compile_receipt_template() only builds this on TEMPLATE_REPORTLAB_VERSIONS.
+    """
+
+    def __init__(self):
+        from reportlab.lib.rl_accel import escapePDF, fp_str
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfgen import canvas
+
+        # Kept for _text(), which runs for every field of every receipt
+        self._escape, self._fp_str = escapePDF, fp_str
+        self._string_width, self._unicode2T1 = pdfmetrics.stringWidth, pdfmetrics.unicode2T1
+
+        # Record the static drawing operators ReportLab emits for each form
+        c = canvas.Canvas(io.BytesIO(), pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+        font_names = {name: c._doc.getInternalFontName(name) for name in RECEIPT_FONTS}
+        self._fonts = {name: pdfmetrics.getFont(name) for name in RECEIPT_FONTS}
+        self._font_names = {name: internal.lstrip('/') for name, internal in font_names.items()}
+
+        self._forms = {}
+        for has_father_spouse in (False, True):
+            streams = []
+            for draw in (draw_receipt_background, draw_receipt_footer):
+                c._code = []
+                draw(c, has_father_spouse)
+                streams.append(zlib.compress('\n'.join(c._code).encode('latin-1')))
+            self._forms[has_father_spouse] = streams
+
+        self._media_box = b'[0 0 %s %s]' % (fp_str(PAGE_WIDTH).encode(), fp_str(PAGE_HEIGHT).encode())
+        self._font_resources = b'/Font << %s >>' % b' '.join(
+            b'/%s %d 0 R' % (self._font_names[name].encode('ascii'), 4 + i) for i, name in enumerate(RECEIPT_FONTS))
+        self._prefixes = {}
+
+    def _prefix(self, variants):
+        """Header and shared objects for a variant combination: (bytes, offsets, page resources)"""
+        prefix = self._prefixes.get(variants)
+        if prefix is not None:
+            return prefix
+
+        pdf = bytearray(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+        offsets = {}
+
+        def add(number, body, stream=None):
+            offsets[number] = len(pdf)
+            pdf.extend(_pdf_object(number, body, stream))
+
+        add(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        add(3, b'<< /Title (Hotel Receipt) /Producer (Hotel Management System) >>')
+        for i, name in enumerate(RECEIPT_FONTS):
+            encoding = b' /Encoding /WinAnsiEncoding' if self._fonts[name].encName == 'WinAnsiEncoding' else b''
+            add(4 + i, b'<< /Type /Font /Subtype /Type1 /Name /%s /BaseFont /%s%s >>'
+                % (self._font_names[name].encode('ascii'), name.encode('ascii'), encoding))
+
+        form_resources = b'<< %s /ProcSet [/PDF /Text] >>' % self._font_resources
+        number = 4 + len(RECEIPT_FONTS)
+        page_resources = {}
+        for variant in variants:
+            refs = []
+            for stream in self._forms[variant]:
+                add(number, b'<< /Type /XObject /Subtype /Form /BBox %s /Resources %s /Filter /FlateDecode /Length %d >>'
+                    % (self._media_box, form_resources, len(stream)), stream)
+                refs.append(number)
+                number += 1
+            page_resources[variant] = b'<< %s /XObject << /Background %d 0 R /Footer %d 0 R >> /ProcSet [/PDF /Text] >>' % (
+                self._font_resources, refs[0], refs[1])
+
+        prefix = self._prefixes[variants] = (bytes(pdf), offsets, page_resources, number)
+        return prefix
+
+    def _text(self, font, size, x, y, text, centred):
+        fp_str = self._fp_str
+        if centred:
+            x -= self._string_width(text, font, size) / 2
+        size = fp_str(size)
+        parts = ['BT 1 0 0 1 %s %s Tm' % (fp_str(x), fp_str(y))]
+        # Same glyph substitution as ReportLab's drawString
+        main = self._fonts[font]
+        for segment_font, segment in self._unicode2T1(text, [main] + main.substitutionFonts):
+            parts.append('/%s %s Tf (%s) Tj' % (self._font_names[segment_font.fontName], size, self._escape(segment)))
+        parts.append('ET')
+        return ' '.join(parts)
+
+    def page_content(self, fields):
+        """Content stream of one receipt page: the compiled forms plus the given text fields"""
+        ops = []
+        for layer, form in ((LAYER_BODY, 'Background'), (LAYER_FOOTER, 'Footer')):
+            ops.append('/%s Do 0 0 0 rg' % form)
+            ops.extend(self._text(*field[1:]) for field in fields if field[0] == layer)
+        return '\n'.join(ops).encode('latin-1')
+
+    @timed_pdf
+    def render_document(self, pages):
+        """PDF bytes for (has_father_spouse, page_content) pairs, one page each"""
+        pages = list(pages)
+        head, offsets, page_resources, number = self._prefix(tuple(sorted({variant for variant, _ in pages})))
+        offsets = dict(offsets)
+        pdf = bytearray(head)
+        kids = []
+        for variant, content in pages:
+            offsets[number] = len(pdf)
+            pdf += _pdf_object(number, b'<< /Type /Page /Parent 2 0 R /MediaBox %s /Resources %s /Contents %d 0 R >>'
+                               % (self._media_box, page_resources[variant], number + 1))
+            offsets[number + 1] = len(pdf)
+            pdf += _pdf_object(number + 1, b'<< /Length %d >>' % len(content), content)
+            kids.append(b'%d 0 R' % number)
+            number += 2
+        offsets[2] = len(pdf)
+        pdf += _pdf_object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), len(kids)))
+
+        xref_offset = len(pdf)
+        pdf += b'xref\n0 %d\n0000000000 65535 f \n' % number
+        pdf += b''.join(b'%010d 00000 n \n' % offsets[i] for i in range(1, number))
+        pdf += b'trailer\n<< /Size %d /Root 1 0 R /Info 3 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (number, xref_offset)
+        return bytes(pdf)
+
+
+class CanvasReceiptTemplate:
+    """The same static drawing as canvas forms, through ReportLab's public API only.
+
+    Each document draws the forms of the variants it uses once and places them on
+    every page with doForm; slower than ReceiptTemplate for single receipts.
+    """
+
+    def page_content(self, fields):
+        """The page of one receipt: its fields, drawn by render_document()"""
+        return fields
+
+    @timed_pdf
+    def render_document(self, pages):
+        """PDF bytes for (has_father_spouse, fields) pairs, one page each"""
+        from reportlab.pdfgen import canvas
+
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+        c.setTitle('Hotel Receipt')
+        c.setProducer('Hotel Management System')
+        compiled = set()
+        for variant, fields in pages:
+            background, footer = f'Background{int(variant)}', f'Footer{int(variant)}'
+            if variant not in compiled:
+                for name, draw in ((background, draw_receipt_background), (footer, draw_receipt_footer)):
+                    c.beginForm(name)
+                    draw(c, variant)
+                    c.endForm()
+                compiled.add(variant)
+            c.doForm(background)
+            draw_receipt_fields(c, fields, LAYER_BODY)
+            c.doForm(footer)
+            draw_receipt_fields(c, fields, LAYER_FOOTER)
+            c.showPage()
+        c.save()
+        return buffer.getvalue()
+
+
+def reportlab_version():
+    """(major, minor) of the installed ReportLab"""
+    import reportlab
+
+    return tuple(int(part) for part in re.findall(r'\d+', reportlab.Version)[:2])
+
+
+def compile_receipt_template():
+    """ReceiptTemplate on a ReportLab release it was checked against, else CanvasReceiptTemplate"""
+    version = reportlab_version()
+    low, high = TEMPLATE_REPORTLAB_VERSIONS
+    if not low <= version < high:
+        logger.warning("ReportLab %s is outside %s-%s: receipts use the slower canvas form template",
+                       '.'.join(map(str, version)), '.'.join(map(str, low)), '.'.join(map(str, high)))
+        return CanvasReceiptTemplate()
+    try:
+        return ReceiptTemplate()
+    except (AttributeError, ImportError, TypeError) as e:
+        logger.warning("Receipt template could not be compiled (%s): using the canvas form template", e)
+        return CanvasReceiptTemplate()
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_receipt_template():
+    """Compiled receipt template, built on first use in this process"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = compile_receipt_template()
+    return _template
+
+
+def warm_receipt_templates():
+    """Compile the template ahead of the first receipt download"""
+    get_receipt_template()
+
+
+@timed_pdf
+def receipt_page(tourist_data, receipt_number, now=None):
+    """(layout variant, content stream) of one receipt, for render_document()"""
+    fields = receipt_fields(tourist_data, receipt_number, now)
+    return layout_variant(tourist_data), get_receipt_template().page_content(fields)
+
+
+def render_receipt_pdf(tourist_data, receipt_number, now=None):
+    """Render a receipt from the precompiled template and return the PDF bytes"""
+    return get_receipt_template().render_document([receipt_page(tourist_data, receipt_number, now)])
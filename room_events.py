@@ -0,0 +1,161 @@
+"""
+Room Status Feed for Hotel Management
+This module provides:
+1. A per-process broker that turns committed occupancy changes into room-status
+   deltas (rooms occupied or freed today) and fans each one out to every open feed
+2. Server-Sent Events formatting for the /api/room_events endpoint
+3. A periodic resync, shared by all feeds in the process, that picks up changes
+   committed by other worker processes and the change of date at midnight
+"""
+
+import json
+import time
+import queue
+import threading
+from datetime import date
+
+import database
+
+# Seconds between keep-alive comments on an idle feed (also the resync interval)
+FEED_KEEPALIVE = 15
+
+# Events buffered per feed; a client that falls this far behind is dropped and reconnects
+FEED_QUEUE_SIZE = 256
+
+# Reconnect delay suggested to EventSource clients (milliseconds)
+FEED_RETRY_MS = 3000
+
+
+def format_event(name, data, event_id=None):
+    """Encode one Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+class _Feed:
+    """One connected client: a bounded queue of encoded events"""
+
+    def __init__(self):
+        self.events = queue.Queue(FEED_QUEUE_SIZE)
+        self.dropped = False
+
+
+class RoomStatusBroker:
+    """Publishes today's room-status changes once to every subscribed feed"""
+
+    def __init__(self, occupancy, sync_interval=FEED_KEEPALIVE):
+        self.occupancy = occupancy
+        self.sync_interval = sync_interval
+        self._feeds = set()
+        self._day = None
+        self._mask = None
+        self._sequence = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def _rooms(self, mask):
+        return [room for room in range(1, self.occupancy.total_rooms + 1) if (mask >> (room - 1)) & 1]
+
+    def _counts(self, mask):
+        occupied = bin(mask).count('1')
+        return {'total_rooms': self.occupancy.total_rooms, 'occupied_count': occupied,
+                'available_count': self.occupancy.total_rooms - occupied}
+
+    def _snapshot(self):
+        data = {'date': self._day, 'occupied': self._rooms(self._mask)}
+        data.update(self._counts(self._mask))
+        return format_event('snapshot', data, self._sequence)
+
+    def _advance(self, day, mask):
+        """Move to (day, mask) and return the event to broadcast, if any (lock held)"""
+        if self._mask is not None and self._day == day:
+            changed = mask ^ self._mask
+            if not changed:
+                return None
+            self._mask = mask
+            self._sequence += 1
+            data = {'date': day, 'occupied': self._rooms(changed & mask), 'freed': self._rooms(changed & ~mask)}
+            data.update(self._counts(mask))
+            return format_event('delta', data, self._sequence)
+        first = self._mask is None
+        self._day, self._mask = day, mask
+        self._sequence += 1
+        return None if first else self._snapshot()
+
+    def _broadcast(self, message):
+        """Queue an event on every feed, dropping feeds that stopped reading (lock held)"""
+        for feed in list(self._feeds):
+            try:
+                feed.events.put_nowait(message)
+            except queue.Full:
+                feed.dropped = True
+                self._feeds.discard(feed)
+
+    def publish(self, conn=None, day=None):
+        """Broadcast what changed since the last publish; call after committing a stay change"""
+        if not self._feeds:
+            # Nobody listening: the next subscriber starts from a fresh snapshot
+            with self._lock:
+                self._mask = None
+            return None
+        day = (day or date.today()).isoformat()
+        # Read and advance under one lock so concurrent publishes cannot reorder deltas
+        with self._lock:
+            message = self._advance(day, self.occupancy.bitmap(day, conn))
+            if message:
+                self._broadcast(message)
+        return message
+
+    def subscribe(self, conn=None, day=None):
+        """Register a feed and return it with the current snapshot as its first event"""
+        day = (day or date.today()).isoformat()
+        feed = _Feed()
+        with self._lock:
+            message = self._advance(day, self.occupancy.bitmap(day, conn))
+            if message:
+                self._broadcast(message)
+            self._feeds.add(feed)
+            snapshot = self._snapshot()
+        return feed, snapshot
+
+    def unsubscribe(self, feed):
+        """Forget a feed whose client disconnected"""
+        with self._lock:
+            self._feeds.discard(feed)
+
+    def resync(self):
+        """Publish changes from other processes; runs at most once per interval per process"""
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sync = now
+            conn = database.open_connection()
+            try:
+                self.publish(conn)
+            finally:
+                conn.close()
+        finally:
+            self._sync_lock.release()
+
+    def stream(self, feed, snapshot, keepalive=FEED_KEEPALIVE):
+        """Generator of SSE text for one client, starting with the snapshot"""
+        try:
+            yield f'retry: {FEED_RETRY_MS}\n\n' + snapshot
+            while not feed.dropped:
+                try:
+                    yield feed.events.get(timeout=keepalive)
+                except queue.Empty:
+                    self.resync()
+                    yield ': keep-alive\n\n'
+        finally:
+            self.unsubscribe(feed)
+
+    def stats(self):
+        """Feed counters"""
+        return {'subscribers': len(self._feeds), 'sequence': self._sequence, 'date': self._day}
@@ -0,0 +1,85 @@
+"""
+Guest Search Index for Hotel Management
+This module provides:
+1. An FTS5 table over guest names, mobile, Aadhar and receipt numbers using the
+   trigram tokenizer, so any substring of 3+ characters is an index lookup
+2. Triggers that keep the index in step with inserts, updates and deletes on tourists
+3. Helpers that turn search box values into FTS5 MATCH expressions
+"""
+
+import sqlite3
+
+# tourists columns indexed for search (in FTS column order)
+SEARCH_COLUMNS = ('full_name', 'mobile_number', 'aadhar_number', 'recipe_number')
+
+# Trigram queries only match substrings at least this long
+MIN_MATCH_LENGTH = 3
+
+_COLUMNS = ', '.join(SEARCH_COLUMNS)
+_NEW_VALUES = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_OLD_VALUES = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+SEARCH_TRIGGERS = {
+    'tourists_fts_insert': f'''
+        AFTER INSERT ON tourists BEGIN
+            INSERT INTO tourists_fts (rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+        END''',
+    'tourists_fts_delete': f'''
+        AFTER DELETE ON tourists BEGIN
+            INSERT INTO tourists_fts (tourists_fts, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+        END''',
+    'tourists_fts_update': f'''
+        AFTER UPDATE OF {_COLUMNS} ON tourists BEGIN
+            INSERT INTO tourists_fts (tourists_fts, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+            INSERT INTO tourists_fts (rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+        END''',
+}
+
+
+def ensure_search_index(conn):
+    """Create the search index and its triggers, building it from existing rows.
+
+    Returns False if this SQLite build lacks FTS5 or the trigram tokenizer.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tourists_fts'").fetchone()
+    try:
+        if not exists:
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE tourists_fts USING fts5 (
+                    {_COLUMNS},
+                    content = 'tourists', content_rowid = 'id', tokenize = 'trigram'
+                )
+            ''')
+            conn.execute("INSERT INTO tourists_fts (tourists_fts) VALUES ('rebuild')")
+        for name, body in SEARCH_TRIGGERS.items():
+            conn.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+        conn.commit()
+    except sqlite3.OperationalError:
+        conn.rollback()
+        return False
+    return True
+
+
+def has_search_index(conn):
+    """True if the search index can be used, creating it on first use"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tourists_fts'").fetchone()
+    return row is not None or ensure_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Rebuild the index from the tourists table (after bulk loads with triggers off)"""
+    conn.execute("INSERT INTO tourists_fts (tourists_fts) VALUES ('rebuild')")
+    conn.commit()
+
+
+def match_phrase(value, column=None):
+    """FTS5 expression matching `value` as a substring, in one column or any of them"""
+    phrase = '"' + value.replace('"', '""') + '"'
+    return f'{column} : {phrase}' if column else phrase
+
+
+def can_match(value):
+    """True if the trigram index can answer a substring search for `value`"""
+    return len(value) >= MIN_MATCH_LENGTH
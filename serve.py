@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Production Server for Hotel Management
+This module provides:
+1. A pre-fork launcher: the app is imported and warmed once in the parent
+   (database schema, receipt template and fonts, Jinja templates) and the
+   listening socket opened before forking, so no worker pays for imports or
+   first-use compilation on its first request
+2. Threaded workers (Werkzeug's threaded WSGI server) sharing that socket,
+   with the worker count derived from the CPU count; the parent restarts
+   workers that die and stops them all on Ctrl+C / SIGTERM
+3. Job worker processes (receipts and reports from the jobs queue) forked and
+   supervised the same way, next to the HTTP workers
+4. A single-process threaded server where fork is unavailable (Windows), with
+   the job workers as multiprocessing children
+5. create_app() for external servers: gunicorn --preload 'serve:create_app()'
+   (run the job workers with python jobs.py)
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+import importlib.util
+
+import app_logging
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Workers per CPU core (plus one), so a worker blocked on disk or SQLite leaves the core busy
+WORKERS_PER_CORE = 2
+
+# Pending connections queued on the shared socket
+LISTEN_BACKLOG = 128
+
+# Seconds workers get to finish after SIGTERM before they are killed
+GRACEFUL_TIMEOUT = 10
+
+# A worker that dies sooner than this after starting is restarted only after a pause
+RESTART_DELAY = 1
+
+
+def load_app():
+    """Import the Flask app module (app.py, or 'app - Copy.py' in this tree)"""
+    if 'app' in sys.modules:
+        return sys.modules['app']
+    try:
+        import app
+        return app
+    except ImportError:
+        pass
+    path = os.path.join(BASE_DIR, 'app - Copy.py')
+    spec = importlib.util.spec_from_file_location('app', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['app'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def default_workers(cores=None):
+    """Worker processes for this machine: WORKERS_PER_CORE per core, plus one"""
+    cores = cores or os.cpu_count() or 1
+    return WORKERS_PER_CORE * cores + 1
+
+
+def warm_up(module):
+    """Do every one-off start-up cost once, before any worker is forked"""
+    import database
+
+    with module.app.app_context():
+        module.init_database()
+    module.warm_receipt_templates()
+    module.clean_artifact_files()
+    from jinja2 import TemplateSyntaxError
+    for name in module.app.jinja_env.list_templates():
+        try:
+            module.app.jinja_env.get_template(name)
+        except TemplateSyntaxError:
+            pass  # leftover template no route renders (e.g. dashboard_backup.html)
+    # SQLite connections must not cross a fork: every worker opens its own
+    database.configure()
+
+
+def create_app(database_path=None):
+    """Load, point at `database_path` and warm the app; returns the WSGI application"""
+    import database
+
+    if database_path:
+        database.configure(database_path)
+    module = load_app()
+    warm_up(module)
+    return module.app
+
+
+def _job_worker():
+    """Job worker process body: run queued jobs until SIGTERM"""
+    import jobs
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.run_worker(stop=stop)
+
+
+def _serve_worker(app, listener):
+    """Worker process body: serve requests from the shared socket until SIGTERM"""
+    from werkzeug.serving import make_server
+
+    server = make_server(*listener.getsockname()[:2], app, threaded=True, fd=listener.fileno())
+    # shutdown() waits for serve_forever() to return, so it cannot run in the signal handler's thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server.serve_forever()
+
+
+class PreforkServer:
+    """Parent process: owns the socket, forks the HTTP and job workers and keeps them running"""
+
+    def __init__(self, app, listener, workers, job_workers=0):
+        self.app = app
+        self.listener = listener
+        self.workers = workers
+        self.job_workers = job_workers
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self, role='http'):
+        """Fork one worker ('http' serves the socket, 'jobs' runs queued jobs)"""
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                if role == 'jobs':
+                    self.listener.close()
+                    _job_worker()
+                else:
+                    _serve_worker(self.app, self.listener)
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                status = 1
+            finally:
+                # os._exit skips atexit: write out the records still queued for the log listener
+                app_logging.shutdown_logging()
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+        self.children[pid] = (time.monotonic(), role)
+        return pid
+
+    def _signal_workers(self, signum):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def stop(self, *_):
+        """Ask every worker to finish; kill the ones still running after GRACEFUL_TIMEOUT"""
+        if self.stopping:
+            return
+        self.stopping = True
+        self._signal_workers(signal.SIGTERM)
+        killer = threading.Timer(GRACEFUL_TIMEOUT, self._signal_workers, (signal.SIGKILL,))
+        killer.daemon = True
+        killer.start()
+
+    def run(self):
+        """Fork the workers and supervise them until stopped; returns an exit code"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+        print(f"👷 {self.workers} workers started: {', '.join(map(str, self.children))}")
+        for _ in range(self.job_workers):
+            self.spawn('jobs')
+        if self.job_workers:
+            print(f"🧾 {self.job_workers} job workers started")
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            child = self.children.pop(pid, None)
+            if child is None or self.stopping:
+                continue
+            started, role = child
+            kind = 'Job worker' if role == 'jobs' else 'Worker'
+            print(f"⚠️ {kind} {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < RESTART_DELAY:
+                time.sleep(RESTART_DELAY)
+            if not self.stopping:
+                self.spawn(role)
+
+        self.listener.close()
+        return 0
+
+
+def serve(app, host='0.0.0.0', port=5000, workers=None, job_workers=None):
+    """Serve `app` (already warmed) with pre-forked workers, or threads if fork is unavailable"""
+    from jobs import default_job_workers, start_job_processes
+
+    workers = workers or default_workers()
+    job_workers = default_job_workers() if job_workers is None else job_workers
+    if not hasattr(os, 'fork') or workers == 1:
+        from werkzeug.serving import make_server
+        print("👷 Single process, one thread per request")
+        processes, stop = start_job_processes(job_workers)
+        try:
+            make_server(host, port, app, threaded=True).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            for process in processes:
+                process.join(GRACEFUL_TIMEOUT)
+        return 0
+
+    listener = socket.create_server((host, port), backlog=LISTEN_BACKLOG)
+    return PreforkServer(app, listener, workers, job_workers).run()
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Run the hotel management app with pre-forked workers')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help=f'worker processes (default: {WORKERS_PER_CORE} per core + 1)')
+    parser.add_argument('--job-workers', type=int, default=None,
+                        help='processes rendering queued receipts and reports (default: half the cores, at least one)')
+    parser.add_argument('--db', help='database path (default: hotel_management.db)')
+    args = parser.parse_args(argv)
+
+    print("🏨 Aggarwal Bhawan Management System Starting (production)...")
+    started = time.perf_counter()
+    app = create_app(args.db)
+    print(f"🔥 App loaded and warmed in {(time.perf_counter() - started) * 1000:.0f} ms")
+    print(f"🌐 Access URL: http://localhost:{args.port}")
+    print("=" * 50)
+    return serve(app, args.host, args.port, args.workers, args.job_workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
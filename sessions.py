@@ -0,0 +1,166 @@
+"""
+Session Store for Hotel Management
+This module provides:
+1. Server-side sessions in the app's own SQLite database (table `sessions`),
+   replacing Flask-Session's filesystem store (one pickle file per session,
+   never pruned)
+2. Rows written only when the session changed, or once per
+   SESSION_REFRESH_SECONDS to push its expiry; read-only requests do one
+   primary-key lookup and no write
+3. Expiry on an indexed column; expired rows are swept every
+   SESSION_SWEEP_SECONDS by whichever request saves a session first
+4. A new session ID on login and logout (session.regenerate()), so an ID
+   seen before sign-in is worthless afterwards
+
+Values are stored with Flask's tagged JSON (the format of its cookie
+sessions), not pickle.
+"""
+
+import time
+import secrets
+import sqlite3
+import threading
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from database import get_db
+
+# An unchanged session has its expiry pushed at most this often
+SESSION_REFRESH_SECONDS = 3600
+
+# Seconds between sweeps of expired sessions (per process)
+SESSION_SWEEP_SECONDS = 600
+
+_serializer = TaggedJSONSerializer()
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def ensure_session_schema(conn):
+    """Create the sessions table (the caller commits)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+
+
+def sweep_sessions(conn, now=None):
+    """Delete expired sessions; returns how many (the caller commits)"""
+    return conn.execute('DELETE FROM sessions WHERE expires_at < ?', (now or time.time(),)).rowcount
+
+
+def _sweep_due(now):
+    global _last_sweep
+    with _sweep_lock:
+        if now - _last_sweep < SESSION_SWEEP_SECONDS:
+            return False
+        _last_sweep = now
+        return True
+
+
+class StoredSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its row and whether it changed"""
+
+    def __init__(self, initial=None, session_id=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.session_id = session_id
+        self.expires_at = expires_at
+        self.modified = False
+        self.accessed = False
+        self.rotate = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+    def regenerate(self):
+        """Move the session to a new ID when it is saved; the old ID stops working"""
+        self.rotate = True
+        self.modified = True
+
+
+class SqliteSessionInterface(SessionInterface):
+    """Flask session interface backed by the sessions table"""
+
+    def open_session(self, app, request):
+        session_id = request.cookies.get(self.get_cookie_name(app))
+        if session_id:
+            try:
+                row = get_db().execute('SELECT data, expires_at FROM sessions WHERE session_id = ? AND expires_at > ?',
+                                       (session_id, time.time())).fetchone()
+            except sqlite3.OperationalError:
+                row = None  # table not created yet
+            if row is not None:
+                return StoredSession(_serializer.loads(row[0]), session_id, row[1])
+        return StoredSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+        now = time.time()
+        lifetime = app.permanent_session_lifetime.total_seconds()
+
+        old_id = session.session_id if (session.rotate or not session) else None
+        if not session:
+            # Emptied (or never used): drop the row and the cookie
+            if old_id and session.modified:
+                self._write(lambda conn: conn.execute('DELETE FROM sessions WHERE session_id = ?', (old_id,)))
+                response.delete_cookie(name, domain=domain, path=path, secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        stale = session.expires_at is None or session.expires_at - now < lifetime - SESSION_REFRESH_SECONDS
+        if not (session.modified or stale):
+            return
+        if session.session_id is None or session.rotate:
+            session.session_id = secrets.token_urlsafe(32)
+        session.expires_at = now + lifetime
+        row = (session.session_id, _serializer.dumps(dict(session)), session.expires_at)
+
+        def write(conn):
+            if old_id:
+                conn.execute('DELETE FROM sessions WHERE session_id = ?', (old_id,))
+            conn.execute('INSERT OR REPLACE INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)', row)
+            if _sweep_due(now):
+                sweep_sessions(conn, now)
+        self._write(write)
+        session.rotate = False
+
+        response.set_cookie(name, session.session_id, expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+
+    @staticmethod
+    def _write(change):
+        """Run `change(conn)`; commits only when it opened the transaction itself"""
+        conn = get_db()
+        commit = not conn.in_transaction
+        try:
+            change(conn)
+        except sqlite3.OperationalError:
+            # Database created before sessions were stored in it
+            ensure_session_schema(conn)
+            change(conn)
+        if commit:
+            conn.commit()
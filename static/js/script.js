@@ -262,6 +262,126 @@ const FormValidator = {
     }
 };
 
+// Room Status Feed Module
+// One EventSource per page for /api/room_events; falls back to polling
+// /api/available_rooms while the feed is unavailable.
+const RoomFeed = {
+    POLL_INTERVAL: 30000,
+    source: null,
+    pollTimer: null,
+    listeners: [],
+    state: null,
+
+    /**
+     * Register a listener called with (state, change) on every update
+     * state: { occupied: Set, total_rooms, occupied_count, available_count }
+     * change: { occupied: [...], freed: [...] } for a delta, null for a full refresh
+     * @param {Function} listener - Update callback
+     */
+    subscribe(listener) {
+        this.listeners.push(listener);
+        if (this.state) {
+            listener(this.state, null);
+        }
+        if (!this.source && !this.pollTimer) {
+            this.connect();
+        }
+    },
+
+    /**
+     * Rooms free today, in ascending order
+     * @returns {Array} Room numbers
+     */
+    availableRooms() {
+        const rooms = [];
+        for (let room = 1; room <= this.state.total_rooms; room++) {
+            if (!this.state.occupied.has(room)) rooms.push(room);
+        }
+        return rooms;
+    },
+
+    connect() {
+        if (!window.EventSource) {
+            this.startPolling();
+            return;
+        }
+        this.source = new EventSource('/api/room_events');
+        this.source.addEventListener('snapshot', event => this.applySnapshot(JSON.parse(event.data)));
+        this.source.addEventListener('delta', event => this.applyDelta(JSON.parse(event.data)));
+        this.source.onopen = () => this.stopPolling();
+        this.source.onerror = () => {
+            // EventSource retries by itself; poll until it is back (or for good if it gave up)
+            if (this.source.readyState === EventSource.CLOSED) {
+                this.source = null;
+            }
+            this.startPolling();
+        };
+    },
+
+    applySnapshot(data) {
+        this.state = {
+            occupied: new Set(data.occupied),
+            total_rooms: data.total_rooms,
+            occupied_count: data.occupied_count,
+            available_count: data.available_count
+        };
+        this.notify(null);
+    },
+
+    applyDelta(data) {
+        if (!this.state) return;
+        data.occupied.forEach(room => this.state.occupied.add(room));
+        data.freed.forEach(room => this.state.occupied.delete(room));
+        this.state.occupied_count = data.occupied_count;
+        this.state.available_count = data.available_count;
+        this.notify({ occupied: data.occupied, freed: data.freed });
+    },
+
+    notify(change) {
+        this.listeners.forEach(listener => {
+            try {
+                listener(this.state, change);
+            } catch (error) {
+                console.error('Room feed listener failed:', error);
+            }
+        });
+    },
+
+    async poll() {
+        try {
+            const response = await fetch('/api/available_rooms');
+            if (!response.ok) throw new Error('Failed to fetch available rooms');
+            const data = await response.json();
+            const available = new Set(data.available_rooms);
+            const occupied = [];
+            for (let room = 1; room <= data.total_rooms; room++) {
+                if (!available.has(room)) occupied.push(room);
+            }
+            this.applySnapshot({
+                occupied,
+                total_rooms: data.total_rooms,
+                occupied_count: data.occupied_count,
+                available_count: data.available_count
+            });
+        } catch (error) {
+            console.error('Error polling room status:', error);
+        }
+    },
+
+    startPolling() {
+        if (this.pollTimer) return;
+        this.poll();
+        this.pollTimer = setInterval(() => this.poll(), this.POLL_INTERVAL);
+    },
+
+    stopPolling() {
+        if (this.pollTimer) {
+            clearInterval(this.pollTimer);
+            this.pollTimer = null;
+        }
+    }
+};
+
 // Dashboard Module
 const Dashboard = {
     /**
@@ -274,43 +394,53 @@ const Dashboard = {
     },
 
     /**
-     * Load room status from API
+     * Load room status from the room feed (pushed changes, no polling)
      */
-    async loadRoomStatus() {
-        // ROOM STATUS LOADING DISABLED TO PREVENT FLICKERING
-        console.log('🛑 Room status loading disabled to prevent flickering');
-        return;
-        // try {
-        //     const response = await fetch('/api/room_status');
-        //     if (!response.ok) throw new Error('Failed to fetch room status');
-
-        //     const roomStatus = await response.json();
-        //     this.renderRoomGrid(roomStatus);
-        // } catch (error) {
-        //     console.error('Error loading room status:', error);
-        //     Utils.showNotification('Failed to load room status', 'error');
-        // }
+    loadRoomStatus() {
+        if (this.roomFeedStarted) {
+            RoomFeed.poll();
+            return;
+        }
+        this.roomFeedStarted = true;
+        RoomFeed.subscribe((state, change) => this.renderRoomGrid(state, change));
     },
 
     /**
      * Render room status grid
-     * @param {Object} roomStatus - Room status data
+     * Full render on a snapshot; only the changed cells on a delta, so the grid never flickers
+     * @param {Object} state - Room feed state
+     * @param {Object} change - Rooms occupied/freed since the last update, or null
      */
-    renderRoomGrid(roomStatus) {
-        const roomGrid = document.getElementById('room-grid');
+    renderRoomGrid(state, change) {
+        const roomGrid = document.getElementById('roomGrid') || document.getElementById('room-grid');
         if (!roomGrid) return;
+        const cellClass = roomGrid.id === 'roomGrid' ? 'room-item' : 'room-cell';
+
+        const setStatus = (roomDiv, roomNum) => {
+            const status = state.occupied.has(roomNum) ? 'occupied' : 'available';
+            roomDiv.className = `${cellClass} ${status}`;
+            roomDiv.title = `Room ${roomNum}: ${status}`;
+        };
+
+        if (change && roomGrid.children.length === state.total_rooms) {
+            change.occupied.concat(change.freed).forEach(roomNum => {
+                setStatus(roomGrid.children[roomNum - 1], roomNum);
+            });
+            return;
+        }
 
         roomGrid.innerHTML = '';
 
-        // Create room cells for all 157 rooms
-        for (let roomNum = 1; roomNum <= 157; roomNum++) {
+        // Create room cells for all rooms
+        for (let roomNum = 1; roomNum <= state.total_rooms; roomNum++) {
             const roomDiv = document.createElement('div');
-            roomDiv.className = `room-cell ${roomStatus[roomNum] || 'available'}`;
             roomDiv.textContent = roomNum;
-            roomDiv.title = `Room ${roomNum}: ${roomStatus[roomNum] || 'available'}`;
+            setStatus(roomDiv, roomNum);
 
             // Add click event for room details
-            roomDiv.addEventListener('click', () => this.showRoomDetails(roomNum, roomStatus[roomNum]));
+            roomDiv.addEventListener('click', () => {
+                this.showRoomDetails(roomNum, state.occupied.has(roomNum) ? 'occupied' : 'available');
+            });
 
             roomGrid.appendChild(roomDiv);
         }
@@ -335,11 +465,7 @@ const Dashboard = {
      * Start auto-refresh for dashboard data
      */
     startAutoRefresh() {
-        // AUTO-REFRESH DISABLED TO PREVENT FLICKERING
-        console.log('🛑 Dashboard auto-refresh disabled to prevent flickering');
-        // dashboardRefreshInterval = setInterval(() => {
-        //     this.loadRoomStatus();
-        // }, 30000);
+        // Room changes are pushed by RoomFeed (which polls by itself only as a fallback)
     },
 
     /**
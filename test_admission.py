@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Test script for admission control
+Checks the gate (slots, bounded waiting, timeouts, Retry-After), that a full
+PDF class answers 503 at once while cheap routes stay fast, that a streamed
+batch keeps its slot until it is sent and a class without a gate is never
+turned away, the export queue depth limit, the /metrics counters, and an
+overload run of concurrent receipt downloads.
+"""
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import admission
+from admission import AdmissionGate, parse_limits, configure_admission, gates
+from jobs import run_pending_jobs
+from bench_common import make_seeded_database, prepare_app, logged_in_client, percentile
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _sample(text, name, **labels):
+    """Value of the sample `name` whose labels include `labels` (0 if absent)"""
+    wanted = [f'{key}="{value}"' for key, value in labels.items()]
+    for line in text.splitlines():
+        if line.startswith(name + '{') and all(label in line for label in wanted):
+            return float(line.rsplit(' ', 1)[1])
+    return 0
+
+
+def test_gate():
+    """Slots, bounded waiting, rejection when full, timeouts and Retry-After"""
+    assert parse_limits('pdf=2:8, batch=1, bad, x=') == {'pdf': (2, 8), 'batch': (1, 0)}
+    gate = AdmissionGate('unit', 1, 1, timeout=5)
+    first = gate.enter()
+    assert first is not None and gate.snapshot() == (1, 0, 1, 1)
+
+    waiter = {}
+    thread = threading.Thread(target=lambda: waiter.setdefault('ticket', gate.enter()))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while gate.snapshot()[1] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert gate.snapshot() == (1, 1, 1, 1)
+
+    started = time.perf_counter()
+    assert gate.enter() is None, 'a request was queued past the depth'
+    assert time.perf_counter() - started < 0.05, 'rejection was not immediate'
+    assert gate.retry_after() >= 1
+
+    first.release()
+    first.release()  # a second release is ignored
+    thread.join(5)
+    assert waiter['ticket'] is not None and gate.snapshot() == (1, 0, 1, 1)
+    waiter['ticket'].release()
+    assert gate.snapshot() == (0, 0, 1, 1) and gate.completed == 2
+
+    impatient = AdmissionGate('unit', 1, 1, timeout=0.05)
+    held = impatient.enter()
+    assert impatient.enter() is None and impatient.snapshot() == (1, 0, 1, 1)
+    held.release()
+
+    configure_admission({'unit': (1, 0)})
+    try:
+        assert admission.admit('unknown') == (admission.NOT_GATED, None)
+    finally:
+        configure_admission()
+    print("✅ Admission gate")
+
+
+def test_busy_pdf_class():
+    """A full PDF class answers 503 + Retry-After at once; cheap routes are not queued"""
+    db_path = make_seeded_database(200, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        configure_admission({'pdf': (1, 0), 'batch': (1, 0)}, timeout=1)
+        assert client.get('/download_custom_receipt/1').status_code == 200
+        assert gates()['pdf'].snapshot()[0] == 0, 'the slot was not released'
+
+        held = gates()['pdf'].enter()
+        started = time.perf_counter()
+        busy = client.get('/download_receipt/1')
+        busy_ms = (time.perf_counter() - started) * 1000
+        assert busy.status_code == 503 and int(busy.headers['Retry-After']) >= 1
+        assert busy.get_json()['retry_after'] == int(busy.headers['Retry-After'])
+        assert busy_ms < 100, f'503 took {busy_ms:.1f} ms'
+
+        started = time.perf_counter()
+        assert client.get('/api/room_status').status_code == 200
+        status_ms = (time.perf_counter() - started) * 1000
+
+        text = client.get('/metrics').get_data(as_text=True)
+        assert _sample(text, 'hotel_admission_rejected_total', **{'class': 'pdf', 'reason': 'queue_full'}) >= 1
+        assert _sample(text, 'hotel_admission_requests', **{'class': 'pdf', 'state': 'running'}) == 1
+        assert _sample(text, 'hotel_admission_requests', **{'class': 'pdf', 'state': 'max_running'}) == 1
+        assert _sample(text, 'hotel_request_duration_seconds_count', status='503') >= 1
+
+        held.release()
+        assert client.get('/download_receipt/1').status_code == 200
+        print(f"   503 in {busy_ms:.1f} ms, room status in {status_ms:.1f} ms while receipts were full")
+    finally:
+        configure_admission()
+        _remove_database(db_path)
+    print("✅ Full PDF class answers 503 at once")
+
+
+def test_batch_holds_slot_while_streaming():
+    """A streamed batch keeps its slot until the body is sent"""
+    db_path = make_seeded_database(200, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        configure_admission({'pdf': (1, 0), 'batch': (1, 0)}, timeout=1)
+        streaming = client.get('/receipts/batch?ids=1,2,3&format=pdf', buffered=False)
+        assert streaming.status_code == 200
+        assert gates()['batch'].snapshot()[0] == 1, 'the slot was released before the body was sent'
+        assert client.get('/receipts/batch?ids=4,5&format=pdf').status_code == 503
+
+        assert streaming.get_data().startswith(b'%PDF')
+        streaming.close()
+        assert gates()['batch'].snapshot()[0] == 0
+        assert client.get('/receipts/batch?ids=4,5&format=pdf').get_data().startswith(b'%PDF')
+        assert gates()['batch'].snapshot()[0] == 0
+
+        # Bodies never read: a HEAD, and a client gone before the first chunk
+        head = client.head('/receipts/batch?ids=1,2&format=pdf')
+        assert head.status_code == 200 and gates()['batch'].snapshot()[0] == 1
+        head.close()
+        assert gates()['batch'].snapshot()[0] == 0, 'a HEAD request kept its slot'
+        unread = client.get('/receipts/batch?ids=1,2&format=pdf', buffered=False)
+        unread.close()
+        assert gates()['batch'].snapshot()[0] == 0, 'an unread body kept its slot'
+        assert client.get('/receipts/batch?ids=4,5&format=pdf').status_code == 200
+
+        # A class without a gate is let through, never turned away
+        configure_admission({'pdf': (1, 0)}, timeout=1)
+        ungated = client.get('/receipts/batch?ids=4,5&format=pdf')
+        assert ungated.status_code == 200 and 'Retry-After' not in ungated.headers
+        assert ungated.get_data().startswith(b'%PDF')
+    finally:
+        configure_admission()
+        _remove_database(db_path)
+    print("✅ Streamed batch holds its slot until sent")
+
+
+def test_export_queue_depth():
+    """Exports past HOTEL_EXPORT_QUEUE queued jobs are turned away until the queue drains"""
+    db_path = make_seeded_database(200, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    depth = admission.EXPORT_QUEUE_DEPTH
+    admission.EXPORT_QUEUE_DEPTH = 2
+    try:
+        assert client.get('/export_excel').status_code == 302
+        assert client.get('/export_excel').status_code == 302
+        busy = client.get('/export_excel')
+        assert busy.status_code == 503 and busy.headers['Retry-After'] == str(admission.EXPORT_RETRY_AFTER)
+
+        text = client.get('/metrics').get_data(as_text=True)
+        assert _sample(text, 'hotel_jobs', kind='excel_report', state='queued') == 2
+        assert _sample(text, 'hotel_admission_rejected_total', **{'class': 'export'}) >= 1
+
+        assert run_pending_jobs() == 2
+        assert client.get('/export_excel').status_code == 302
+        run_pending_jobs()
+    finally:
+        admission.EXPORT_QUEUE_DEPTH = depth
+        _remove_database(db_path)
+    print("✅ Export queue depth limit")
+
+
+def test_overload():
+    """Many concurrent receipt downloads: every answer is 200 or 503 and room status stays up"""
+    db_path = make_seeded_database(400, days=20)
+    module = prepare_app(db_path)
+    statuses, status_ms = [], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def download(first):
+        client = logged_in_client(module.app)
+        for tourist_id in range(first, first + 30, 10):
+            code = client.get(f'/download_custom_receipt/{tourist_id}').status_code
+            with lock:
+                statuses.append(code)
+
+    def probe():
+        client = logged_in_client(module.app)
+        while not stop.is_set():
+            started = time.perf_counter()
+            assert client.get('/api/room_status').status_code == 200
+            status_ms.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+    try:
+        configure_admission({'pdf': (1, 2), 'batch': (1, 0)}, timeout=2)
+        prober = threading.Thread(target=probe)
+        prober.start()
+        workers = [threading.Thread(target=download, args=(first,)) for first in range(1, 11)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(120)
+        stop.set()
+        prober.join(30)
+        assert set(statuses) <= {200, 503} and len(statuses) == 30, statuses
+        assert statuses.count(200) >= 1 and statuses.count(503) >= 1, statuses
+        assert status_ms, 'room status never answered'
+        assert all(gate.snapshot()[:2] == (0, 0) for gate in gates().values())
+        print(f"   {statuses.count(200)} rendered, {statuses.count(503)} turned away; "
+              f"room status p95 {percentile(status_ms, 95):.1f} ms over {len(status_ms)} probes")
+    finally:
+        stop.set()
+        configure_admission()
+        _remove_database(db_path)
+    print("✅ Overload sheds receipts, not room status")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing admission control...")
+    print("=" * 50)
+    tests = [test_gate, test_busy_pdf_class, test_batch_holds_slot_while_streaming, test_export_queue_depth,
+             test_overload]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the load-test benchmark
+Checks that realistic seeding is reproducible and has its festival rushes,
+returning guests and payment mix, that a small run loads every route in
+both modes without errors and produces JSON, and what --compare reports.
+"""
+
+import os
+import sys
+import json
+import logging
+import sqlite3
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import admission
+from bench_common import make_seeded_database, day_weights, REPEAT_GUEST_SHARE
+from bench_load import run_benchmark, compare, ROUTES
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def test_realistic_seeding():
+    """Festival days are busiest, guests come back with the same Aadhaar, payment modes are mixed"""
+    weights = dict(day_weights(365, date(2025, 12, 31)))
+    assert weights[date(2025, 7, 15)] > weights[date(2025, 8, 15)] * 4  # Kanwar Yatra vs an ordinary Friday
+    assert weights[date(2025, 8, 16)] == 1.5  # Saturday
+
+    paths = [make_seeded_database(20000, realistic=True), make_seeded_database(20000, realistic=True)]
+    try:
+        first, second = (sqlite3.connect(path) for path in paths)
+        dump = 'SELECT full_name, aadhar_number, check_in_date, payment_mode FROM tourists ORDER BY id'
+        assert first.execute(dump).fetchall() == second.execute(dump).fetchall(), 'same seed, different data'
+
+        per_day = dict(first.execute('SELECT check_in_date, COUNT(*) FROM tourists GROUP BY check_in_date'))
+        busiest = max(per_day, key=per_day.get)
+        assert busiest[5:7] in ('01', '03', '04', '06', '07', '10', '11'), busiest
+        assert per_day[busiest] > 4 * sorted(per_day.values())[len(per_day) // 2]
+
+        distinct = first.execute('SELECT COUNT(DISTINCT aadhar_number) FROM tourists').fetchone()[0]
+        repeat_share = 1 - distinct / 20000
+        assert abs(repeat_share - REPEAT_GUEST_SHARE) < 0.03, repeat_share
+        assert first.execute('''SELECT COUNT(*) FROM (SELECT aadhar_number FROM tourists GROUP BY aadhar_number
+                                HAVING COUNT(DISTINCT full_name || mobile_number) > 1)''').fetchone()[0] == 0
+
+        modes = dict(first.execute('SELECT payment_mode, COUNT(*) FROM tourists GROUP BY payment_mode'))
+        assert set(modes) == {'Cash', 'Online', 'Card', 'Cheque'} and modes['Cash'] > modes['Card']
+        first.close()
+        second.close()
+    finally:
+        for path in paths:
+            _remove_database(path)
+    print("✅ Realistic seeding")
+
+
+def test_small_run():
+    """Every route answers without errors in both modes, the document is JSON and nothing global changes"""
+    levels = {name: logging.getLogger(name).level for name in ('app', 'werkzeug')}
+    depth = admission.EXPORT_QUEUE_DEPTH
+    document = run_benchmark(2000, threads=2, requests_per_thread=2)
+    assert {name: logging.getLogger(name).level for name in levels} == levels
+    assert admission.EXPORT_QUEUE_DEPTH == depth
+    assert set(document['results']) == ({'test_client', 'http'} if hasattr(os, 'fork') else {'test_client'})
+    for mode, routes in document['results'].items():
+        assert set(routes) == set(ROUTES), mode
+        for route, stats in routes.items():
+            assert stats['requests'] == 4 and stats['errors'] == 0, (mode, route, stats)
+            assert 0 < stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+    assert document['config']['rows'] == 2000 and document['seed_seconds'] >= 0
+    assert json.loads(json.dumps(document)) == document
+    print("✅ Small run covers every route")
+
+
+def test_compare():
+    """Changes beyond the noise band are flagged, and so are differing configurations"""
+    def document(rows, p50, p99):
+        return {'config': {'rows': rows}, 'results': {'http': {'dashboard': {'p50_ms': p50, 'p99_ms': p99}}}}
+
+    lines = compare(document(1000, 10.0, 20.0), document(1000, 10.5, 40.0))
+    assert lines == ['http        dashboard              p50 10.0 -> 10.5 ms (+5%), p99 20.0 -> 40.0 ms (+100%) ⚠️']
+    lines = compare(document(1000, 10.0, 20.0), document(5000, 5.0, 20.0))
+    assert lines[0] == '⚠️ rows differs: 1000 -> 5000' and '🚀' in lines[1]
+    assert compare({'results': {}}, document(1000, 1.0, 1.0))[-1].endswith('new')
+    print("✅ Comparing results")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing load-test benchmark...")
+    print("=" * 50)
+    tests = [test_realistic_seeding, test_small_run, test_compare]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
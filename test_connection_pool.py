@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled SQLite connection layer
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from database import ConnectionPool
+
+
+def _temp_db():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    return path
+
+
+def test_pragmas_applied():
+    """Pooled connections come up in WAL mode with the tuned settings"""
+    pool = ConnectionPool(_temp_db(), max_size=2)
+    conn = pool.acquire()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    assert conn.execute('PRAGMA cache_size').fetchone()[0] == -16000
+    pool.release(conn)
+    pool.close_all()
+    print("✅ WAL mode and PRAGMAs applied")
+
+
+def test_connections_are_reused():
+    """A released connection is handed out again instead of reconnecting"""
+    pool = ConnectionPool(_temp_db(), max_size=2)
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    assert first is second
+    assert pool.stats()['open'] == 1
+    pool.release(second)
+    pool.close_all()
+    print("✅ Connections reused")
+
+
+def test_pool_is_bounded():
+    """Acquiring beyond max_size times out instead of opening more connections"""
+    pool = ConnectionPool(_temp_db(), max_size=1, timeout=0.1)
+    held = pool.acquire()
+    try:
+        pool.acquire()
+    except sqlite3.OperationalError:
+        pass
+    else:
+        raise AssertionError('pool handed out more than max_size connections')
+    pool.release(held)
+    pool.close_all()
+    print("✅ Pool size bounded")
+
+
+def test_release_discards_open_transaction():
+    """Uncommitted writes are rolled back when a connection goes back to the pool"""
+    pool = ConnectionPool(_temp_db(), max_size=1)
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.commit()
+    conn.execute('INSERT INTO t VALUES (1)')
+    pool.release(conn)
+    conn = pool.acquire()
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    pool.release(conn)
+    pool.close_all()
+    print("✅ Open transactions rolled back on release")
+
+
+def test_thread_connections_outside_requests():
+    """get_db() outside a request pins one connection per thread"""
+    original_path, original_size = database.DATABASE_PATH, database.POOL_SIZE
+    database.configure(_temp_db(), pool_size=4)
+    seen = {}
+
+    def worker(name):
+        seen[name] = (database.get_db(), database.get_db())
+        database.release_thread_connection()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for first, again in seen.values():
+        assert first is again
+    database.configure(original_path, pool_size=original_size)
+    print("✅ Per-thread connections outside requests")
+
+
+def test_thread_connections_leave_pool_slots():
+    """Threads that never release their connection do not use up the request pool"""
+    original_path, original_size = database.DATABASE_PATH, database.POOL_SIZE
+    database.configure(_temp_db(), pool_size=1)
+    try:
+        threads = [threading.Thread(target=database.get_db) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        pool = database.get_pool()
+        assert pool.stats()['open'] == 0
+        pool.timeout = 0.1
+        pool.release(pool.acquire())
+    finally:
+        database.configure(original_path, pool_size=original_size)
+    print("✅ Thread connections stay out of the pool")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing pooled connection layer...")
+    print("=" * 50)
+    tests = [
+        test_pragmas_applied,
+        test_connections_are_reused,
+        test_pool_is_bounded,
+        test_release_discards_open_transaction,
+        test_thread_connections_outside_requests,
+        test_thread_connections_leave_pool_slots,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
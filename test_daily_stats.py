@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Test script for the daily statistics rollup
+Checks that a rebuild matches direct aggregates, that check-in, edit and delete
+keep the rollup equal to a rebuild (and roll back with their transaction, a
+lazily built rollup included), the dashboard and /api/daily_stats readers,
+the rebuild command, and the cost of a year of analytics against aggregating
+the guests.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import daily_stats
+from occupancy import ensure_occupancy_schema, stay_nights
+from daily_stats import (ensure_daily_stats_schema, rebuild_daily_stats, record_stay_change, stay_row,
+                         stats_between, payment_totals)
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+LARGE_ROWS = int(os.environ.get('STATS_BENCH_ROWS', '200000'))
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _snapshot(conn):
+    return (conn.execute('SELECT * FROM daily_stats ORDER BY stat_date').fetchall(),
+            conn.execute('SELECT * FROM daily_payment_stats ORDER BY stat_date, payment_mode').fetchall())
+
+
+def _rounded(snapshot):
+    return [[tuple(round(v, 2) if isinstance(v, float) else v for v in row) for row in rows] for rows in snapshot]
+
+
+def test_rebuild_matches_aggregates():
+    """A rebuilt rollup equals GROUP BY over tourists and a night-by-night stay count"""
+    db_path = make_seeded_database(2000, days=60)
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        conn.execute("UPDATE tourists SET check_in_done = 0, payment_mode = NULL WHERE id % 17 = 0")
+        conn.commit()
+        ensure_daily_stats_schema(conn)
+        first, last = date.today() - timedelta(days=70), date.today() + timedelta(days=5)
+        rows = {row['stat_date']: row for row in stats_between(conn, first, last)}
+
+        expected = conn.execute('''
+            SELECT check_in_date, COUNT(*), SUM(check_in_done = 1), ROUND(SUM(amount_paid_today), 2),
+                   ROUND(SUM(remaining_amount), 2), SUM(male_count), SUM(female_count), SUM(children_count)
+            FROM tourists GROUP BY check_in_date
+        ''').fetchall()
+        for day, *values in expected:
+            row = rows[day]
+            assert [row['registrations'], row['check_ins'], row['amount_paid'], row['remaining_amount'],
+                    row['male_guests'], row['female_guests'], row['children']] == values, day
+
+        nights = {}
+        for check_in, check_out in conn.execute(
+                'SELECT check_in_date, check_out_date FROM tourists WHERE check_in_done = 1'):
+            night, last_night = stay_nights(check_in, check_out)
+            while night <= last_night:
+                nights[night.isoformat()] = nights.get(night.isoformat(), 0) + 1
+                night += timedelta(days=1)
+        assert {day: row['occupied_rooms'] for day, row in rows.items() if row['occupied_rooms']} == nights
+
+        modes = dict(conn.execute("SELECT COALESCE(payment_mode, 'Cash'), COUNT(*) FROM tourists GROUP BY 1"))
+        assert {mode: totals['registrations'] for mode, totals in payment_totals(conn, first, last).items()} == modes
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Rebuild matches direct aggregates")
+
+
+def test_routes_keep_rollup_exact():
+    """Check-in, edit and delete leave the rollup equal to a fresh rebuild"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    module.room_occupancy.invalidate()
+    client = logged_in_client(module.app)
+    today = date.today()
+    try:
+        before = client.get('/api/daily_stats').get_json()
+        room = client.get('/api/available_rooms').get_json()['available_rooms'][-1]
+        client.post('/checkin', data={
+            'full_name': 'Rollup Guest', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+            'mobile_number': '9876543210', 'amount_paid_today': '1500', 'remaining_amount': '500',
+            'check_in_done': 'yes', 'room_number': str(room), 'payment_mode': 'Online',
+            'male_count': '2', 'female_count': '1', 'check_out_date': (today + timedelta(days=3)).isoformat()})
+        conn = sqlite3.connect(db_path)
+        guest = conn.execute("SELECT id FROM tourists WHERE full_name = 'Rollup Guest'").fetchone()[0]
+
+        after = client.get('/api/daily_stats').get_json()
+        assert after['totals']['check_ins'] == before['totals']['check_ins'] + 1
+        assert after['totals']['amount_paid'] == round(before['totals']['amount_paid'] + 1500, 2)
+        assert after['payment_modes']['Online']['registrations'] == \
+            before['payment_modes'].get('Online', {}).get('registrations', 0) + 1
+
+        client.post(f'/tourist_profile/{guest}/edit', data={
+            'full_name': 'Rollup Guest', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+            'mobile_number': '9876543210', 'amount_paid_today': '2000', 'remaining_amount': '0',
+            'payment_mode': 'Card'})
+        client.post('/tourist_profile/5/delete')
+        incremental = _snapshot(conn)
+        rebuild_daily_stats(conn)
+        assert _rounded(incremental) == _rounded(_snapshot(conn)), 'incremental rollup drifted from a rebuild'
+
+        html = client.get('/').get_data(as_text=True)
+        stats = daily_stats.day_stats(conn, today)
+        assert f"<h3>{stats['check_ins']}</h3>" in html
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Check-in, edit and delete keep the rollup exact")
+
+
+def test_rollback_and_rebuild_command():
+    """Rollup changes roll back with their transaction; --rebuild repairs a damaged rollup"""
+    db_path = make_seeded_database(200, days=10)
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        ensure_daily_stats_schema(conn)
+        clean = _snapshot(conn)
+
+        before = stay_row(conn, 1)
+        conn.execute('DELETE FROM tourists WHERE id = 1')
+        record_stay_change(conn, old=before)
+        assert _snapshot(conn) != clean
+        conn.rollback()
+        assert _snapshot(conn) == clean
+
+        conn.execute('UPDATE daily_stats SET check_ins = check_ins + 99')
+        conn.commit()
+        assert daily_stats.main(['--rebuild', '--db', db_path]) == 0
+        assert _rounded(_snapshot(conn)) == _rounded(clean)
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Rollback and rebuild command")
+
+
+def test_lazy_rollup_joins_transaction():
+    """A rollup built lazily by a check-in's write lands (or rolls back) with that write"""
+    db_path = make_seeded_database(200, days=10)
+    conn = sqlite3.connect(db_path)
+    try:
+        before = stay_row(conn, 1)
+        conn.execute('UPDATE tourists SET amount_paid_today = amount_paid_today + 100 WHERE id = 1')
+        record_stay_change(conn, old=before, new=stay_row(conn, 1))
+        assert conn.in_transaction, 'the lazy rebuild committed the caller\'s transaction'
+        conn.rollback()
+        assert stay_row(conn, 1) == before
+        assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'daily_stats'").fetchone()
+
+        conn.execute('UPDATE tourists SET amount_paid_today = amount_paid_today + 100 WHERE id = 1')
+        record_stay_change(conn, old=before, new=stay_row(conn, 1))
+        conn.commit()
+        lazy = _snapshot(conn)
+        rebuild_daily_stats(conn)
+        assert _rounded(lazy) == _rounded(_snapshot(conn))
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Lazy rollup joins the caller's transaction")
+
+
+def _timed(call, repeat=10):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def test_year_of_analytics():
+    """A year of daily totals reads O(days) rows instead of aggregating every guest"""
+    db_path = make_seeded_database(LARGE_ROWS)
+    conn = database.open_connection(db_path)
+    try:
+        database.ensure_indexes(conn)
+        ensure_occupancy_schema(conn)
+        started = time.perf_counter()
+        ensure_daily_stats_schema(conn)
+        rebuild_ms = (time.perf_counter() - started) * 1000
+        first, last = date.today() - timedelta(days=364), date.today()
+
+        rollup = _timed(lambda: (stats_between(conn, first, last), payment_totals(conn, first, last)))
+        scan = _timed(lambda: (conn.execute('''
+            SELECT check_in_date, COUNT(*), SUM(check_in_done = 1), SUM(amount_paid_today), SUM(remaining_amount),
+                   SUM(male_count), SUM(female_count), SUM(children_count)
+            FROM tourists WHERE check_in_date BETWEEN ? AND ? GROUP BY check_in_date
+        ''', (first.isoformat(), last.isoformat())).fetchall(), conn.execute('''
+            SELECT payment_mode, COUNT(*), SUM(amount_paid_today) FROM tourists
+            WHERE check_in_date BETWEEN ? AND ? GROUP BY payment_mode
+        ''', (first.isoformat(), last.isoformat())).fetchall()), repeat=3)
+        today = _timed(lambda: daily_stats.day_stats(conn, last), repeat=100)
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print(f"   {LARGE_ROWS:,} guests: year of daily totals {rollup:.2f} ms from the rollup vs {scan:.1f} ms "
+          f"aggregating guests; today's row {today:.3f} ms; full rebuild {rebuild_ms:.0f} ms")
+    assert rollup * 5 < scan, 'rollup not clearly cheaper than aggregating'
+    print("✅ Year of analytics reads the rollup")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing daily statistics rollup...")
+    print("=" * 50)
+    tests = [test_rebuild_matches_aggregates, test_routes_keep_rollup_exact, test_rollback_and_rebuild_command,
+             test_lazy_rollup_joins_transaction, test_year_of_analytics]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
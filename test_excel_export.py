@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming Excel export
+Checks the report layout against the previous pandas export, the date range
+handling of the route and its background job, and that memory stays flat as
+the range grows.
+"""
+
+import io
+import os
+import glob
+import sys
+import time
+import sqlite3
+import tracemalloc
+from datetime import date, timedelta
+
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import artifacts
+from artifacts import load_artifact
+from excel_export import report_range, write_report
+from jobs import job_status, run_pending_jobs
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+LARGE_ROWS = int(os.environ.get('EXCEL_EXPORT_ROWS', '50000'))
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _pandas_report(conn, first, last, path):
+    """The export as it was written with pandas.ExcelWriter (reference layout)"""
+    df = pd.read_sql_query('''
+        SELECT check_in_date, full_name, mobile_number, aadhar_number,
+               amount_paid_today, remaining_amount, check_in_done, room_number
+        FROM tourists WHERE check_in_date >= ? AND check_in_date <= ?
+        ORDER BY check_in_date, created_at
+    ''', conn, params=(first.isoformat(), last.isoformat()))
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        current_row = 0
+        for day, group in df.groupby('check_in_date'):
+            pd.DataFrame([['Date: ' + str(day)]], columns=['']).to_excel(
+                writer, sheet_name='Monthly Report', startrow=current_row, index=False, header=False)
+            current_row += 2
+            group_display = group[['full_name', 'mobile_number', 'aadhar_number', 'amount_paid_today',
+                                   'remaining_amount', 'check_in_done', 'room_number']]
+            group_display.columns = ['Name', 'Mobile', 'Aadhar', 'Amount Paid Today',
+                                     'Remaining Amount', 'Check-In', 'Room Number']
+            group_display.to_excel(writer, sheet_name='Monthly Report', startrow=current_row, index=False)
+            current_row += len(group_display) + 1
+            pd.DataFrame([['', '', '', f"Daily Total: ₹{group['amount_paid_today'].sum():.2f}",
+                           f"₹{group['remaining_amount'].sum():.2f}", '', '']],
+                         columns=group_display.columns).to_excel(
+                writer, sheet_name='Monthly Report', startrow=current_row, index=False, header=False)
+            current_row += 3
+        pd.DataFrame([['', '', 'GRAND TOTAL:', f"₹{df['amount_paid_today'].sum():.2f}",
+                       f"₹{df['remaining_amount'].sum():.2f}", '', '']], columns=[''] * 7).to_excel(
+            writer, sheet_name='Monthly Report', startrow=current_row, index=False, header=False)
+
+
+def _sheet_values(source):
+    sheet = load_workbook(source, read_only=True)['Monthly Report']
+    rows = []
+    for row in sheet.iter_rows(values_only=True):
+        row = [None if value == '' else value for value in row]
+        while row and row[-1] is None:
+            row.pop()
+        rows.append(row)
+    return rows
+
+
+def test_layout_matches_pandas_export():
+    """Cell values match the previous pandas-based report"""
+    db_path = make_seeded_database(400, days=20)
+    try:
+        conn = sqlite3.connect(db_path)
+        first, last = date.today() - timedelta(days=9), date.today()
+        output = io.BytesIO()
+        assert write_report(conn, first, last, output) == 200
+        reference = os.path.join(os.path.dirname(db_path), 'reference_report.xlsx')
+        _pandas_report(conn, first, last, reference)
+        expected = _sheet_values(reference)
+        actual = _sheet_values(output)
+        while expected and not expected[-1]:
+            expected.pop()
+        while actual and not actual[-1]:
+            actual.pop()
+        assert actual == expected, next((a, e) for a, e in zip(actual, expected) if a != e)
+        os.remove(reference)
+    finally:
+        _remove_database(db_path)
+    print("✅ Report layout matches the pandas export")
+
+
+def test_report_range():
+    """Missing ends default to the current month; reversed ranges are rejected"""
+    assert report_range(today=date(2025, 2, 14)) == (date(2025, 2, 1), date(2025, 2, 28))
+    assert report_range('2024-01-01', '2024-12-31') == (date(2024, 1, 1), date(2024, 12, 31))
+    for bad in (('2025-07-10', '2025-07-01'), ('07/01/2025', None)):
+        try:
+            report_range(*bad)
+        except ValueError:
+            continue
+        raise AssertionError(f'{bad} accepted')
+    print("✅ Date range parsing")
+
+
+def test_export_route():
+    """The route queues any range as a job and redirects on empty or invalid ranges"""
+    db_path = make_seeded_database(300, days=30)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        first, last = date.today() - timedelta(days=6), date.today()
+        response = client.get(f'/export_excel?from={first}&to={last}')
+        assert response.status_code == 302 and '/jobs/' in response.headers['Location'], response.status_code
+        job_url = response.headers['Location']
+        assert run_pending_jobs() == 1
+        job = client.get('/api' + job_url[job_url.index('/jobs/'):]).get_json()
+        assert job['state'] == 'done' and job['percent'] == 100 and job['progress'] == job['total'] > 0, job
+        download = client.get(job['download_url'])
+        assert download.status_code == 200
+        assert 'hotel_report_' in download.headers['Content-Disposition']
+        # The workbook was spooled to the artifact store and is sent from that file
+        with module.app.app_context():
+            path = load_artifact(job_status(job['job_id'])['artifact_id'])[0]
+        assert os.path.dirname(path) == artifacts.ARTIFACT_DIR
+        with open(path, 'rb') as stored:
+            assert stored.read() == download.data
+        assert not glob.glob(os.path.join(artifacts.ARTIFACT_DIR, '*' + artifacts.SPOOL_SUFFIX))
+        sheet = load_workbook(io.BytesIO(download.data), read_only=True)['Monthly Report']
+        assert sum(1 for _ in sheet.iter_rows()) > 70
+
+        assert client.get('/export_excel?from=1990-01-01&to=1990-01-31').status_code == 302
+        assert client.get('/export_excel?from=2025-07-10&to=2025-07-01').status_code == 302
+        assert '/jobs/' in client.get('/export_excel').headers['Location']
+        run_pending_jobs()
+    finally:
+        _remove_database(db_path)
+    print("✅ Export route handles date ranges")
+
+
+def _export(db_path, rows, traced):
+    conn = sqlite3.connect(db_path)
+    if traced:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with open(os.devnull, 'wb') as sink:
+        written = write_report(conn, date(2000, 1, 1), date.today(), sink)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if traced else None
+    tracemalloc.stop()
+    conn.close()
+    assert written == rows
+    return peak, elapsed
+
+
+def test_memory_stays_flat():
+    """Peak Python memory barely grows from a small range to a large one"""
+    small_path = make_seeded_database(LARGE_ROWS // 10)
+    large_path = make_seeded_database(LARGE_ROWS)
+    try:
+        small_peak, _ = _export(small_path, LARGE_ROWS // 10, traced=True)
+        large_peak, _ = _export(large_path, LARGE_ROWS, traced=True)
+        _, elapsed = _export(large_path, LARGE_ROWS, traced=False)
+    finally:
+        _remove_database(small_path)
+        _remove_database(large_path)
+    print(f"   {LARGE_ROWS // 10:,} rows: peak {small_peak / 2**20:.1f} MB")
+    print(f"   {LARGE_ROWS:,} rows: peak {large_peak / 2**20:.1f} MB, "
+          f"{elapsed:.1f}s untraced ({LARGE_ROWS / elapsed:,.0f} rows/s)")
+    assert large_peak < small_peak * 1.5 + 2**20, 'memory grows with the number of rows'
+    print("✅ Export memory stays flat")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing streaming Excel export...")
+    print("=" * 50)
+    tests = [test_layout_matches_pandas_export, test_report_range, test_export_route, test_memory_stays_flat]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for in-memory receipts, artifact IDs and the temp file janitor
+(the check-in receipt is a queued job owned by the user who checked the guest in)
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import artifacts
+from jobs import run_pending_jobs, latest_job
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_store_and_expire():
+    """Artifacts are files loaded by ID until their TTL runs out; spooled files are moved in"""
+    conn = sqlite3.connect(':memory:')
+    artifact_id = artifacts.store_artifact(memoryview(b'%PDF-1.4 test'), 'hotel_receipt.pdf', conn=conn)
+    path, filename, mimetype = artifacts.load_artifact(artifact_id, conn)
+    assert _read(path) == b'%PDF-1.4 test' and filename == 'hotel_receipt.pdf' and mimetype == 'application/pdf'
+    assert os.path.dirname(path) == artifacts.ARTIFACT_DIR and path.endswith('.pdf')
+    assert artifacts.load_artifact('/tmp/tmpabc123.pdf', conn) is None
+
+    with artifacts.spool_artifact() as output:
+        output.write(b'PK spooled')
+    spooled_id = artifacts.store_artifact(output.name, 'report.xlsx', 'application/zip', conn=conn)
+    spooled_path = artifacts.load_artifact(spooled_id, conn)[0]
+    assert not os.path.exists(output.name) and _read(spooled_path) == b'PK spooled'
+    os.remove(spooled_path)
+    assert artifacts.load_artifact(spooled_id, conn) is None, 'an artifact whose file is gone was offered'
+
+    conn.execute('UPDATE generated_artifacts SET created_at = created_at - ?', (artifacts.ARTIFACT_TTL + 1,))
+    assert artifacts.load_artifact(artifact_id, conn) is None
+    # The next store removes the expired files
+    artifacts.store_artifact(b'%PDF-1.4 next', 'hotel_receipt.pdf', conn=conn)
+    assert not os.path.exists(path)
+
+    # A database from before artifacts were files: its BLOB table is replaced
+    legacy = sqlite3.connect(':memory:')
+    legacy.execute('CREATE TABLE generated_artifacts (artifact_id TEXT PRIMARY KEY, filename TEXT NOT NULL, '
+                   'mimetype TEXT NOT NULL, data BLOB NOT NULL, created_at REAL NOT NULL)')
+    assert artifacts.load_artifact(artifacts.store_artifact(b'x', 'a.pdf', conn=legacy), legacy)
+    print("✅ Artifacts stored by ID and expired")
+
+
+def test_janitor_removes_only_stale_files():
+    """Old temp files, abandoned spool files and expired artifacts are removed, fresh and unrelated ones kept"""
+    directory = tempfile.mkdtemp()
+    store = tempfile.mkdtemp()
+    names = {'tmpold.pdf': 7200, 'tmpold.xlsx': 7200, 'tmpnew.pdf': 0, 'notes.pdf': 7200}
+    stored = {'old.xlsx': artifacts.ARTIFACT_TTL + 60, 'new.xlsx': 7200, 'tmpgone.part': 7200, 'tmpbusy.part': 0}
+    for folder, files in ((directory, names), (store, stored)):
+        for name, age in files.items():
+            path = os.path.join(folder, name)
+            with open(path, 'wb') as f:
+                f.write(b'x')
+            os.utime(path, (time.time() - age, time.time() - age))
+
+    removed = artifacts.clean_artifact_files(directory, store=store)
+    assert removed == 4, removed
+    assert sorted(os.listdir(directory)) == ['notes.pdf', 'tmpnew.pdf']
+    assert sorted(os.listdir(store)) == ['new.xlsx', 'tmpbusy.part']
+    print("✅ Janitor removes stale temp files only")
+
+
+def test_checkin_receipt_served_from_database():
+    """The check-in receipt is rendered in memory by a job, kept by ID and downloadable without temp files"""
+    db_path = make_seeded_database(10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    pdfs_before = set(os.listdir(tempfile.gettempdir()))
+    try:
+        room_number = client.get('/api/available_rooms').get_json()['available_rooms'][0]
+        response = client.post('/checkin', data={
+            'full_name': 'Kavita Sharma', 'address': 'Haridwar', 'aadhar_number': '123412341234',
+            'mobile_number': '9812345678', 'amount_paid_today': '1200', 'remaining_amount': '0',
+            'payment_mode': 'Cash', 'check_in_done': 'yes', 'room_number': str(room_number),
+            'male_count': '0', 'female_count': '1', 'children_count': '0'})
+        assert response.status_code == 302, response.status_code
+
+        job_id = latest_job(1, ['checkin_receipt'])['job_id']
+        assert os.path.sep not in job_id and not job_id.endswith('.pdf')
+        with client.session_transaction() as flask_session:
+            assert 'latest_receipt' not in flask_session
+
+        # Until a job worker has rendered it, the download waits on the job page
+        pending = client.get('/download_receipt')
+        assert pending.status_code == 302 and f'/jobs/{job_id}' in pending.headers['Location']
+        assert run_pending_jobs() == 1
+
+        download = client.get('/download_receipt')
+        assert download.status_code == 200 and download.data.startswith(b'%PDF')
+        assert download.mimetype == 'application/pdf'
+
+        new_files = set(os.listdir(tempfile.gettempdir())) - pdfs_before
+        assert not [name for name in new_files if name.endswith('.pdf')], new_files
+    finally:
+        _remove_database(db_path)
+    print("✅ Check-in receipt served by artifact ID")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing generated artifacts...")
+    print("=" * 50)
+    tests = [test_store_and_expire, test_janitor_removes_only_stale_files, test_checkin_receipt_served_from_database]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test script for group check-in
+Checks member line parsing and validation, room assignment (requested rooms,
+the tightest run of free rooms, too few rooms), a 20-member API check-in
+(rows, consecutive receipts, daily rollup, occupancy, merged receipt), the
+form flow with /download_receipt, and the receipt jobs queued with the group.
+"""
+
+import os
+import sys
+import sqlite3
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from group_checkin import parse_member_lines, group_members, validate_group, assign_rooms, GROUP_MAX_MEMBERS
+from daily_stats import rebuild_daily_stats
+from jobs import run_pending_jobs, latest_job
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+SHARED = {'address': 'Kanwar Sangh, Meerut', 'mobile_number': '9876543210', 'amount_paid_today': '800',
+          'remaining_amount': '200', 'payment_mode': 'Online', 'male_count': '3', 'female_count': ''}
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _rounded(conn):
+    rows = conn.execute('SELECT * FROM daily_stats ORDER BY stat_date').fetchall()
+    return [tuple(round(v, 2) if isinstance(v, float) else v for v in row) for row in rows]
+
+
+def _group_client(rows, days):
+    db_path = make_seeded_database(rows, days=days)
+    module = prepare_app(db_path)
+    return db_path, logged_in_client(module.app)
+
+
+def _members(count, first_aadhar=500000000000):
+    return [{'full_name': f'Yatri {number}', 'aadhar_number': str(first_aadhar + number)}
+            for number in range(count)]
+
+
+def test_parse_and_validate():
+    """Member lines merge with the group values and every problem is reported"""
+    members = parse_member_lines('Ramesh Sharma, 123456789012, 9123456789, 2, 1\n\n'
+                                 'Sita Verma, 210987654321\n'
+                                 'Mohan Gupta, 111122223333, , , 0, 42\n')
+    assert members[1] == {'full_name': 'Sita Verma', 'aadhar_number': '210987654321'}
+    assert members[2] == {'full_name': 'Mohan Gupta', 'aadhar_number': '111122223333',
+                          'female_count': '0', 'room_number': '42'}
+
+    complete = group_members(members, SHARED)
+    assert complete[0]['mobile_number'] == '9123456789' and complete[0]['male_count'] == '2'
+    assert complete[1]['mobile_number'] == '9876543210' and complete[1]['male_count'] == '3'
+    assert complete[1]['female_count'] == '0' and complete[1]['payment_mode'] == 'Online'
+    assert complete[2]['room_number'] == '42' and complete[2]['address'] == SHARED['address']
+
+    def no_checks(member):
+        return []
+    assert validate_group(complete, no_checks) == []
+    assert validate_group([], no_checks) == ['Add at least one group member']
+    assert 'at most' in validate_group([complete[0]] * (GROUP_MAX_MEMBERS + 1), no_checks)[0]
+    duplicate = group_members([members[0], {'aadhar_number': '123456789012'}], {})
+    errors = validate_group(duplicate, no_checks)
+    assert errors == ['Member 1 (Ramesh Sharma): Address is required', 'Member 2 (no name): Name is required',
+                      'Member 2 (no name): Address is required',
+                      'Member 2 (no name): same Aadhar number as member 1'], errors
+    print("✅ Member parsing and validation")
+
+
+def test_assign_rooms():
+    """Requested rooms are kept and the rest of the party stays together"""
+    free = [1, 2, 5, 7, 8, 9, 10, 20, 21]
+    rooms, errors = assign_rooms([{}, {'room_number': '20'}, {}, {}], free)
+    assert errors == [] and rooms == [7, 20, 8, 9]
+    rooms, errors = assign_rooms([{}, {}], [3, 9, 10])
+    assert rooms == [9, 10]
+
+    _, errors = assign_rooms([{'room_number': '4'}, {'room_number': 'x'}], free)
+    assert len(errors) == 2 and 'not available' in errors[0] and 'invalid room' in errors[1]
+    _, errors = assign_rooms([{'room_number': '5'}, {'room_number': '5'}], free)
+    assert errors == ['Member 2: room 5 is already requested by another member']
+    _, errors = assign_rooms([{}] * 4, [1, 2, 3])
+    assert errors == ['Only 3 free rooms for the 4 members without a room']
+    print("✅ Room assignment")
+
+
+def test_api_group_checkin():
+    """Twenty members in one request: rows, receipts, rollup and occupancy agree"""
+    db_path, client = _group_client(300, 30)
+    try:
+        free_before = client.get('/api/available_rooms').get_json()['available_rooms']
+        check_out = (date.today() + timedelta(days=3)).isoformat()
+        response = client.post('/api/group_checkin', json=dict(SHARED, members=_members(20), group_name='Meerut',
+                                                               check_out_date=check_out))
+        assert response.status_code == 201, response.get_json()
+        body = response.get_json()
+        members = body['members']
+        assert len(members) == 20
+        receipts = [member['receipt_number'] for member in members]
+        first = int(receipts[0])
+        assert receipts == [f'{number:06d}' for number in range(first, first + 20)], receipts
+        rooms = [member['room_number'] for member in members]
+        assert len(set(rooms)) == 20 and set(rooms) <= set(free_before)
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute('SELECT room_number, recipe_number, comments, payment_mode, check_out_date '
+                            'FROM tourists WHERE id IN (%s) ORDER BY id'
+                            % ','.join(str(member['tourist_id']) for member in members)).fetchall()
+        assert [row[:2] for row in rows] == list(zip(rooms, receipts))
+        assert rows[0][2] == 'Group: Meerut (20 rooms)' and rows[0][3] == 'Online' and rows[0][4] == check_out
+        incremental = _rounded(conn)
+        rebuild_daily_stats(conn)
+        assert _rounded(conn) == incremental, 'group check-in drifted the daily rollup from a rebuild'
+        conn.close()
+
+        free_after = client.get('/api/available_rooms').get_json()['available_rooms']
+        assert set(free_after) == set(free_before) - set(rooms)
+
+        merged = client.get(body['group_receipt_url'])
+        assert merged.status_code == 200 and merged.get_data().startswith(b'%PDF')
+
+        # The rooms are taken now: asking for one of them again conflicts
+        conflict = client.post('/api/group_checkin', json=dict(
+            SHARED, members=[{'full_name': 'Late Yatri', 'aadhar_number': '999900001111',
+                              'room_number': rooms[0]}]))
+        assert conflict.status_code == 409 and 'not available' in conflict.get_json()['errors'][0]
+        invalid = client.post('/api/group_checkin', json=dict(SHARED, members=[{'full_name': 'No Aadhar'}]))
+        assert invalid.status_code == 400
+    finally:
+        _remove_database(db_path)
+    print("✅ API group check-in of 20 members")
+
+
+def test_form_group_checkin():
+    """The form checks the group in and /download_receipt serves the merged receipt"""
+    db_path, client = _group_client(200, 10)
+    try:
+        page = client.get('/group_checkin')
+        assert page.status_code == 200 and b'Group Check-In' in page.data
+
+        lines = '\n'.join(f"{member['full_name']}, {member['aadhar_number']}" for member in _members(3))
+        response = client.post('/group_checkin', data=dict(SHARED, members=lines, group_name='Form Group'))
+        assert response.status_code == 302, response.get_data(as_text=True)[:500]
+        assert latest_job(1, ['group_receipt'])['state'] == 'queued'
+        assert run_pending_jobs() == 2
+        receipt = client.get('/download_receipt')
+        assert receipt.status_code == 200 and receipt.get_data().startswith(b'%PDF')
+
+        rejected = client.post('/group_checkin', data=dict(SHARED, members='Only Name'))
+        assert rejected.status_code == 200 and b'Aadhar' in rejected.data
+    finally:
+        _remove_database(db_path)
+    print("✅ Form group check-in")
+
+
+def test_member_receipts_cached():
+    """Each member's receipt is rendered into the receipt cache by a queued job"""
+    db_path, client = _group_client(100, 5)
+    try:
+        response = client.post('/api/group_checkin', json=dict(SHARED, members=_members(4, 600000000000)))
+        assert response.status_code == 201
+        body = response.get_json()
+        ids = [member['tourist_id'] for member in body['members']]
+        assert client.get(body['member_receipts_job_url']).get_json()['state'] == 'queued'
+        assert run_pending_jobs() == 2
+        job = client.get(body['member_receipts_job_url']).get_json()
+        assert job['state'] == 'done' and (job['progress'], job['total']) == (4, 4), job
+        group_job = client.get(body['group_receipt_job_url']).get_json()
+        assert client.get(group_job['download_url']).get_data().startswith(b'%PDF')
+        conn = sqlite3.connect(db_path)
+        cached = {row[0] for row in conn.execute('SELECT tourist_id FROM receipt_pdf_cache')}
+        conn.close()
+        assert set(ids) <= cached, (ids, cached)
+        receipt = client.get(response.get_json()['members'][0]['receipt_url'])
+        assert receipt.status_code == 200 and receipt.get_data().startswith(b'%PDF')
+    finally:
+        _remove_database(db_path)
+    print("✅ Member receipts cached by a job")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing group check-in...")
+    print("=" * 50)
+    tests = [test_parse_and_validate, test_assign_rooms, test_api_group_checkin, test_form_group_checkin,
+             test_member_receipts_cached]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
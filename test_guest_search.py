@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Test script for the trigram guest search index
+Checks that indexed search finds the same guests as the previous LIKE scan,
+that triggers keep the index in sync, ranking and paging, and reports search
+latency on a large database (SEARCH_BENCH_ROWS=1000000 for the 1M-row run).
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from search_index import ensure_search_index
+from receipt_system import search_tourists, SEARCH_PAGE_SIZE
+from bench_common import make_seeded_database, prepare_app, logged_in_client, percentile
+
+BENCH_ROWS = int(os.environ.get('SEARCH_BENCH_ROWS', '100000'))
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _with_database(rows, test):
+    original_path = database.DATABASE_PATH
+    db_path = make_seeded_database(rows, days=60)
+    conn = sqlite3.connect(db_path)
+    database.ensure_indexes(conn)
+    ensure_search_index(conn)
+    conn.close()
+    database.configure(db_path)
+    try:
+        test(db_path)
+    finally:
+        database.release_thread_connection()
+        database.configure(original_path)
+        _remove_database(db_path)
+
+
+def _like_ids(conn, value, column=None, where='', params=()):
+    """IDs the previous LIKE '%x%' search returned"""
+    columns = [column] if column else ['full_name', 'mobile_number', 'aadhar_number', 'recipe_number']
+    condition = ' OR '.join(f'{name} LIKE ?' for name in columns)
+    rows = conn.execute(f'SELECT id FROM tourists WHERE ({condition}) {where}',
+                        [f'%{value}%'] * len(columns) + list(params))
+    return {row[0] for row in rows}
+
+
+def _search_ids(**kwargs):
+    results, error = search_tourists(**kwargs)
+    assert error is None, error
+    return [tourist['id'] for tourist in results]
+
+
+def test_matches_like_search():
+    """Indexed search returns exactly the guests the LIKE scan found"""
+    def run(db_path):
+        conn = sqlite3.connect(db_path)
+        mobile, aadhar, recipe = conn.execute(
+            'SELECT mobile_number, aadhar_number, recipe_number FROM tourists WHERE id = 77').fetchone()
+        cases = [
+            ({'search_term': 'sharma'}, _like_ids(conn, 'sharma')),
+            ({'search_term': 'Priya Goel'}, _like_ids(conn, 'Priya Goel')),
+            ({'search_term': mobile[3:8]}, _like_ids(conn, mobile[3:8])),
+            ({'aadhar': aadhar[-6:]}, _like_ids(conn, aadhar[-6:], 'aadhar_number')),
+            ({'receipt_number': recipe}, _like_ids(conn, recipe, 'recipe_number')),
+            ({'search_term': 'Ra'}, _like_ids(conn, 'Ra')),
+            ({'name': 'Sita', 'mobile': '98', 'payment_mode': 'Online'},
+             _like_ids(conn, 'Sita', 'full_name', "AND mobile_number LIKE '%98%' AND payment_mode = 'Online'")),
+        ]
+        for kwargs, expected in cases:
+            found = _search_ids(**kwargs)
+            assert len(found) == len(set(found))
+            assert set(found) == expected, (kwargs, len(found), len(expected))
+            assert expected, kwargs
+        conn.close()
+    _with_database(5000, run)
+    print("✅ Indexed search matches the LIKE scan")
+
+
+def test_triggers_keep_index_in_sync():
+    """Inserts, updates and deletes on tourists are reflected in search results"""
+    def run(db_path):
+        conn = database.get_db()
+        cursor = conn.execute('''
+            INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today,
+                                  remaining_amount, check_in_done, room_number, check_in_date)
+            VALUES ('Zorawar Qadri', 'Haridwar', '111122223333', '9000011111', 500, 0, 1, 5, '2025-07-01')
+        ''')
+        tourist_id = cursor.lastrowid
+        conn.commit()
+        assert _search_ids(search_term='zorawar') == [tourist_id]
+        assert _search_ids(mobile='0001111') == [tourist_id]
+
+        conn.execute("UPDATE tourists SET full_name = 'Zubin Qadri', mobile_number = '9000022222' WHERE id = ?",
+                     (tourist_id,))
+        conn.commit()
+        assert _search_ids(search_term='zorawar') == []
+        assert _search_ids(search_term='Zubin') == [tourist_id]
+        assert _search_ids(mobile='0001111') == []
+
+        conn.execute('DELETE FROM tourists WHERE id = ?', (tourist_id,))
+        conn.commit()
+        assert _search_ids(search_term='Qadri') == []
+        # Raises if the index and the tourists table disagree
+        conn.execute("INSERT INTO tourists_fts (tourists_fts, rank) VALUES ('integrity-check', 1)")
+    _with_database(500, run)
+    print("✅ Triggers keep the index in sync")
+
+
+def test_ranking_and_pages():
+    """Stronger matches rank first and pages split the ranked list without overlap"""
+    def run(db_path):
+        conn = database.get_db()
+        for name, aadhar in (('Kashyap Bansal', '555566667777'), ('Kashyap Kashyap', '555566668888')):
+            conn.execute('''
+                INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today,
+                                      remaining_amount, check_in_done, room_number, check_in_date)
+                VALUES (?, 'Haridwar', ?, '9000033333', 500, 0, 1, 7, '2025-07-02')
+            ''', (name, aadhar))
+        conn.commit()
+        ranked = search_tourists(search_term='kashyap')[0]
+        assert [t['full_name'] for t in ranked] == ['Kashyap Kashyap', 'Kashyap Bansal']
+
+        everything = _search_ids(search_term='Sharma')
+        assert len(everything) > 2 * 40
+        pages = [_search_ids(search_term='Sharma', limit=40, offset=offset)
+                 for offset in range(0, len(everything), 40)]
+        assert [tourist_id for page in pages for tourist_id in page] == everything
+        assert all(len(page) == 40 for page in pages[:-1])
+    _with_database(2000, run)
+    print("✅ Relevance ranking and pages")
+
+
+def test_search_route():
+    """The search page filters by each field and pages through results"""
+    db_path = make_seeded_database(1200, days=30)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        with module.app.app_context():
+            module.init_database()
+        response = client.post('/search_tourists', data={'name': 'Sharma'})
+        assert response.status_code == 200, response.status_code
+        html = response.get_data(as_text=True)
+        assert 'Sharma' in html and 'Page 1' in html and 'Next' in html
+
+        response = client.post('/search_tourists', data={'name': 'Sharma', 'page': '2'})
+        assert response.status_code == 200 and 'Previous' in response.get_data(as_text=True)
+
+        conn = sqlite3.connect(db_path)
+        mobile = conn.execute('SELECT mobile_number FROM tourists WHERE id = 9').fetchone()[0]
+        conn.close()
+        response = client.post('/search_tourists', data={'mobile': mobile, 'receipt_issued': 'yes'})
+        assert mobile in response.get_data(as_text=True)
+        response = client.post('/search_tourists', data={'aadhar': 'no-such-guest'})
+        assert 'No Results Found' in response.get_data(as_text=True)
+    finally:
+        _remove_database(db_path)
+    print("✅ Search route filters and pages")
+
+
+def _latencies(search, terms, repeat):
+    samples = []
+    for _ in range(repeat):
+        for kwargs in terms:
+            started = time.perf_counter()
+            search(**kwargs)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def test_search_latency():
+    """Report first-page latency of indexed search against the LIKE scan"""
+    def run(db_path):
+        conn = sqlite3.connect(db_path)
+        rng = random.Random(7)
+        picks = conn.execute('SELECT full_name, mobile_number, aadhar_number, recipe_number FROM tourists '
+                             'WHERE id IN (%s)' % ','.join(str(rng.randint(1, BENCH_ROWS)) for _ in range(20)))
+        terms = []
+        for full_name, mobile, aadhar, recipe in picks:
+            terms += [{'mobile': mobile[2:8]}, {'aadhar': aadhar[4:]}, {'receipt_number': recipe},
+                      {'search_term': full_name}]
+        # Misses scan everything under LIKE
+        terms += [{'search_term': 'Xavier'}, {'mobile': '0000000'}]
+
+        def like_search(**kwargs):
+            (column, value), = [(key, value) for key, value in kwargs.items()]
+            column = {'mobile': 'mobile_number', 'aadhar': 'aadhar_number',
+                      'receipt_number': 'recipe_number', 'search_term': None}[column]
+            columns = [column] if column else ['full_name', 'mobile_number', 'aadhar_number', 'recipe_number']
+            condition = ' OR '.join(f'{name} LIKE ?' for name in columns)
+            conn.execute(f'SELECT id FROM tourists WHERE {condition} ORDER BY created_at DESC LIMIT ?',
+                         [f'%{value}%'] * len(columns) + [SEARCH_PAGE_SIZE + 1]).fetchall()
+
+        def indexed_search(**kwargs):
+            search_tourists(limit=SEARCH_PAGE_SIZE + 1, **kwargs)
+
+        indexed_search(**terms[0])
+        results = {}
+        for label, search in (('LIKE scan', like_search), ('trigram index', indexed_search)):
+            samples = _latencies(search, terms, repeat=3)
+            results[label] = percentile(samples, 50)
+            print(f"   {label}: p50 {percentile(samples, 50):.2f} ms, p99 {percentile(samples, 99):.2f} ms "
+                  f"({len(samples)} searches, {BENCH_ROWS:,} guests)")
+        conn.close()
+        assert results['trigram index'] < results['LIKE scan'], 'index slower than scanning'
+    _with_database(BENCH_ROWS, run)
+    print("✅ Search latency measured")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing guest search index...")
+    print("=" * 50)
+    tests = [test_matches_like_search, test_triggers_keep_index_in_sync, test_ranking_and_pages,
+             test_search_route, test_search_latency]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job queue
+Checks the job lifecycle and failures, that a job whose worker died is queued
+again and then given up, that heartbeats continue while a handler is silent, that concurrent worker processes run every job
+exactly once, that jobs end done or failed while other connections commit,
+that check-in returns before its receipt exists and a worker process renders
+it, and the job workers of the pre-forked server.
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import signal
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+import urllib.request
+import urllib.parse
+import http.cookiejar
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import excel_export
+import jobs
+from jobs import (enqueue_job, claim_job, run_job, run_pending_jobs, job_status, latest_job, job_handler, JobError,
+                  ensure_job_schema, start_job_processes, JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS)
+from artifacts import load_artifact
+from bench_common import (create_empty_database, make_seeded_database, prepare_app, logged_in_client,
+                          synthetic_tourist, TOURIST_COLUMNS)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHECKIN_FORM = {'full_name': 'Queue Guest', 'address': 'Haridwar', 'aadhar_number': '123412341234',
+                'mobile_number': '9812345678', 'amount_paid_today': '1200', 'remaining_amount': '0',
+                'payment_mode': 'Cash', 'check_in_done': 'yes', 'male_count': '1', 'female_count': '0'}
+
+
+@job_handler('test_echo')
+def _echo(params, progress):
+    progress(1, 1)
+    return json.dumps(params).encode(), 'echo.json', 'application/json'
+
+
+@job_handler('test_refuse')
+def _refuse(params, progress):
+    raise JobError('Nothing to do')
+
+
+@job_handler('test_crash')
+def _crash(params, progress):
+    raise ZeroDivisionError('boom')
+
+
+@job_handler('test_stream_crash')
+def _stream_crash(params, progress):
+    # Fails with a SELECT still open on the worker's connection, after another connection committed
+    cursor = database.get_db().execute('SELECT job_id FROM jobs')
+    cursor.fetchone()
+    other = database.open_connection(database.DATABASE_PATH)
+    enqueue_job('test_echo', {}, other)
+    other.close()
+    raise ZeroDivisionError('mid-stream')
+
+
+@job_handler('test_silent')
+def _silent(params, progress):
+    # A long step that never reports progress; returns the heartbeats another connection saw
+    other = database.open_connection(params['path'])
+    beats = []
+    for _ in range(3):
+        beats.append(other.execute("SELECT heartbeat_at FROM jobs WHERE state = 'running'").fetchone()[0])
+        time.sleep(0.3)
+    other.close()
+    return json.dumps(beats).encode(), 'beats.json', 'application/json'
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _temp_db():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.remove(path)
+    create_empty_database(path)
+    conn = database.open_connection(path)
+    ensure_job_schema(conn)
+    conn.commit()
+    return path, conn
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _wait_for(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError('timed out')
+
+
+def test_lifecycle():
+    """Jobs run oldest first, keep their result as an artifact and record failures"""
+    path, conn = _temp_db()
+    try:
+        first = enqueue_job('test_echo', {'n': 1}, conn)
+        refused = enqueue_job('test_refuse', {}, conn)
+        crashed = enqueue_job('test_crash', {}, conn)
+        unknown = enqueue_job('test_missing', {}, conn)
+        assert job_status(first, conn)['state'] == 'queued' and job_status('nope', conn) is None
+
+        job_id, kind, params = claim_job(conn, 'tester')
+        assert (job_id, kind, params) == (first, 'test_echo', {'n': 1})
+        running = job_status(first, conn)
+        assert running['state'] == 'running' and running['worker'] == 'tester' and running['attempts'] == 1
+        assert run_job(conn, job_id, kind, params) == 'done'
+        done = job_status(first, conn)
+        assert (done['progress'], done['total']) == (1, 1) and done['finished_at'] >= done['started_at']
+        path, filename, mimetype = load_artifact(done['artifact_id'], conn)
+        assert (_read(path), filename, mimetype) == (b'{"n": 1}', 'echo.json', 'application/json')
+
+        assert run_pending_jobs(conn) == 3
+        assert job_status(refused, conn)['error'] == 'Nothing to do'
+        assert job_status(crashed, conn)['error'] == 'ZeroDivisionError: boom'
+        assert job_status(unknown, conn)['error'] == "Unknown job kind 'test_missing'"
+        assert {job_status(job, conn)['state'] for job in (refused, crashed, unknown)} == {'failed'}
+        assert claim_job(conn) is None
+
+        older = enqueue_job('test_echo', {}, conn, owner=7)
+        newest = enqueue_job('test_echo', {}, conn, owner=7)
+        enqueue_job('test_refuse', {}, conn, owner=7)
+        enqueue_job('test_echo', {}, conn, owner=8)
+        assert older != newest and latest_job(7, ['test_echo'], conn)['job_id'] == newest
+        assert latest_job(9, ['test_echo'], conn) is None and latest_job(None, ['test_echo'], conn) is None
+        conn.close()
+    finally:
+        _remove_database(path)
+    print("✅ Job lifecycle and failures")
+
+
+def test_stale_job_requeued():
+    """A job whose worker stopped sending heartbeats runs again, up to JOB_MAX_ATTEMPTS times"""
+    path, conn = _temp_db()
+    try:
+        job_id = enqueue_job('test_echo', {}, conn)
+        now = time.time()
+        for attempt in range(1, JOB_MAX_ATTEMPTS + 1):
+            claimed = claim_job(conn, f'worker-{attempt}', now=now)
+            assert claimed and claimed[0] == job_id, attempt
+            assert claim_job(conn, now=now + 1) is None, 'a running job was claimed twice'
+            now += JOB_STALE_SECONDS + 1
+        assert claim_job(conn, now=now) is None
+        job = job_status(job_id, conn)
+        assert job['state'] == 'failed' and job['error'] == 'Worker stopped responding'
+        assert job['attempts'] == JOB_MAX_ATTEMPTS and job['worker'] == f'worker-{JOB_MAX_ATTEMPTS}'
+        conn.close()
+    finally:
+        _remove_database(path)
+    print("✅ Stale jobs are retried, then given up")
+
+
+def test_heartbeat_without_progress():
+    """A running job's heartbeat advances while its handler reports no progress, and stops with the job"""
+    path, conn = _temp_db()
+    original = jobs.JOB_HEARTBEAT_SECONDS
+    jobs.JOB_HEARTBEAT_SECONDS = 0.05
+    try:
+        job_id = enqueue_job('test_silent', {'path': path}, conn)
+        assert run_job(conn, *claim_job(conn)) == 'done'
+        beats = json.loads(_read(load_artifact(job_status(job_id, conn)['artifact_id'], conn)[0]))
+        assert beats[0] < beats[1] < beats[2], beats
+        assert not [thread for thread in threading.enumerate() if thread.name.startswith('job-heartbeat-')]
+        conn.close()
+    finally:
+        jobs.JOB_HEARTBEAT_SECONDS = original
+        _remove_database(path)
+    print("✅ Heartbeats continue between progress reports")
+
+
+def test_failure_after_concurrent_commit():
+    """A handler failing mid-read, after another connection committed, still ends the job as failed"""
+    path, conn = _temp_db()
+    conn.close()
+    database.configure(path)
+    try:
+        conn = database.get_db()
+        job_id = enqueue_job('test_stream_crash', {}, conn)
+        enqueue_job('test_echo', {}, conn)
+        assert run_job(conn, *claim_job(conn)) == 'failed'
+        job = job_status(job_id, conn)
+        assert job['state'] == 'failed' and job['error'] == 'ZeroDivisionError: mid-stream'
+        assert run_pending_jobs(conn) == 2
+    finally:
+        database.release_thread_connection()
+        _remove_database(path)
+    print("✅ A failed handler ends as failed after a concurrent commit")
+
+
+def _drain(path):
+    conn = database.open_connection(path)
+    run_pending_jobs(conn)
+    conn.close()
+
+
+def test_concurrent_workers():
+    """Worker processes sharing the queue run every job exactly once"""
+    path, conn = _temp_db()
+    try:
+        ids = [enqueue_job('test_echo', {'n': number}, conn) for number in range(60)]
+        workers = [multiprocessing.Process(target=_drain, args=(path,)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(120)
+            assert worker.exitcode == 0
+        rows = conn.execute('SELECT state, attempts, worker FROM jobs').fetchall()
+        assert len(rows) == 60 and {(state, attempts) for state, attempts, _ in rows} == {('done', 1)}
+        print(f"   {len({worker for _, _, worker in rows})} of 4 workers ran jobs")
+        payloads = [_read(load_artifact(job_status(job_id, conn)['artifact_id'], conn)[0]) for job_id in ids]
+        assert payloads == [json.dumps({'n': number}).encode() for number in range(60)]
+        conn.close()
+    finally:
+        _remove_database(path)
+    print("✅ Concurrent workers run each job once")
+
+
+def test_checkin_receipt_job():
+    """Check-in returns before its receipt exists; a worker process renders it"""
+    db_path = make_seeded_database(50, days=5)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    processes, stop = [], None
+    try:
+        room = client.get('/api/available_rooms').get_json()['available_rooms'][0]
+        started = time.perf_counter()
+        response = client.post('/checkin', data=dict(CHECKIN_FORM, room_number=str(room)))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        assert response.status_code == 302
+        job_id = latest_job(1, ['checkin_receipt'])['job_id']
+        status = client.get(f'/api/jobs/{job_id}').get_json()
+        assert status['state'] == 'queued' and status['kind'] == 'checkin_receipt' and status['download_url'] is None
+        page = client.get(f'/jobs/{job_id}')
+        assert page.status_code == 200 and b'Check-in receipt' in page.data
+        assert client.get('/api/jobs/unknown').status_code == 404
+
+        processes, stop = start_job_processes(1, db_path)
+        status = _wait_for(lambda: (lambda job: job['state'] == 'done' and job)(
+            client.get(f'/api/jobs/{job_id}').get_json()))
+        receipt = client.get('/download_receipt')
+        assert receipt.status_code == 200 and receipt.data.startswith(b'%PDF')
+        assert client.get(status['download_url']).data == receipt.data
+        print(f"   check-in answered in {elapsed_ms:.1f} ms, receipt ready "
+              f"{status['finished_at'] - status['created_at']:.2f} s after it was queued")
+    finally:
+        if stop is not None:
+            stop.set()
+        for process in processes:
+            process.join(30)
+        _remove_database(db_path)
+    assert all(process.exitcode == 0 for process in processes)
+    print("✅ Check-in receipt rendered by a worker process")
+
+
+def test_export_job_with_concurrent_checkin():
+    """The Excel export job finishes while another connection commits a check-in mid-export"""
+    db_path = make_seeded_database(300, days=5)
+    prepare_app(db_path)
+    other = database.open_connection(db_path)
+    fetch_size, report_progress = excel_export.EXPORT_FETCH_SIZE, jobs.report_progress
+    checked_in = []
+    placeholders = ', '.join('?' * len(TOURIST_COLUMNS.split(',')))
+
+    def check_in_then_report(conn, job_id, done, total):
+        if not checked_in:
+            # The export's SELECT is still open on the worker's connection
+            row = synthetic_tourist(random.Random(7), date.today(), 1, 99)
+            other.execute(f'INSERT INTO tourists ({TOURIST_COLUMNS}) VALUES ({placeholders})', row)
+            other.commit()
+            checked_in.append(done)
+        report_progress(conn, job_id, done, total)
+
+    excel_export.EXPORT_FETCH_SIZE = 50
+    jobs.report_progress = check_in_then_report
+    try:
+        conn = database.get_db()
+        first = (date.today() - timedelta(days=10)).isoformat()
+        job_id = enqueue_job('excel_report', {'from': first, 'to': date.today().isoformat()}, conn)
+        assert run_pending_jobs(conn) == 1
+        job = job_status(job_id, conn)
+        assert job['state'] == 'done', job['error']
+        assert checked_in == [50] and (job['progress'], job['total']) == (300, 300)
+        assert _read(load_artifact(job['artifact_id'], conn)[0]).startswith(b'PK')
+    finally:
+        excel_export.EXPORT_FETCH_SIZE, jobs.report_progress = fetch_size, report_progress
+        other.close()
+        database.release_thread_connection()
+        _remove_database(db_path)
+    print("✅ Export job finishes despite a check-in committed mid-export")
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return set(map(int, children.read().split()))
+    except OSError:
+        return set()
+
+
+def test_prefork_job_workers():
+    """The pre-forked server runs job workers next to the HTTP workers"""
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/task'):
+        print("⚠️ Skipped: needs fork and /proc")
+        return
+    db_path = make_seeded_database(50, days=5)
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix='jobs_test_')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, 'serve.py'), '--host', '127.0.0.1', '--port', str(port),
+         '--workers', '2', '--job-workers', '1', '--db', db_path],
+        cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        _wait_for(lambda: len(_children(process.pid)) == 3)
+        base = f'http://127.0.0.1:{port}'
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        _wait_for(lambda: opener.open(f'{base}/login').status == 200)
+        opener.open(f'{base}/login', urllib.parse.urlencode({'username': 'admin', 'password': 'admin123'}).encode())
+
+        room = json.load(opener.open(f'{base}/api/available_rooms'))['available_rooms'][0]
+        opener.open(f'{base}/checkin', urllib.parse.urlencode(dict(CHECKIN_FORM, room_number=room)).encode())
+        receipt = _wait_for(lambda: (lambda response: response.headers.get_content_type() == 'application/pdf'
+                                     and response.read())(opener.open(f'{base}/download_receipt')))
+        assert receipt.startswith(b'%PDF')
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+        output = process.stdout.read()
+        assert '1 job workers started' in output, output
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        _remove_database(db_path)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("✅ Pre-forked server runs job workers")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing background jobs...")
+    print("=" * 50)
+    tests = [test_lifecycle, test_stale_job_requeued, test_heartbeat_without_progress,
+             test_failure_after_concurrent_commit, test_concurrent_workers,
+             test_checkin_receipt_job, test_export_job_with_concurrent_checkin, test_prefork_job_workers]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
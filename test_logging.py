@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test script for the logging pipeline
+Checks redaction, that check-in and login write leveled lines without
+Aadhaar numbers, password hashes or headers, per-module debug levels,
+that a slow log stream does not slow the logging thread, that a forked
+worker gets its own listener and that a server worker writes out its
+queued lines before it exits.
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import contextlib
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import serve
+import app_logging
+from app_logging import redact, mask_aadhar, parse_levels, setup_logging, flush_logging
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+AADHAR = '987654321098'
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+@contextlib.contextmanager
+def _captured_log(stream=None):
+    """Point the listener at `stream` (a StringIO by default) for the duration"""
+    handler = app_logging._listener.handlers[0]
+    stream = stream or io.StringIO()
+    flush_logging()
+    previous = handler.setStream(stream)
+    try:
+        yield stream
+    finally:
+        flush_logging()
+        handler.setStream(previous)
+
+
+def test_redaction():
+    """Aadhaar numbers keep their last four digits; hashes disappear"""
+    assert mask_aadhar(AADHAR) == 'XXXX-XXXX-1098'
+    assert mask_aadhar('') == 'XXXX'
+    digest = 'a' * 64
+    assert redact(f'aadhar {AADHAR} hash {digest}') == 'aadhar XXXX-XXXX-1098 hash [hash]'
+    assert redact('aadhar 9876 5432 1098, mobile 9876543210') == 'aadhar XXXX-XXXX-1098, mobile 9876543210'
+    assert redact('receipt 001234 at 20251016123456') == 'receipt 001234 at 20251016123456'
+    assert parse_levels('app=debug, werkzeug=WARNING,,bad') == {'app': 'DEBUG', 'werkzeug': 'WARNING'}
+    print("✅ Redaction")
+
+
+def test_requests_log_safely():
+    """Check-in and login write INFO/WARNING lines only, with nothing sensitive in them"""
+    db_path = make_seeded_database(50, days=5)
+    module = prepare_app(db_path)
+    module.room_occupancy.invalidate()
+    client = logged_in_client(module.app)
+    stdout = io.StringIO()
+    try:
+        with _captured_log() as log, contextlib.redirect_stdout(stdout):
+            room = client.get('/api/available_rooms').get_json()['available_rooms'][-1]
+            client.post('/checkin', data={
+                'full_name': 'Log Guest', 'address': 'Haridwar', 'aadhar_number': AADHAR,
+                'mobile_number': '9876543210', 'amount_paid_today': '1000', 'remaining_amount': '0',
+                'check_in_done': 'yes', 'room_number': str(room), 'payment_mode': 'Cash',
+                'male_count': '1', 'female_count': '0',
+                'check_out_date': (date.today() + timedelta(days=2)).isoformat()})
+            client.post('/login', data={'username': 'admin', 'password': 'wrong-password'})
+            client.get('/download_custom_receipt/1')
+        written = log.getvalue() + stdout.getvalue()
+        assert f'Check-in: room {room}' in written, written
+        assert "Failed login for 'admin'" in written, written
+        for secret in (AADHAR, 'wrong-password', 'User-Agent', 'Form data', 'Log Guest'):
+            assert secret not in written, secret
+        assert ' DEBUG ' not in written
+        assert stdout.getvalue() == '', 'request handlers still print'
+    finally:
+        _remove_database(db_path)
+    print("✅ Requests log without sensitive data")
+
+
+def test_module_levels():
+    """A per-module DEBUG level shows that module's detail and nothing else's"""
+    try:
+        with _captured_log() as log:
+            setup_logging(levels={'app': 'DEBUG'})
+            logging.getLogger('app').debug('check-in detail for %s', AADHAR)
+            logging.getLogger('receipt_system').debug('hidden')
+        assert 'DEBUG' in log.getvalue() and 'XXXX-XXXX-1098' in log.getvalue()
+        assert AADHAR not in log.getvalue() and 'hidden' not in log.getvalue()
+    finally:
+        logging.getLogger('app').setLevel(logging.NOTSET)
+    print("✅ Per-module levels")
+
+
+class _SlowStream(io.StringIO):
+    def write(self, text):
+        time.sleep(0.01)
+        return super().write(text)
+
+
+def test_logging_does_not_block():
+    """The logging thread only enqueues; a slow stream is written by the listener"""
+    with _captured_log(_SlowStream()) as log:
+        started = time.perf_counter()
+        for number in range(100):
+            logging.getLogger('app').info('line %d', number)
+        elapsed = (time.perf_counter() - started) * 1000
+    assert log.getvalue().count(' INFO ') == 100
+    print(f"   100 lines in {elapsed:.1f} ms on the logging thread (the stream needs ~1000 ms)")
+    assert elapsed < 200, 'logging waited on the stream'
+    print("✅ Logging does not block")
+
+
+def test_forked_worker_logs():
+    """A forked child restarts the listener and its lines reach the shared stream"""
+    if not hasattr(os, 'fork'):
+        print("⚠️ Skipped: needs fork")
+        return
+    read_end, write_end = os.pipe()
+    with _captured_log(os.fdopen(write_end, 'w')):
+        pid = os.fork()
+        if pid == 0:
+            logging.getLogger('app').warning('from worker %s', AADHAR)
+            flush_logging()
+            os._exit(0)
+        os.waitpid(pid, 0)
+    with os.fdopen(read_end) as output:
+        text = output.read()
+    assert 'from worker XXXX-XXXX-1098' in text and f' {pid} app:' in text, text
+    print("✅ Forked worker logs")
+
+
+def test_worker_exit_flushes_logs():
+    """A pre-forked worker ending with os._exit still writes every queued line"""
+    if not hasattr(os, 'fork'):
+        print("⚠️ Skipped: needs fork")
+        return
+    original_worker = serve._serve_worker
+
+    def logging_worker(app, listener):
+        for number in range(20):
+            logging.getLogger('app').warning('worker line %d', number)
+
+    setup_logging()
+    read_end, write_end = os.pipe()
+    serve._serve_worker = logging_worker
+    try:
+        stream = os.fdopen(write_end, 'w')
+        # Slow writes leave lines queued when the worker body returns
+        stream.write = lambda text, write=stream.write: (time.sleep(0.01), write(text))[1]
+        with _captured_log(stream):
+            pid = serve.PreforkServer(None, None, 1).spawn()
+            os.waitpid(pid, 0)
+        stream.close()
+    finally:
+        serve._serve_worker = original_worker
+    with os.fdopen(read_end) as output:
+        text = output.read()
+    assert text.count('worker line') == 20, text
+    print("✅ Worker exit flushes queued log lines")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing logging pipeline...")
+    print("=" * 50)
+    tests = [test_redaction, test_requests_log_safely, test_module_levels, test_logging_does_not_block,
+             test_forked_worker_logs, test_worker_exit_flushes_logs]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Test script for request metrics
+Checks the Prometheus text format, SQL accounting on timed connections,
+that routes record time, SQL, PDF time and size (streamed bodies too, read
+or not), who may read /metrics, the slow-query log with its plan, and what
+timing a query costs.
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+from metrics import Histogram, Counter, TimedConnection, start_request, finish_request
+from bench_common import make_seeded_database, prepare_app, logged_in_client, percentile
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _reset():
+    for metric in metrics.METRICS:
+        getattr(metric, '_series', getattr(metric, '_values', {})).clear()
+
+
+def _sample(text, name, **labels):
+    """Value of one sample line in Prometheus text"""
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_prometheus_format():
+    """Buckets are cumulative, with +Inf, _count and _sum; label values are escaped"""
+    histogram = Histogram('demo_seconds', 'Demo', ('route',), (0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(('/a "b"',), value)
+    counter = Counter('demo_total', 'Demo')
+    counter.inc()
+    counter.inc()
+    text = '\n'.join(histogram.render() + counter.render())
+    assert '# TYPE demo_seconds histogram' in text and '# TYPE demo_total counter' in text
+    assert 'demo_seconds_bucket{route="/a \\"b\\"",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/a \\"b\\"",le="1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a \\"b\\"",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/a \\"b\\""} 3' in text and 'demo_seconds_sum{route="/a \\"b\\""} 5.550000' in text
+    assert 'demo_total{} 2' in text
+    print("✅ Prometheus text format")
+
+
+def test_sql_accounting():
+    """Statements are counted once and execute plus fetch time is charged to the request"""
+    conn = sqlite3.connect(':memory:', factory=TimedConnection)
+    conn.execute('CREATE TABLE t (n INTEGER)')
+    stats = start_request('/unit', 'GET')
+    conn.executemany('INSERT INTO t VALUES (?)', [(n,) for n in range(1000)])
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone() == (1000,)
+    assert sum(row[0] for row in conn.execute('SELECT n FROM t')) == 499500
+    cursor = conn.cursor()
+    cursor.execute('SELECT n FROM t WHERE n < 10')
+    assert len(cursor.fetchall()) == 10
+    finish_request(stats)
+    conn.close()
+    assert stats.sql_statements == 4, stats.sql_statements
+    assert stats.sql_seconds > 0
+    assert metrics.current_stats() is None
+    print("✅ SQL statements and time are charged to the request")
+
+
+def test_route_metrics():
+    """Every route records wall time, SQL, PDF time and its exact response size"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        _reset()
+        client.get('/')
+        receipt = client.get('/download_custom_receipt/1')
+        profiles = client.get('/tourist_profiles')
+        profiles_size = len(profiles.get_data())
+        batch = client.get('/receipts/batch?ids=1,2,3&format=pdf')
+        batch_size = len(batch.get_data())
+        # A streamed body never read (HEAD) is recorded when the response closes
+        client.head('/receipts/batch?ids=1,2&format=pdf').close()
+        client.get('/no/such/page')
+        text = client.get('/metrics').get_data(as_text=True)
+
+        assert _sample(text, 'hotel_request_duration_seconds_count', route='/', method='GET', status='200') == 1
+        assert _sample(text, 'hotel_request_duration_seconds_count', route='unmatched', method='GET',
+                       status='404') == 1
+        assert _sample(text, 'hotel_request_sql_statements_sum', route='/') >= 2
+        assert _sample(text, 'hotel_request_sql_seconds_sum', route='/') > 0
+        receipt_route = '/download_custom_receipt/<int:tourist_id>'
+        assert receipt.status_code == 200 and _sample(text, 'hotel_request_pdf_seconds_count',
+                                                      route=receipt_route) == 1
+        assert _sample(text, 'hotel_response_size_bytes_sum', route=receipt_route) == len(receipt.get_data())
+        # Streamed bodies: one with the request context kept open, one plain generator
+        assert _sample(text, 'hotel_response_size_bytes_sum', route='/tourist_profiles') == profiles_size
+        assert _sample(text, 'hotel_response_size_bytes_sum', route='/receipts/batch') == batch_size
+        assert _sample(text, 'hotel_request_pdf_seconds_count', route='/receipts/batch') == 1
+        assert _sample(text, 'hotel_request_duration_seconds_count', route='/receipts/batch', method='HEAD',
+                       status='200') == 1
+        assert _sample(text, 'hotel_db_pool_connections', state='max') > 0
+    finally:
+        _remove_database(db_path)
+    print("✅ Routes record time, SQL, PDF time and size")
+
+
+def test_metrics_access():
+    """/metrics is refused to guests and other users, allowed with the scrape token"""
+    db_path = make_seeded_database(10, days=2)
+    module = prepare_app(db_path)
+    try:
+        assert module.app.test_client().get('/metrics').status_code == 401
+        clerk = module.app.test_client()
+        with clerk.session_transaction() as sess:
+            sess['user_id'], sess['username'] = 2, 'clerk'
+        assert clerk.get('/metrics').status_code == 401
+
+        metrics.METRICS_TOKEN = 'scrape-secret'
+        anonymous = module.app.test_client()
+        assert anonymous.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        response = anonymous.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        assert response.status_code == 200 and response.mimetype == 'text/plain'
+    finally:
+        metrics.METRICS_TOKEN = None
+        _remove_database(db_path)
+    print("✅ Metrics access control")
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_slow_query_log():
+    """Statements over the threshold are logged once with their query plan; fast ones are not"""
+    db_path = make_seeded_database(20000, days=100)
+    conn = sqlite3.connect(db_path, factory=TimedConnection)
+    handler = _ListHandler()
+    metrics.slow_query_logger.addHandler(handler)
+    metrics.SLOW_QUERY_MS = 5
+    try:
+        _reset()
+        stats = start_request('/report', 'GET')
+        conn.execute('SELECT full_name FROM tourists WHERE id = ?', (5,)).fetchone()
+        for _ in conn.execute("SELECT * FROM tourists WHERE full_name LIKE '%a%' ORDER BY mobile_number"):
+            pass
+        finish_request(stats)
+        assert len(handler.messages) == 1, handler.messages
+        message = handler.messages[0]
+        assert '(GET /report)' in message and 'ORDER BY mobile_number' in message
+        assert 'SCAN tourists' in message and 'TEMP B-TREE' in message, message
+        assert metrics.SLOW_QUERIES.render()[-1] == 'hotel_slow_queries_total{} 1'
+    finally:
+        metrics.SLOW_QUERY_MS = None
+        metrics.slow_query_logger.removeHandler(handler)
+        conn.close()
+        _remove_database(db_path)
+    print("✅ Slow-query log with plan")
+
+
+def test_instrumentation_cost():
+    """Timing adds microseconds per statement and nothing measurable per iterated row"""
+    db_path = make_seeded_database(20000, days=100)
+    try:
+        results = {}
+        for factory in (sqlite3.Connection, TimedConnection):
+            conn = sqlite3.connect(db_path, factory=factory)
+            point, scan = [], []
+            for _ in range(5):
+                started = time.perf_counter()
+                for tourist_id in range(1, 501):
+                    conn.execute('SELECT full_name FROM tourists WHERE id = ?', (tourist_id,)).fetchone()
+                point.append((time.perf_counter() - started) * 1e6 / 500)
+                started = time.perf_counter()
+                for _ in conn.execute('SELECT id, full_name, check_in_date FROM tourists'):
+                    pass
+                scan.append((time.perf_counter() - started) * 1000)
+            conn.close()
+            results[factory.__name__] = (percentile(point, 50), percentile(scan, 50))
+    finally:
+        _remove_database(db_path)
+    plain, timed = results['Connection'], results['TimedConnection']
+    print(f"   point query {plain[0]:.1f} -> {timed[0]:.1f} µs; 20k-row iteration {plain[1]:.1f} -> {timed[1]:.1f} ms")
+    assert timed[0] - plain[0] < 20, 'timing a statement costs too much'
+    assert timed[1] < plain[1] * 1.3, 'timed iteration much slower than plain'
+    print("✅ Instrumentation is cheap")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing request metrics...")
+    print("=" * 50)
+    tests = [test_prometheus_format, test_sql_accounting, test_route_metrics, test_metrics_access,
+             test_slow_query_log, test_instrumentation_cost]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script for request profiling
+Checks who may ask for a profile, that cProfile and stack-sampled requests
+land in the ring with their status and SQL time, that the ring is bounded
+per route and overall, the admin pages, and what an unprofiled request costs.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import profiling
+from profiling import requested_kind, save_profile, list_profiles, profile_file, StackSampler
+from bench_common import make_seeded_database, prepare_app, logged_in_client, percentile
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _use_profile_dir():
+    directory = tempfile.mkdtemp(prefix='profiles_')
+    profiling.PROFILE_DIR = directory
+    return directory
+
+
+def test_who_may_ask():
+    """Only the admin's header or parameter turns profiling on; sampling picks 1 in N"""
+    admin, clerk = {'username': 'admin'}, {'username': 'clerk'}
+    assert requested_kind({'X-Profile': 'stacks'}, {}, admin) == 'stacks'
+    assert requested_kind({}, {'_profile': '1'}, admin) == 'cprofile'
+    assert requested_kind({'X-Profile': 'cprofile'}, {}, clerk) is None
+    assert requested_kind({}, {}, admin) is None
+    try:
+        profiling.PROFILE_SAMPLE_RATE = 10
+        picked = sum(requested_kind({}, {}, {}) is not None for _ in range(5000))
+        assert 350 < picked < 650, picked
+        profiling.PROFILE_SAMPLE_RATE = 1
+        assert requested_kind({}, {}, {}) == 'stacks'
+    finally:
+        profiling.PROFILE_SAMPLE_RATE = 0
+    print("✅ Who may ask for a profile")
+
+
+def test_stack_sampler():
+    """The sampler records the profiled thread's stacks in collapsed form"""
+    def busy_loop():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+
+    sampler = StackSampler(interval=0.002)
+    thread_id = threading.get_ident()
+    sampler.add(thread_id)
+    busy_loop()
+    samples = sampler.remove(thread_id)
+    assert sum(samples.values()) >= 10, samples
+    assert any(stack.endswith('test_profiling.py:busy_loop') for stack in samples), list(samples)
+    time.sleep(0.02)
+    assert sampler._thread is None, 'sampling thread still running with nothing to sample'
+    print("✅ Stack sampler")
+
+
+def test_ring_is_bounded():
+    """Oldest profiles go first, per route and overall"""
+    directory = _use_profile_dir()
+    try:
+        profiling.PROFILES_PER_ROUTE, profiling.PROFILE_RING_SIZE = 3, 5
+        started = time.time()
+        for number in range(10):
+            route = '/a' if number % 2 else '/b/<int:id>'
+            meta = {'route': route, 'method': 'GET', 'path': route, 'status': 200, 'kind': 'stacks',
+                    'started_at': started + number, 'duration_ms': float(number), 'pid': 1}
+            save_profile(meta, Counter({'app.py:index': number + 1}))
+        kept = list_profiles()
+        assert len(kept) == 5 and len(os.listdir(directory)) == 10, os.listdir(directory)
+        assert [entry['duration_ms'] for entry in kept] == [9.0, 8.0, 7.0, 6.0, 5.0]
+        assert Counter(entry['route'] for entry in kept) == {'/a': 3, '/b/<int:id>': 2}
+        path, meta = profile_file(kept[0]['name'])
+        assert open(path).read() == 'app.py:index 10\n' and meta['samples'] == 10
+        assert profile_file('../../etc/passwd') is None and profile_file('1-1-1-missing') is None
+
+        # Same millisecond, process and route: both are kept under their own names
+        shutil.rmtree(directory)
+        meta = {'route': '/a', 'method': 'GET', 'path': '/a', 'status': 200, 'kind': 'stacks',
+                'started_at': started, 'duration_ms': 1.0, 'pid': 1}
+        names = {save_profile(dict(meta), Counter({'app.py:index': count})) for count in (1, 2)}
+        assert len(names) == 2 and len(list_profiles()) == 2, names
+    finally:
+        profiling.PROFILES_PER_ROUTE, profiling.PROFILE_RING_SIZE = 20, 200
+        shutil.rmtree(directory)
+    print("✅ Ring is bounded")
+
+
+def test_profiled_requests():
+    """Profiled requests are saved with status and SQL time and shown on the admin pages"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    directory = _use_profile_dir()
+    try:
+        assert client.get('/', headers={'X-Profile': 'cprofile'}).status_code == 200
+        streamed = client.get('/tourist_profiles?_profile=stacks')
+        assert streamed.status_code == 200 and streamed.get_data()
+        assert client.get('/no/such/page', headers={'X-Profile': 'cprofile'}).status_code == 404
+        client.get('/')
+        guest = module.app.test_client()
+        guest.get('/login', headers={'X-Profile': 'cprofile'})
+
+        kept = {entry['route']: entry for entry in list_profiles()}
+        assert set(kept) == {'/', '/tourist_profiles', 'unmatched'}, set(kept)
+        assert kept['/']['status'] == 200 and kept['/']['sql_statements'] >= 2 and kept['/']['kind'] == 'cprofile'
+        assert kept['unmatched']['status'] == 404
+        assert kept['/tourist_profiles']['kind'] == 'stacks'
+
+        page = client.get('/admin/profiles')
+        assert page.status_code == 200 and b'/tourist_profiles' in page.data
+        detail = client.get(f"/admin/profiles/{kept['/']['name']}")
+        assert detail.status_code == 200 and b'cumulative' in detail.data and b'index' in detail.data
+        raw = client.get(f"/admin/profiles/{kept['/']['name']}?download=1")
+        assert raw.status_code == 200 and raw.headers['Content-Disposition'].startswith('attachment')
+        assert client.get('/admin/profiles/not-a-profile').status_code == 404
+        assert guest.get('/admin/profiles').status_code == 401
+        assert guest.get(f"/admin/profiles/{kept['/']['name']}").status_code == 401
+    finally:
+        shutil.rmtree(directory)
+        _remove_database(db_path)
+    print("✅ Profiled requests and admin pages")
+
+
+def test_unprofiled_cost():
+    """Requests nobody asked to profile pay only a header lookup"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    try:
+        with module.app.test_request_context('/login'):
+            from flask import request, session
+            timings = []
+            for _ in range(5):
+                started = time.perf_counter()
+                for _ in range(2000):
+                    requested_kind(request.headers, request.args, session)
+                timings.append((time.perf_counter() - started) * 1e6 / 2000)
+    finally:
+        _remove_database(db_path)
+    cost = percentile(timings, 50)
+    print(f"   {cost:.2f} µs per unprofiled request")
+    assert cost < 20, 'deciding not to profile is too slow'
+    print("✅ Unprofiled requests are cheap")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing request profiling...")
+    print("=" * 50)
+    tests = [test_who_may_ask, test_stack_sampler, test_ring_is_bounded, test_profiled_requests,
+             test_unprofiled_cost]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
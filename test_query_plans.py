@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression guard for the tourists table
+Drives every route and receipt_system helper on a small database while
+recording each SQL statement, then runs EXPLAIN QUERY PLAN for all of them
+on a seeded 500k-row database and fails if any walks the whole tourists
+table or one of its indexes, unless it is a listed exception.
+"""
+
+import os
+import re
+import sys
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from occupancy import ensure_occupancy_schema
+from receipt_cache import ensure_receipt_cache_schema
+from artifacts import ensure_artifact_schema
+from search_index import ensure_search_index
+from daily_stats import ensure_daily_stats_schema
+from jobs import ensure_job_schema, run_pending_jobs
+from sessions import ensure_session_schema
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+# Rows in the database the plans are checked against (override for quick runs)
+PLAN_ROWS = int(os.environ.get('QUERY_PLAN_ROWS', 500000))
+
+# Statements that are allowed to scan, by name: (pattern over the normalized SQL, reason)
+KNOWN_FULL_SCANS = {
+    'profile_counts': (
+        r'^SELECT COUNT\(\*\), COALESCE\(SUM\(check_in_done = \?\), \?\) FROM tourists$',
+        'Profile page header totals: one pass over the narrow covering index idx_tourists_checkin_room'),
+    'search_like_fallback': (
+        r'^SELECT tourists\.id, .* FROM tourists WHERE \?=\? AND .*tourists\.\w+ LIKE \?',
+        'search_tourists terms shorter than a trigram: LIKE %term% cannot use an index'),
+    'search_unpaged': (
+        r'^SELECT tourists\.id, .* FROM tourists WHERE \?=\?(?:(?! LIMIT ).)* ORDER BY tourists\.created_at DESC$',
+        'search_tourists called without a limit returns every match, newest first'),
+}
+
+# A plan step reading the tourists table, or one of its indexes, from end to end
+TOURIST_SCAN = re.compile(r'^SCAN tourists\b(?P<index> USING (?:COVERING )?INDEX)?')
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals with ? so statements can be deduplicated"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def full_scan(sql, plan):
+    """True if the plan walks the tourists table or an index of it with nothing to stop it early.
+
+    The only bounded scan is an index read in ORDER BY order, without a filter, that stops at a LIMIT.
+    """
+    bounded = ' ORDER BY ' in sql and ' LIMIT ' in sql and not re.search(r'\bWHERE\b', sql)
+    for detail in plan:
+        scan = TOURIST_SCAN.match(detail)
+        if scan and not (bounded and scan.group('index')):
+            return True
+    return False
+
+
+def known_full_scan(key):
+    """Name of the KNOWN_FULL_SCANS entry matching a normalized statement, or None"""
+    for name, (pattern, _) in KNOWN_FULL_SCANS.items():
+        if re.search(pattern, key):
+            return name
+    return None
+
+
+def _drive_app(module):
+    """Exercise every route and helper that touches the database"""
+    app = module.app
+    client = logged_in_client(app)
+
+    for path in ['/', '/checkin', '/simple_checkin', '/api/room_status', '/api/available_rooms',
+                 '/tourist_profiles', '/tourist_profile/1', '/tourist_profile/1/edit',
+                 '/api/tourist_details/1', '/download_custom_receipt/1', '/download_receipt/1',
+                 '/export_excel', '/search_tourists', '/test_db',
+                 '/receipts/batch?from=2025-07-01&to=2025-07-07', '/receipts/batch?ids=1,2,3&format=pdf',
+                 '/api/available_rooms?from=2025-07-01&to=2025-07-08', '/api/calendar', '/api/calendar?month=2025',
+                 '/api/daily_stats', '/api/daily_stats?from=2025-01-01&to=2025-12-31']:
+        client.get(path)
+    cursor = client.get('/api/tourist_profiles?limit=5').get_json()['next_cursor']
+    client.get(f'/tourist_profiles?cursor={cursor}')
+
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    room = client.get('/api/available_rooms').get_json()['available_rooms'][0]
+    client.post('/checkin', data={
+        'full_name': 'Plan Guard', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+        'mobile_number': '9876543210', 'amount_paid_today': '1000', 'remaining_amount': '0',
+        'check_in_done': 'yes', 'room_number': str(room), 'payment_mode': 'Cash',
+        'male_count': '1', 'female_count': '0'})
+    client.post('/tourist_profile/2/edit', data={
+        'full_name': 'Plan Guard', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+        'mobile_number': '9876543210', 'amount_paid_today': '900', 'remaining_amount': '100',
+        'payment_mode': 'Online'})
+    client.post('/generate_receipt/3')
+    client.post('/search_tourists', data={'name': 'Sharma'})
+    client.post('/search_tourists', data={'mobile': '98', 'receipt_issued': 'yes', 'page': '2'})
+    client.post('/tourist_profile/4/delete')
+    # Receipts and the Excel report queued above, rendered the way a job worker does
+    run_pending_jobs()
+
+    import receipt_system
+    with app.app_context():
+        module.get_next_available_room()
+        module.generate_receipt_number()
+        receipt_system.get_next_receipt_number()
+        for kwargs in ({}, {'search_term': 'Ram'}, {'search_term': 'Ra', 'limit': 50},
+                       {'mobile': '98765', 'name': 'Sharma', 'limit': 50, 'offset': 50},
+                       {'receipt_filter': 'yes'}, {'receipt_filter': 'no'},
+                       {'date_from': '2025-01-01', 'date_to': '2025-01-31'}, {'payment_mode': 'Online'}):
+            receipt_system.search_tourists(**kwargs)
+
+
+def collect_statements(rows=2000):
+    """Return {normalized_sql: example_sql} for every statement the app runs"""
+    statements = {}
+    original_open = database.open_connection
+    original_path = database.DATABASE_PATH
+
+    def tracing_open(database_path=None, tuned=True):
+        conn = original_open(database_path, tuned)
+        conn.set_trace_callback(lambda sql: statements.setdefault(normalize_sql(sql), sql))
+        return conn
+
+    db_path = make_seeded_database(rows, days=60)
+    database.open_connection = tracing_open
+    try:
+        module = prepare_app(db_path)
+        with module.app.app_context():
+            module.init_database()
+        _drive_app(module)
+    finally:
+        database.open_connection = original_open
+        database.configure(original_path)
+        _remove_database(db_path)
+
+    return {key: sql for key, sql in statements.items()
+            if re.match(r'^(SELECT|UPDATE|DELETE|WITH)\b', key, re.IGNORECASE)}
+
+
+def check_plans(statements, db_path):
+    """Return ([(sql, plan) pairs that fully scan the tourists table], names of the known scans seen)"""
+    conn = sqlite3.connect(db_path)
+    database.ensure_indexes(conn)
+    ensure_occupancy_schema(conn)
+    ensure_receipt_cache_schema(conn)
+    ensure_artifact_schema(conn)
+    ensure_search_index(conn)
+    ensure_daily_stats_schema(conn)
+    ensure_job_schema(conn)
+    ensure_session_schema(conn)
+    offenders = []
+    known = set()
+    for key, sql in sorted(statements.items()):
+        plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+        if not full_scan(key, plan):
+            continue
+        name = known_full_scan(key)
+        if name:
+            known.add(name)
+        else:
+            offenders.append((key, plan))
+    conn.close()
+    return offenders, known
+
+
+def _remove_database(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def test_no_full_table_scans():
+    """Every tourists query uses an index on a large database"""
+    statements = collect_statements()
+    assert len(statements) > 15, f'only captured {len(statements)} statements'
+    print(f"📋 Captured {len(statements)} distinct statements")
+
+    db_path = make_seeded_database(PLAN_ROWS)
+    try:
+        offenders, known = check_plans(statements, db_path)
+    finally:
+        _remove_database(db_path)
+
+    for name in sorted(known):
+        print(f"⚠️ Known scan {name}: {KNOWN_FULL_SCANS[name][1]}")
+    # An exception that no longer scans (or is no longer run) should leave the list
+    assert known == set(KNOWN_FULL_SCANS), f'stale KNOWN_FULL_SCANS entries: {set(KNOWN_FULL_SCANS) - known}'
+
+    for sql, plan in offenders:
+        print(f"❌ Full scan: {sql}")
+        for detail in plan:
+            print(f"      {detail}")
+    assert not offenders, f'{len(offenders)} statement(s) scan the tourists table'
+    print(f"✅ No full table scans on {PLAN_ROWS:,} rows")
+
+
+def test_scan_detection():
+    """Index walks count as full scans unless an unfiltered ORDER BY ... LIMIT stops them"""
+    covering = ['SCAN tourists USING COVERING INDEX idx_tourists_checkin_room']
+    assert full_scan('SELECT COUNT(*) FROM tourists', covering)
+    assert full_scan('SELECT * FROM tourists', ['SCAN tourists'])
+    ordered = ['SCAN tourists USING INDEX idx_tourists_created_at']
+    assert not full_scan('SELECT * FROM tourists ORDER BY created_at DESC LIMIT ?', ordered)
+    assert full_scan('SELECT * FROM tourists ORDER BY created_at DESC', ordered)
+    assert full_scan('SELECT * FROM tourists WHERE full_name LIKE ? ORDER BY created_at DESC LIMIT ?', ordered)
+    sorted_scan = ['SCAN tourists', 'USE TEMP B-TREE FOR ORDER BY']
+    assert full_scan('SELECT * FROM tourists ORDER BY full_name LIMIT ?', sorted_scan)
+    assert not full_scan('SELECT * FROM tourists_fts', ['SCAN tourists_fts VIRTUAL TABLE INDEX 0:M4'])
+    lookup = ['SEARCH tourists USING INTEGER PRIMARY KEY (rowid=?)']
+    assert not full_scan('SELECT * FROM tourists WHERE id = ?', lookup)
+    print("✅ Scan detection")
+
+
+def test_managed_indexes_are_reconciled():
+    """ensure_indexes creates the managed set and drops retired managed indexes"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE tourists (id INTEGER PRIMARY KEY, check_in_date DATE, check_in_done BOOLEAN, '
+                 'room_number INTEGER, recipe_number TEXT, created_at TIMESTAMP, '
+                 'aadhar_number TEXT, mobile_number TEXT)')
+    conn.execute('CREATE INDEX idx_tourists_retired ON tourists (room_number)')
+    created = database.ensure_indexes(conn)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert set(created) == set(database.TOURIST_INDEXES)
+    assert names == set(database.TOURIST_INDEXES)
+    assert database.ensure_indexes(conn) == []
+    print("✅ Managed index set reconciled")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing query plans...")
+    print("=" * 50)
+    tests = [test_scan_detection, test_managed_indexes_are_reconciled, test_no_full_table_scans]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Multi-process stress test for the receipt number allocator
+Several worker processes allocate receipt numbers concurrently against one
+database; the test fails on any duplicate, on gaps in gap-free mode, or if
+the combined rate drops below 1,000 allocations per second.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKERS = 4
+ALLOCATIONS_PER_WORKER = 500
+MIN_RATE = 1000  # allocations per second across all workers
+
+
+def _temp_db():
+    from bench_common import create_empty_database
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.remove(path)
+    create_empty_database(path)
+    return path
+
+
+def _worker(path, block_size, count, start_event, results):
+    import database
+    import receipt_system
+
+    database.configure(path)
+    receipt_system.RECEIPT_BLOCK_SIZE = block_size
+    start_event.wait()
+    numbers = [receipt_system.get_next_receipt_number() for _ in range(count)]
+    results.put(numbers)
+
+
+def run_stress(block_size, workers=WORKERS, count=ALLOCATIONS_PER_WORKER):
+    """Allocate from several processes at once; return (per-worker lists, seconds, start value)"""
+    import sqlite3
+    path = _temp_db()
+    conn = sqlite3.connect(path)
+    start_value = conn.execute('SELECT current_number FROM receipt_counter WHERE id = 1').fetchone()[0]
+    conn.close()
+
+    start_event = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_worker, args=(path, block_size, count, start_event, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    started = time.perf_counter()
+    start_event.set()
+    collected = [results.get(timeout=120) for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return collected, elapsed, start_value
+
+
+def _check(collected, elapsed, label):
+    numbers = [n for worker_numbers in collected for n in worker_numbers]
+    assert None not in numbers, 'an allocation failed'
+    values = [int(n) for n in numbers]
+    assert len(values) == len(set(values)), f'{len(values) - len(set(values))} duplicate receipt numbers'
+    for worker_numbers in collected:
+        worker_values = [int(n) for n in worker_numbers]
+        assert worker_values == sorted(worker_values), 'numbers not monotonic within a worker'
+        assert len(set(worker_values)) == len(worker_values)
+    rate = len(values) / elapsed
+    print(f"   {label}: {len(values)} numbers in {elapsed:.2f}s ({rate:,.0f}/s), no duplicates")
+    assert rate >= MIN_RATE, f'only {rate:.0f} allocations/s'
+    return values
+
+
+def test_gap_free_allocation():
+    """Direct mode: one atomic counter update per number, no gaps, no duplicates"""
+    collected, elapsed, start_value = run_stress(block_size=1)
+    values = _check(collected, elapsed, 'gap-free')
+    assert sorted(values) == list(range(start_value + 1, start_value + 1 + len(values))), 'gap in sequence'
+    print("✅ Gap-free allocation under concurrency")
+
+
+def test_block_reservation():
+    """Block mode: each worker reserves ranges of numbers, still no duplicates"""
+    collected, elapsed, _ = run_stress(block_size=50)
+    _check(collected, elapsed, 'blocks of 50')
+    print("✅ Block reservation under concurrency")
+
+
+def test_rollback_leaves_no_gap():
+    """A number allocated inside a rolled-back transaction is handed out again"""
+    import database
+    import receipt_system
+
+    original_path = database.DATABASE_PATH
+    path = _temp_db()
+    database.configure(path)
+    try:
+        conn = database.get_db()
+        first = receipt_system.allocate_receipt_number(conn)
+        conn.rollback()
+        again = receipt_system.get_next_receipt_number()
+        assert first == again, f'{first} was lost after rollback (got {again})'
+    finally:
+        database.configure(original_path)
+        os.remove(path)
+    print("✅ Rolled-back allocation reused")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Stress testing receipt number allocator...")
+    print("=" * 50)
+    tests = [test_rollback_leaves_no_gap, test_gap_free_allocation, test_block_reservation]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
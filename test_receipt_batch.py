@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk receipt rendering (process pool, ZIP and merged PDF output)
+"""
+
+import io
+import os
+import sys
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import receipt_batch
+from receipt_system import get_receipt_batch_data
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+from test_receipt_template import _check_xref
+
+NOW = datetime(2025, 7, 4, 10, 30)
+BATCH_ROWS = int(os.environ.get('RECEIPT_BATCH_ROWS', '2000'))
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _with_database(rows, test):
+    original_path = database.DATABASE_PATH
+    db_path = make_seeded_database(rows, days=30)
+    database.configure(db_path)
+    try:
+        test(db_path)
+    finally:
+        database.release_thread_connection()
+        database.configure(original_path)
+        _remove_database(db_path)
+
+
+def test_selection():
+    """Date range and ID selection return checked-in guests in check-in order"""
+    def run(db_path):
+        today = datetime.now().date()
+        week = get_receipt_batch_data((today - timedelta(days=6)).isoformat(), today.isoformat())
+        assert len(week) == 7 * 10, len(week)
+        assert [t['check_in_date'] for t in week] == sorted(t['check_in_date'] for t in week)
+
+        by_ids = get_receipt_batch_data(tourist_ids=[5, 3, 3, 999999])
+        assert sorted(t['id'] for t in by_ids) == [3, 5]
+        order = [(t['check_in_date'], t['id']) for t in by_ids]
+        assert order == sorted(order)
+        assert all(t['recipe_number'] for t in by_ids)
+    _with_database(300, run)
+    print("✅ Batch selection by dates and IDs")
+
+
+def test_pool_matches_serial():
+    """Pages rendered on the process pool equal the in-process ones, in order"""
+    def run(db_path):
+        tourists = get_receipt_batch_data(tourist_ids=range(1, 301))
+        serial = list(receipt_batch.render_pages(tourists, workers=1, now=NOW))
+        pooled = list(receipt_batch.render_pages(tourists, workers=2, now=NOW))
+        assert [page for _, page in serial] == [page for _, page in pooled]
+        assert [t['id'] for t, _ in pooled] == [t['id'] for t in tourists]
+    _with_database(300, run)
+    print("✅ Process pool output matches serial rendering")
+
+
+def test_zip_and_merged_pdf():
+    """ZIP holds one valid PDF per receipt; the merged PDF has one page per receipt"""
+    def run(db_path):
+        tourists = get_receipt_batch_data(tourist_ids=range(1, 41))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(receipt_batch.stream_batch(tourists, 'zip', now=NOW))))
+        names = archive.namelist()
+        assert len(names) == len(tourists) == len(set(names))
+        for name in names:
+            _check_xref(archive.read(name))
+
+        merged = b''.join(receipt_batch.stream_batch(tourists, 'pdf', now=NOW))
+        _check_xref(merged)
+        assert merged.count(b'/Type /Page ') == len(tourists)
+        assert b'/Count %d' % len(tourists) in merged
+    _with_database(40, run)
+    print("✅ ZIP and merged PDF output valid")
+
+
+def test_batch_route():
+    """The batch endpoint streams a ZIP or PDF for a date range"""
+    db_path = make_seeded_database(100, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        today = datetime.now().date()
+        week_ago = (today - timedelta(days=6)).isoformat()
+        response = client.get(f'/receipts/batch?from={week_ago}&to={today.isoformat()}&format=zip')
+        assert response.status_code == 200 and response.mimetype == 'application/zip'
+        assert len(zipfile.ZipFile(io.BytesIO(response.data)).namelist()) == 70
+        assert response.headers['X-Receipt-Count'] == '70'
+
+        response = client.get('/receipts/batch?ids=1,2,3&format=pdf')
+        assert response.status_code == 200 and response.data.count(b'/Type /Page ') == 3
+
+        assert client.get('/receipts/batch?format=zip').status_code == 400
+        assert client.get('/receipts/batch?ids=1&format=doc').status_code == 400
+    finally:
+        _remove_database(db_path)
+    print("✅ Batch endpoint streams ZIP and PDF")
+
+
+def test_batch_throughput():
+    """Report receipts/s for a festival-sized batch, in-process and on the pool"""
+    def run(db_path):
+        tourists = get_receipt_batch_data(tourist_ids=range(1, BATCH_ROWS + 1))
+        for label, workers in (('in-process', 1), (f'pool, {os.cpu_count()} cores', None)):
+            started = time.perf_counter()
+            size = sum(len(chunk) for chunk in receipt_batch.stream_batch(tourists, 'zip', workers, NOW))
+            elapsed = time.perf_counter() - started
+            print(f"   {label}: {len(tourists)} receipts in {elapsed:.2f}s "
+                  f"({len(tourists) / elapsed:,.0f} receipts/s, {size / 1024:.0f} KB)")
+    _with_database(BATCH_ROWS, run)
+    print("✅ Batch throughput measured")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing bulk receipt rendering...")
+    print("=" * 50)
+    tests = [test_selection, test_pool_matches_serial, test_zip_and_merged_pdf, test_batch_route,
+             test_batch_throughput]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
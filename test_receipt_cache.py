@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed receipt PDF cache
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import receipt_cache
+import receipt_system
+import receipt_template
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+SAMPLE = {
+    'id': 7,
+    'full_name': 'Ramesh Aggarwal',
+    'father_spouse_name': 'Suresh Aggarwal',
+    'address': '12, Main Road, Meerut',
+    'mobile_number': '9876543210',
+    'aadhar_number': '123456789012',
+    'room_number': 18,
+    'extra_bed': False,
+    'check_in_date': '2025-07-04',
+    'check_out_date': '2025-07-05',
+    'amount_paid_today': 1500.0,
+    'remaining_amount': 0.0,
+    'payment_mode': 'Cash',
+    'created_at': '2025-07-04 05:00:00',
+}
+
+
+def _memory_conn():
+    conn = sqlite3.connect(':memory:')
+    receipt_cache.ensure_receipt_cache_schema(conn)
+    return conn
+
+
+def test_key_tracks_printed_fields():
+    """The key changes with printed fields and the receipt number, not with other data"""
+    key = receipt_cache.receipt_cache_key(SAMPLE, '001005')
+    assert key == receipt_cache.receipt_cache_key(dict(SAMPLE, comments='late arrival'), '001005')
+    assert key != receipt_cache.receipt_cache_key(dict(SAMPLE, full_name='Ramesh Goel'), '001005')
+    assert key != receipt_cache.receipt_cache_key(SAMPLE, '001006')
+    assert key != receipt_cache.receipt_cache_key(dict(SAMPLE, created_at='2025-07-05 05:00:00'), '001005')
+    print("✅ Cache key follows printed fields")
+
+
+def test_stamp_from_record():
+    """DATE & TIME and "Generated on" come from the record, so a cached body is never stale"""
+    stamp = receipt_template.receipt_time(SAMPLE)
+    # created_at is stored in UTC and printed in local time
+    assert stamp == datetime(2025, 7, 4, 5, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    texts = [field[5] for field in receipt_template.receipt_fields(SAMPLE, '001005')]
+    assert f"Generated on: {stamp.strftime('%d/%m/%Y %H:%M:%S')}" in texts, texts
+    assert stamp.strftime('%I:%M %p') in texts
+    assert receipt_template.render_receipt_pdf(SAMPLE, '001005') == receipt_template.render_receipt_pdf(SAMPLE, '001005')
+
+    legacy = dict(SAMPLE, created_at=None)
+    assert receipt_template.receipt_time(legacy).isoformat() == '2025-07-04T00:00:00'
+    assert receipt_template.receipt_time(dict(legacy, check_in_date='')) is None
+    print("✅ Receipt stamped from the guest record")
+
+
+def test_lru_size_bound():
+    """Least recently used entries are evicted beyond the size limit"""
+    conn = _memory_conn()
+    original = receipt_cache.RECEIPT_CACHE_MAX_BYTES
+    receipt_cache.RECEIPT_CACHE_MAX_BYTES = 250
+    try:
+        for i in range(3):
+            receipt_cache.store_receipt(f'key{i}', f'00100{i}', i, b'x' * 100, conn)
+            conn.execute('UPDATE receipt_pdf_cache SET last_access = ? WHERE cache_key = ?', (1e9 + i, f'key{i}'))
+            conn.commit()
+        receipt_cache.evict_receipts(conn)
+        keys = {row[0] for row in conn.execute('SELECT cache_key FROM receipt_pdf_cache')}
+        assert keys == {'key1', 'key2'}, keys
+    finally:
+        receipt_cache.RECEIPT_CACHE_MAX_BYTES = original
+    print("✅ LRU eviction keeps cache within size limit")
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are not served"""
+    conn = _memory_conn()
+    receipt_cache.store_receipt('old', '001001', 1, b'%PDF-old', conn)
+    conn.execute('UPDATE receipt_pdf_cache SET created_at = created_at - ?', (receipt_cache.RECEIPT_CACHE_TTL + 1,))
+    conn.commit()
+    assert receipt_cache.get_cached_receipt('old', conn) is None
+    assert conn.execute('SELECT COUNT(*) FROM receipt_pdf_cache').fetchone()[0] == 0
+    print("✅ Expired entries dropped")
+
+
+def test_download_served_from_cache_with_etag():
+    """Repeat downloads skip rendering and honour If-None-Match; edits invalidate"""
+    db_path = make_seeded_database(50)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+
+    renders = []
+    original_render = receipt_system.generate_custom_hindi_receipt
+
+    def counting_render(tourist_data, receipt_number, output=None):
+        renders.append(receipt_number)
+        return original_render(tourist_data, receipt_number, output)
+
+    receipt_system.generate_custom_hindi_receipt = counting_render
+    try:
+        first = client.get('/download_custom_receipt/1')
+        assert first.status_code == 200 and first.data.startswith(b'%PDF')
+        etag = first.headers['ETag']
+
+        second = client.get('/download_receipt/1')
+        assert second.status_code == 200 and second.data == first.data
+        assert len(renders) == 1, renders
+
+        not_modified = client.get('/download_custom_receipt/1', headers={'If-None-Match': etag})
+        assert not_modified.status_code == 304 and not not_modified.data
+
+        client.post('/tourist_profile/1/edit', data={
+            'full_name': 'Changed Name', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+            'mobile_number': '9876543210', 'amount_paid_today': '900', 'remaining_amount': '0',
+            'payment_mode': 'Cash'})
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('SELECT COUNT(*) FROM receipt_pdf_cache WHERE tourist_id = 1').fetchone()[0] == 0
+        conn.close()
+
+        changed = client.get('/download_custom_receipt/1', headers={'If-None-Match': etag})
+        assert changed.status_code == 200 and changed.headers['ETag'] != etag
+        assert len(renders) == 2
+    finally:
+        receipt_system.generate_custom_hindi_receipt = original_render
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    print("✅ Downloads cached, ETag honoured, edits invalidate")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing receipt PDF cache...")
+    print("=" * 50)
+    tests = [
+        test_key_tracks_printed_fields,
+        test_stamp_from_record,
+        test_lru_size_bound,
+        test_ttl_expiry,
+        test_download_served_from_cache_with_etag,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark and checks for the precompiled receipt template
+Compares receipts per second of the full ReportLab canvas renderer with the
+template engine and fails if the template is not at least 5x faster; also
+checks the public canvas form fallback used on other ReportLab releases.
+"""
+
+import os
+import re
+import base64
+import sys
+import time
+import zlib
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import receipt_template
+from test_receipt_cache import SAMPLE
+
+RECEIPTS = int(os.environ.get('RECEIPT_BENCH_COUNT', '300'))
+MIN_SPEEDUP = 5.0
+NOW = datetime(2025, 7, 4, 10, 30)
+
+
+def _check_xref(pdf):
+    """Every cross-reference entry must point at the start of its object"""
+    assert pdf.startswith(b'%PDF-') and pdf.rstrip().endswith(b'%%EOF')
+    xref_offset = int(pdf.rsplit(b'startxref\n', 1)[1].split()[0])
+    lines = pdf[xref_offset:].split(b'\n')
+    assert lines[0] == b'xref'
+    count = int(lines[1].split()[1])
+    for number in range(1, count):
+        offset = int(lines[2 + number][:10])
+        assert pdf[offset:].startswith(b'%d 0 obj' % number), f'xref entry {number} is wrong'
+
+
+def _page_text(pdf):
+    """Text shown on the page, forms included"""
+    shown = []
+    for stream in re.findall(rb'stream\r?\n(.*?)\n?endstream', pdf, re.S):
+        if stream.endswith(b'~>'):
+            # ReportLab's own streams are ASCII85 encoded before Flate
+            stream = base64.a85decode(re.sub(rb'\s', b'', stream[:-2]))
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        shown.extend(re.findall(rb'\((.*?)\) Tj', stream))
+    return b'|'.join(shown)
+
+
+def test_template_pdf_structure():
+    """Template output is a well-formed single page PDF with both forms painted"""
+    for tourist in (SAMPLE, dict(SAMPLE, father_spouse_name='')):
+        pdf = receipt_template.render_receipt_pdf(tourist, '001005', NOW)
+        _check_xref(pdf)
+        assert pdf.count(b'/Type /Page ') == 1
+        assert b'/Background Do' in pdf and b'/Footer Do' in pdf
+    print("✅ Template PDF structure valid")
+
+
+def test_template_matches_canvas_text():
+    """Every string of the canvas receipt is present in the template receipt"""
+    tourist = dict(SAMPLE, full_name='Asha (Rani) Verma')
+    pdf = receipt_template.render_receipt_pdf(tourist, '001005', NOW)
+    text = _page_text(pdf)
+    for expected in (b'#001005', b'Name: Asha \\(Rani\\) Verma', b'S/o, W/o: Suresh Aggarwal',
+                     b'Room No: 18', b' 1,500.00', b'Payment Mode: Cash', b'04/07/2025 10:30:00',
+                     b'TOTAL AMOUNT', b'Terms & Conditions', b'Authorized Signature'):
+        assert expected in text, expected
+
+    fields = receipt_template.receipt_fields(tourist, '001005', NOW)
+    without_father = receipt_template.receipt_fields(dict(tourist, father_spouse_name=''), '001005', NOW)
+    assert len(fields) == len(without_father) + 1
+    print("✅ Template carries every receipt field")
+
+
+def test_canvas_fallback():
+    """Outside TEMPLATE_REPORTLAB_VERSIONS receipts come from public canvas forms with the same text"""
+    original_versions, original_template = receipt_template.TEMPLATE_REPORTLAB_VERSIONS, receipt_template._template
+    receipt_template.TEMPLATE_REPORTLAB_VERSIONS = ((0, 0), (0, 1))
+    receipt_template._template = None
+    try:
+        assert isinstance(receipt_template.get_receipt_template(), receipt_template.CanvasReceiptTemplate)
+        tourist = dict(SAMPLE, full_name='Asha (Rani) Verma')
+        pdf = receipt_template.render_receipt_pdf(tourist, '001005', NOW)
+        _check_xref(pdf)
+        text = _page_text(pdf)
+        for expected in (b'#001005', b'Name: Asha \\(Rani\\) Verma', b'Room No: 18', b'TOTAL AMOUNT',
+                         b'Authorized Signature'):
+            assert expected in text, expected
+
+        template = receipt_template.get_receipt_template()
+        pages = [receipt_template.receipt_page(dict(SAMPLE, father_spouse_name=name), f'00100{i}', NOW)
+                 for i, name in enumerate(('', 'Suresh Aggarwal', ''))]
+        merged = template.render_document(pages)
+        _check_xref(merged)
+        assert b'/Count 3' in merged
+        assert merged.count(b'/Subtype /Form') == 4
+    finally:
+        receipt_template.TEMPLATE_REPORTLAB_VERSIONS = original_versions
+        receipt_template._template = original_template
+    assert receipt_template.reportlab_version() >= original_versions[0]
+    print("✅ Canvas form fallback carries every receipt field")
+
+
+def _rate(render, count):
+    started = time.perf_counter()
+    for i in range(count):
+        render(SAMPLE, f'{1000 + i:06d}')
+    return count / (time.perf_counter() - started)
+
+
+def test_template_speedup():
+    """Receipts per second before (canvas) and after (template)"""
+    receipt_template.warm_receipt_templates()
+    canvas_rate = _rate(receipt_template.render_receipt_canvas, RECEIPTS)
+    template_rate = _rate(receipt_template.render_receipt_pdf, RECEIPTS)
+    speedup = template_rate / canvas_rate
+    print(f"   canvas:   {canvas_rate:8,.0f} receipts/s")
+    print(f"   template: {template_rate:8,.0f} receipts/s ({speedup:.1f}x)")
+    assert speedup >= MIN_SPEEDUP, f'only {speedup:.1f}x faster'
+    print("✅ Template renderer meets speed-up target")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Benchmarking precompiled receipt template...")
+    print("=" * 50)
+    tests = [test_template_pdf_structure, test_template_matches_canvas_text, test_canvas_fallback,
+             test_template_speedup]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test script for the occupancy calendar
+Checks month parsing, that the vectorised matrix matches a cell-by-cell
+count, caching and invalidation across processes, the /api/calendar route,
+and the time to build a full year.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from occupancy import ensure_occupancy_schema, bump_generation, stay_nights
+from room_calendar import CalendarCache, build_calendar, month_range
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+HISTORY_DAYS = 3 * 365
+# 80 check-ins a day staying 1-3 nights keeps all 157 rooms about full
+LARGE_ROWS = int(os.environ.get('CALENDAR_BENCH_ROWS', str(80 * HISTORY_DAYS)))
+# Target for a full year; the check allows twice that on slow single-core runners
+YEAR_BUDGET_MS = 50
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def test_month_range():
+    """Months and whole years parse; anything else is rejected"""
+    assert month_range('2025-02') == (date(2025, 2, 1), 28)
+    assert month_range('2028-02') == (date(2028, 2, 1), 29)
+    assert month_range('2025-12') == (date(2025, 12, 1), 31)
+    assert month_range('2028') == (date(2028, 1, 1), 366)
+    for bad in ('', '2025-13', '2025-00', 'July', '2025-07-01', '2025/07'):
+        try:
+            month_range(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f'{bad!r} accepted')
+    print("✅ Month parsing")
+
+
+def test_matrix_matches_cells():
+    """Every cell equals a direct count of the stays covering that room and night"""
+    db_path = make_seeded_database(600, days=45)
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        # A stay with no check-out date, one outside the hotel's rooms and one not checked in
+        today = date.today()
+        conn.execute("UPDATE tourists SET check_out_date = '' WHERE id = 1")
+        conn.execute('UPDATE tourists SET room_number = 400 WHERE id = 2')
+        conn.execute('UPDATE tourists SET check_in_done = 0 WHERE id = 3')
+        conn.commit()
+        stays = conn.execute('SELECT room_number, check_in_date, check_out_date, amount_paid_today + remaining_amount '
+                             'FROM tourists WHERE check_in_done = 1').fetchall()
+
+        first_day, days = today - timedelta(days=20), 31
+        occupied, revenue = build_calendar(conn, first_day, days, 157)
+        assert occupied.shape == revenue.shape == (157, days)
+
+        expected = [[0] * days for _ in range(157)]
+        expected_revenue = [[0.0] * days for _ in range(157)]
+        for room, check_in, check_out, charge in stays:
+            first, last = stay_nights(check_in, check_out)
+            nights = (last - first).days + 1
+            for offset in range(days):
+                if 1 <= room <= 157 and first <= first_day + timedelta(days=offset) <= last:
+                    expected[room - 1][offset] += 1
+                    expected_revenue[room - 1][offset] += charge / nights
+        assert occupied.tolist() == expected
+        assert all(abs(revenue[r][d] - expected_revenue[r][d]) < 0.01 for r in range(157) for d in range(days))
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Vectorised matrix matches a cell-by-cell count")
+
+
+def test_cache_and_invalidation():
+    """A built month is served from memory until any process commits a stay change"""
+    db_path = make_seeded_database(300, days=10)
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        cache = CalendarCache(157)
+        first_day, days = month_range(date.today().strftime('%Y-%m'))
+        before = cache.matrix(first_day, days, conn)
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        assert cache.matrix(first_day, days, conn) is before
+        conn.set_trace_callback(None)
+        assert not any('stay_index' in sql for sql in statements), statements
+
+        # Another worker extends a stay and raises its revenue
+        other = sqlite3.connect(db_path)
+        other.execute("UPDATE tourists SET check_out_date = date(check_in_date, '+2 days'), "
+                      "amount_paid_today = amount_paid_today + 1000 WHERE id = 1")
+        bump_generation(other)
+        other.commit()
+        other.close()
+        after = cache.matrix(first_day, days, conn)
+        assert after is not before and after[1].sum() > before[1].sum()
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Cache and invalidation")
+
+
+def test_calendar_route():
+    """/api/calendar returns the month's matrix and reflects new check-ins"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    module.room_occupancy.invalidate()
+    module.room_calendar.invalidate()
+    client = logged_in_client(module.app)
+    today = date.today()
+    month = today.strftime('%Y-%m')
+    try:
+        assert module.app.test_client().get('/api/calendar').status_code == 401
+        data = client.get(f'/api/calendar?month={month}').get_json()
+        days = month_range(month)[1]
+        assert data['month'] == month and len(data['dates']) == days
+        assert len(data['occupied']) == 157 and all(len(row) == days for row in data['occupied'])
+        day = today.day - 1
+        assert data['daily_occupied'][day] == 30
+
+        room = client.get('/api/available_rooms').get_json()['available_rooms'][-1]
+        client.post('/checkin', data={
+            'full_name': 'Calendar Guest', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+            'mobile_number': '9876543210', 'amount_paid_today': '1000', 'remaining_amount': '0',
+            'check_in_done': 'yes', 'room_number': str(room), 'payment_mode': 'Cash',
+            'male_count': '1', 'female_count': '0'})
+        updated = client.get('/api/calendar').get_json()
+        assert updated['month'] == month
+        assert updated['occupied'][room - 1][day] == 1 and updated['revenue'][room - 1][day] == 1000.0
+        assert updated['totals']['revenue'] == round(data['totals']['revenue'] + 1000, 2)
+
+        year = client.get(f'/api/calendar?month={today.year}').get_json()
+        assert len(year['dates']) == month_range(str(today.year))[1]
+        for bad in ('2025-13', 'soon'):
+            assert client.get(f'/api/calendar?month={bad}').status_code == 400
+    finally:
+        _remove_database(db_path)
+    print("✅ Calendar route")
+
+
+def test_full_year_speed():
+    """A full year's matrix builds in about 50 ms"""
+    db_path = make_seeded_database(LARGE_ROWS, days=HISTORY_DAYS)
+    conn = database.open_connection(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        first_day = date(date.today().year - 1, 1, 1)
+        days = month_range(str(first_day.year))[1]
+        samples = []
+        for _ in range(7):
+            started = time.perf_counter()
+            occupied, _ = build_calendar(conn, first_day, days, 157)
+            samples.append((time.perf_counter() - started) * 1000)
+
+        # One day's column cell by cell, scaled up to the year
+        night = first_day.isoformat()
+        started = time.perf_counter()
+        for room in range(1, 158):
+            conn.execute('SELECT COUNT(*) FROM tourists WHERE room_number = ? AND check_in_done = 1 '
+                         'AND check_in_date <= ? AND check_out_date > ?', (room, night, night)).fetchone()
+        per_cell = (time.perf_counter() - started) * 1000 * days
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    best = min(samples)
+    print(f"   {LARGE_ROWS:,} stays over {HISTORY_DAYS} days: {days}-day matrix in {best:.1f} ms "
+          f"({int((occupied > 0).sum()):,} room-nights, target {YEAR_BUDGET_MS} ms); "
+          f"per-cell queries ~{per_cell / 1000:.1f} s")
+    assert best < 2 * YEAR_BUDGET_MS, f'full year far slower than {YEAR_BUDGET_MS} ms'
+    print("✅ Full year builds fast")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing occupancy calendar...")
+    print("=" * 50)
+    tests = [test_month_range, test_matrix_matches_cells, test_cache_and_invalidation, test_calendar_route,
+             test_full_year_speed]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test script for the room status feed (Server-Sent Events)
+Checks snapshot and delta events, that one change costs one bitmap read no
+matter how many terminals listen, cross-process resync, dropping of stalled
+clients, and the /api/room_events stream end to end.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from occupancy import RoomOccupancy, ensure_occupancy_schema, bump_generation
+from room_events import RoomStatusBroker, FEED_QUEUE_SIZE
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+TERMINALS = 50
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _parse(message):
+    """(event name, data) of one SSE message"""
+    fields = dict(line.split(': ', 1) for line in message.strip().split('\n') if not line.startswith(':'))
+    return fields.get('event'), json.loads(fields['data']) if 'data' in fields else None
+
+
+def _check_in(conn, occupancy, room_number):
+    cursor = conn.execute('''
+        INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today,
+                              remaining_amount, check_in_done, room_number, check_in_date)
+        VALUES ('Feed Guest', 'Haridwar', '123412341234', '9000000000', 500, 0, 1, ?, ?)
+    ''', (room_number, date.today().isoformat()))
+    generation = bump_generation(conn)
+    conn.commit()
+    occupancy.record_check_in(generation, date.today(), room_number)
+    return cursor.lastrowid
+
+
+def _with_broker(test):
+    db_path = make_seeded_database(300, days=10)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    ensure_occupancy_schema(conn)
+    occupancy = RoomOccupancy(157)
+    try:
+        test(conn, occupancy, RoomStatusBroker(occupancy), db_path)
+    finally:
+        conn.close()
+        _remove_database(db_path)
+
+
+def test_snapshot_and_deltas():
+    """Subscribers get a snapshot, then one delta per committed change"""
+    def run(conn, occupancy, broker, db_path):
+        feeds = [broker.subscribe(conn) for _ in range(2)]
+        event, data = _parse(feeds[0][1])
+        assert event == 'snapshot' and data['occupied'] == list(range(1, 31)), data
+        assert data['available_count'] == 127
+
+        tourist_id = _check_in(conn, occupancy, 99)
+        assert broker.publish(conn)
+        assert broker.publish(conn) is None, 'unchanged state published again'
+        for feed, _ in feeds:
+            event, data = _parse(feed.events.get_nowait())
+            assert event == 'delta' and data['occupied'] == [99] and data['freed'] == []
+            assert data['occupied_count'] == 31
+            assert feed.events.empty()
+
+        conn.execute('DELETE FROM tourists WHERE id = ?', (tourist_id,))
+        generation = bump_generation(conn)
+        conn.commit()
+        occupancy.record_release(generation, date.today())
+        broker.publish(conn)
+        event, data = _parse(feeds[1][0].events.get_nowait())
+        assert event == 'delta' and data['freed'] == [99] and data['occupied'] == []
+    _with_broker(run)
+    print("✅ Snapshot and delta events")
+
+
+def test_fan_out_cost():
+    """A change costs the same SQL with 50 terminals listening as with one"""
+    def run(conn, occupancy, broker, db_path):
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        def publish_cost(feeds):
+            _check_in(conn, occupancy, 100 + len(feeds))
+            statements.clear()
+            broker.publish(conn)
+            cost = len(statements)
+            assert all(_parse(feed.events.get_nowait())[0] == 'delta' for feed in feeds)
+            return cost
+
+        one = publish_cost([broker.subscribe(conn)[0]])
+        for feed in list(broker._feeds):
+            broker.unsubscribe(feed)
+        many = publish_cost([broker.subscribe(conn)[0] for _ in range(TERMINALS)])
+        conn.set_trace_callback(None)
+        assert many == one <= 2, (one, many)
+        print(f"   1 terminal: {one} statement(s); {TERMINALS} terminals: {many} statement(s) per change "
+              f"(polling every 30 s: {TERMINALS} requests per interval)")
+    _with_broker(run)
+    print("✅ One event fans out to every terminal")
+
+
+def test_resync_and_dropped_clients():
+    """Resync picks up other processes' writes; stalled clients are dropped"""
+    def run(conn, occupancy, broker, db_path):
+        original_path = database.DATABASE_PATH
+        database.configure(db_path)
+        try:
+            feed, _ = broker.subscribe(conn)
+            # Another worker process checks someone in: only the shared generation moves
+            other = sqlite3.connect(db_path)
+            _check_in(other, RoomOccupancy(157), 120)
+            other.close()
+            broker.sync_interval = 0
+            broker.resync()
+            event, data = _parse(feed.events.get_nowait())
+            assert event == 'delta' and data['occupied'] == [120], data
+        finally:
+            database.configure(original_path)
+
+        stalled, _ = broker.subscribe(conn)
+        reading, _ = broker.subscribe(conn)
+        for i in range(FEED_QUEUE_SIZE // 2 + 1):
+            _check_in(conn, occupancy, 121 + i % 30)
+            broker.publish(conn)
+            conn.execute('DELETE FROM tourists WHERE room_number = ? AND check_in_date = ?',
+                         (121 + i % 30, date.today().isoformat()))
+            generation = bump_generation(conn)
+            conn.commit()
+            occupancy.record_release(generation, date.today())
+            broker.publish(conn)
+            while not reading.events.empty():
+                reading.events.get_nowait()
+        assert stalled.dropped and not reading.dropped
+        assert stalled not in broker._feeds and reading in broker._feeds
+    _with_broker(run)
+    print("✅ Cross-process resync and stalled clients")
+
+
+def test_event_stream_route():
+    """/api/room_events streams a snapshot, then deltas from check-in and delete"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    module.room_occupancy.invalidate()
+    client = logged_in_client(module.app)
+    desk = logged_in_client(module.app)
+    try:
+        assert module.app.test_client().get('/api/room_events').status_code == 401
+        response = client.get('/api/room_events', buffered=False)
+        assert response.mimetype == 'text/event-stream'
+        stream = iter(response.response)
+        event, data = _parse(next(stream).decode().split('\n\n', 1)[1])
+        assert event == 'snapshot' and data['occupied_count'] == 30
+
+        room = desk.get('/api/available_rooms').get_json()['available_rooms'][0]
+        desk.post('/checkin', data={
+            'full_name': 'Feed Guest', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+            'mobile_number': '9876543210', 'amount_paid_today': '1000', 'remaining_amount': '0',
+            'check_in_done': 'yes', 'room_number': str(room), 'payment_mode': 'Cash',
+            'male_count': '1', 'female_count': '0'})
+        event, data = _parse(next(stream).decode())
+        assert event == 'delta' and data['occupied'] == [room], data
+
+        conn = sqlite3.connect(db_path)
+        tourist_id = conn.execute('SELECT MAX(id) FROM tourists').fetchone()[0]
+        conn.close()
+        desk.post(f'/tourist_profile/{tourist_id}/delete')
+        event, data = _parse(next(stream).decode())
+        assert event == 'delta' and data['freed'] == [room], data
+        response.close()
+        assert module.room_feed.stats()['subscribers'] == 0
+    finally:
+        _remove_database(db_path)
+    print("✅ Event stream route")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing room status feed...")
+    print("=" * 50)
+    tests = [test_snapshot_and_deltas, test_fan_out_cost, test_resync_and_dropped_clients,
+             test_event_stream_route]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory room occupancy bitmap
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_common import create_empty_database
+from occupancy import RoomOccupancy, bump_generation, ensure_occupancy_schema
+
+TODAY = '2025-07-04'
+
+
+def _temp_db():
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.remove(path)
+    create_empty_database(path)
+    conn = sqlite3.connect(path)
+    ensure_occupancy_schema(conn)
+    conn.close()
+    return path
+
+
+def _check_in(path, room_number, day=TODAY):
+    """Insert a checked-in guest the way the checkin route does"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today,
+                              remaining_amount, check_in_done, room_number, check_in_date)
+        VALUES ('Guest', 'Haridwar', '123456789012', '9876543210', 1000, 0, 1, ?, ?)
+    ''', (room_number, day))
+    generation = bump_generation(conn)
+    conn.commit()
+    conn.close()
+    return generation
+
+
+def test_first_free_and_status():
+    """Free-room lookups match the rows in SQLite"""
+    path = _temp_db()
+    for room in (1, 2, 4):
+        _check_in(path, room)
+    conn = sqlite3.connect(path)
+    occupancy = RoomOccupancy(157)
+    assert occupancy.first_free(TODAY, conn) == 3
+    assert occupancy.free_rooms(TODAY, conn)[:3] == [3, 5, 6]
+    assert occupancy.occupied_count(TODAY, conn) == 3
+    assert occupancy.room_status(TODAY, conn)[4] == 'occupied'
+    assert occupancy.is_free(157, TODAY, conn)
+    assert not occupancy.is_free(158, TODAY, conn)
+    assert occupancy.first_free('2025-07-05', conn) == 1
+    print("✅ First free room and status lookups")
+
+
+def test_full_hotel():
+    """first_free returns None when every room is taken"""
+    path = _temp_db()
+    conn = sqlite3.connect(path)
+    conn.executemany('''
+        INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today,
+                              remaining_amount, check_in_done, room_number, check_in_date)
+        VALUES ('Guest', 'Haridwar', '123456789012', '9876543210', 1000, 0, 1, ?, ?)
+    ''', [(room, TODAY) for room in range(1, 158)])
+    conn.commit()
+    occupancy = RoomOccupancy(157)
+    assert occupancy.first_free(TODAY, conn) is None
+    assert occupancy.free_rooms(TODAY, conn) == []
+    print("✅ Full hotel detected")
+
+
+def test_write_through_without_reload():
+    """A local check-in updates the cached bitset instead of rebuilding it"""
+    path = _temp_db()
+    conn = sqlite3.connect(path)
+    occupancy = RoomOccupancy(157)
+    assert occupancy.first_free(TODAY, conn) == 1
+
+    generation = _check_in(path, 1)
+    occupancy.record_check_in(generation, TODAY, 1)
+
+    # Hide the tourists table: the answer must come from memory
+    conn.execute('ALTER TABLE tourists RENAME TO tourists_hidden')
+    assert occupancy.first_free(TODAY, conn) == 2
+    print("✅ Write-through check-in served from memory")
+
+
+def _worker_check_in(path, room_number):
+    _check_in(path, room_number)
+
+
+def test_reconciles_across_processes():
+    """A check-in committed by another process is visible through the generation counter"""
+    path = _temp_db()
+    conn = sqlite3.connect(path)
+    occupancy = RoomOccupancy(157)
+    assert occupancy.first_free(TODAY, conn) == 1
+
+    process = multiprocessing.Process(target=_worker_check_in, args=(path, 1))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert occupancy.first_free(TODAY, conn) == 2
+
+    # Our own write after missing theirs must not trust the stale bitset
+    generation = _check_in(path, 2)
+    _check_in(path, 3)
+    occupancy.record_check_in(generation, TODAY, 2)
+    assert occupancy.first_free(TODAY, conn) == 4
+    print("✅ Reconciled across worker processes")
+
+
+def test_release_rebuilds_date():
+    """Deleting a stay frees the room on the next lookup"""
+    path = _temp_db()
+    _check_in(path, 1)
+    conn = sqlite3.connect(path)
+    occupancy = RoomOccupancy(157)
+    assert occupancy.first_free(TODAY, conn) == 2
+
+    conn.execute('DELETE FROM tourists WHERE room_number = 1')
+    generation = bump_generation(conn)
+    conn.commit()
+    occupancy.record_release(generation, TODAY)
+    assert occupancy.first_free(TODAY, conn) == 1
+    print("✅ Released room becomes free")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing room occupancy bitmap...")
+    print("=" * 50)
+    tests = [
+        test_first_free_and_status,
+        test_full_hotel,
+        test_write_through_without_reload,
+        test_reconciles_across_processes,
+        test_release_rebuilds_date,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
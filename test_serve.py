@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for the production server
+Checks the worker count, that warm_up does the start-up work before any
+fork, and a real pre-forked server: requests through its workers, a killed
+worker replaced, and a clean stop on SIGTERM.
+"""
+
+import os
+import sys
+import time
+import signal
+import shutil
+import socket
+import tempfile
+import subprocess
+import urllib.request
+import urllib.parse
+import http.cookiejar
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import receipt_template
+import serve
+from bench_common import make_seeded_database, prepare_app
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def _workers(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return set(map(int, children.read().split()))
+    except OSError:
+        return set()
+
+
+def _wait_for(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError('timed out')
+
+
+def test_default_workers():
+    """Two workers per core plus one"""
+    assert serve.default_workers(1) == 3
+    assert serve.default_workers(4) == 9
+    assert serve.default_workers() == 2 * (os.cpu_count() or 1) + 1
+    print("✅ Worker count follows the cores")
+
+
+def test_warm_up_before_fork():
+    """warm_up builds the schema, compiles receipt and page templates, and closes its connections"""
+    db_path = make_seeded_database(0)
+    module = prepare_app(db_path)
+    try:
+        receipt_template._template = None
+        serve.warm_up(module)
+        assert receipt_template._template is not None
+        cached = {key[1] for key in module.app.jinja_env.cache}
+        assert {'dashboard.html', 'checkin.html', 'tourist_profiles.html'} <= cached, cached
+        assert database._pool is None, 'pooled connections would be shared across the fork'
+
+        conn = database.open_connection(db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        assert {'stay_index', 'daily_stats', 'tourists_fts', 'room_occupancy_state'} <= tables, tables
+    finally:
+        _remove_database(db_path)
+    print("✅ Warm-up runs before the fork")
+
+
+def test_prefork_server():
+    """Workers share one socket, a killed worker is replaced and SIGTERM stops everything"""
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/task'):
+        print("⚠️ Skipped: needs fork and /proc")
+        return
+    db_path = make_seeded_database(50, days=5)
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix='serve_test_')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, 'serve.py'), '--host', '127.0.0.1', '--port', str(port),
+         '--workers', '2', '--job-workers', '0', '--db', db_path],
+        cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        workers = _wait_for(lambda: len(_workers(process.pid)) == 2 and _workers(process.pid))
+        base = f'http://127.0.0.1:{port}'
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        _wait_for(lambda: opener.open(f'{base}/login').status == 200)
+        login = urllib.parse.urlencode({'username': 'admin', 'password': 'admin123'}).encode()
+        assert opener.open(f'{base}/login', login).geturl().rstrip('/') == base
+
+        timings = {}
+        for path in ('/', '/checkin', '/download_receipt/1', '/api/room_status'):
+            samples = []
+            for _ in range(4):
+                started = time.perf_counter()
+                response = opener.open(base + path)
+                response.read()
+                samples.append((time.perf_counter() - started) * 1000)
+                assert response.status == 200, path
+            timings[path] = samples
+
+        victim = min(workers)
+        os.kill(victim, signal.SIGKILL)
+        replaced = _wait_for(lambda: len(_workers(process.pid)) == 2 and victim not in _workers(process.pid)
+                             and _workers(process.pid), timeout=10)
+        assert len(replaced & workers) == 1
+        assert opener.open(f'{base}/api/room_status').status == 200
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=serve.GRACEFUL_TIMEOUT + 5) == 0
+        output = process.stdout.read()
+        assert 'workers started' in output and f'Worker {victim} exited' in output, output
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        _remove_database(db_path)
+        shutil.rmtree(workdir, ignore_errors=True)
+    for path, samples in timings.items():
+        print(f"   {path}: first {samples[0]:.1f} ms, then {min(samples[1:]):.1f} ms")
+    print("✅ Pre-forked workers serve, restart and stop")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing production server...")
+    print("=" * 50)
+    tests = [test_default_workers, test_warm_up_before_fork, test_prefork_server]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite session store
+Checks that sessions round-trip through the sessions table with no write on
+read-only requests, new session IDs on login and logout, expiry, refresh and
+sweeping, that the latest receipt is found per user instead of in the
+session, and a small run of the session load/save benchmark.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sessions
+from sessions import sweep_sessions, SESSION_REFRESH_SECONDS
+from jobs import run_pending_jobs
+from bench_sessions import benchmark_sessions
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+CHECKIN_FORM = {'full_name': 'Session Guest', 'address': 'Haridwar', 'aadhar_number': '123412341234',
+                'mobile_number': '9812345678', 'amount_paid_today': '1200', 'remaining_amount': '0',
+                'payment_mode': 'Cash', 'check_in_done': 'yes', 'male_count': '1', 'female_count': '0'}
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0]: row[1] for row in conn.execute('SELECT session_id, expires_at FROM sessions')}
+    except sqlite3.OperationalError:
+        return {}  # no session stored yet
+    finally:
+        conn.close()
+
+
+def _session_id(client, module):
+    cookie = client.get_cookie(module.app.config['SESSION_COOKIE_NAME'])
+    return cookie.value if cookie else None
+
+
+def test_round_trip_without_writes():
+    """A stored session is read back, and read-only requests do not write it"""
+    db_path = make_seeded_database(50, days=5)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        session_id = _session_id(client, module)
+        rows = _rows(db_path)
+        assert list(rows) == [session_id] and len(session_id) >= 40
+        assert client.get('/api/room_status').status_code == 200
+        assert client.get('/').status_code == 200
+        assert _rows(db_path) == rows, 'a read-only request wrote the session'
+        assert not os.path.exists(os.path.join(os.path.dirname(db_path), 'flask_session', session_id))
+
+        page = client.get('/')
+        assert 'Cookie' in page.headers.get('Vary', '')
+        assert 'Cookie' not in client.get('/static/css/style.css').headers.get('Vary', '')
+        with client.session_transaction() as session:
+            assert session['user_id'] == 1 and session['username'] == 'admin'
+    finally:
+        _remove_database(db_path)
+    print("✅ Sessions round-trip without writes on reads")
+
+
+def test_login_and_logout_rotate_ids():
+    """Login and logout move the session to a new ID and delete the old row"""
+    db_path = make_seeded_database(50, days=5)
+    module = prepare_app(db_path)
+    client = module.app.test_client()
+    try:
+        assert client.get('/login').status_code == 200
+        assert _session_id(client, module) is None and _rows(db_path) == {}, 'an empty session was stored'
+
+        # The error is flashed and shown by the same response: still nothing to store
+        assert b'Invalid username' in client.post('/login', data={'username': 'admin', 'password': 'wrong'}).data
+        assert _rows(db_path) == {}
+
+        with client.session_transaction() as session:
+            session['_flashes'] = [('info', 'Please log in')]
+        anonymous = _session_id(client, module)
+        assert list(_rows(db_path)) == [anonymous]
+
+        assert client.post('/login', data={'username': 'admin', 'password': 'admin123'}).status_code == 302
+        signed_in = _session_id(client, module)
+        assert signed_in != anonymous and list(_rows(db_path)) == [signed_in]
+        assert client.get('/').status_code == 200
+
+        assert client.get('/logout').status_code == 302
+        signed_out = _session_id(client, module)
+        assert signed_out not in (anonymous, signed_in) and list(_rows(db_path)) == [signed_out]
+        assert client.get('/').status_code == 302
+
+        # The old cookie no longer signs anyone in
+        client.set_cookie(module.app.config['SESSION_COOKIE_NAME'], signed_in)
+        assert client.get('/').status_code == 302
+    finally:
+        _remove_database(db_path)
+    print("✅ Login and logout rotate session IDs")
+
+
+def test_expiry_refresh_and_sweep():
+    """Expired sessions are ignored and swept; an old expiry is pushed without a change"""
+    db_path = make_seeded_database(50, days=5)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    lifetime = module.app.permanent_session_lifetime.total_seconds()
+    try:
+        session_id = _session_id(client, module)
+        conn = sqlite3.connect(db_path)
+        plan = ' '.join(row[-1] for row in conn.execute(
+            'EXPLAIN QUERY PLAN DELETE FROM sessions WHERE expires_at < ?', (time.time(),)))
+        assert 'idx_sessions_expires' in plan, plan
+
+        old = time.time() + lifetime - 2 * SESSION_REFRESH_SECONDS
+        conn.execute('UPDATE sessions SET expires_at = ?', (old,))
+        conn.commit()
+        assert client.get('/').status_code == 200
+        assert _rows(db_path)[session_id] > old + SESSION_REFRESH_SECONDS, 'expiry was not refreshed'
+
+        conn.execute('UPDATE sessions SET expires_at = ?', (time.time() - 1,))
+        conn.commit()
+        assert client.get('/').status_code == 302, 'an expired session still signed in'
+
+        conn.executemany('INSERT INTO sessions VALUES (?, ?, ?)',
+                         [(f'stale-{number}', '{}', time.time() - 60) for number in range(50)])
+        conn.commit()
+        sessions._last_sweep = 0.0
+        fresh = logged_in_client(module.app)
+        assert set(_rows(db_path)) == {_session_id(fresh, module)}, 'expired sessions were not swept'
+        assert sweep_sessions(conn) == 0
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Session expiry, refresh and sweeping")
+
+
+def test_latest_receipt_per_user():
+    """/download_receipt finds the user's newest receipt job, not one kept in the session"""
+    db_path = make_seeded_database(50, days=5)
+    module = prepare_app(db_path)
+    admin = logged_in_client(module.app)
+    other = module.app.test_client()
+    with other.session_transaction() as session:
+        session['user_id'] = 2
+        session['username'] = 'clerk'
+    try:
+        room = admin.get('/api/available_rooms').get_json()['available_rooms'][0]
+        assert admin.post('/checkin', data=dict(CHECKIN_FORM, room_number=str(room))).status_code == 302
+        with admin.session_transaction() as session:
+            assert set(session) <= {'user_id', 'username', '_flashes'}, dict(session)
+        assert '/jobs/' in admin.get('/download_receipt').headers['Location']
+
+        assert other.get('/download_receipt').headers['Location'].endswith('/')
+        assert run_pending_jobs() == 1
+        receipt = admin.get('/download_receipt')
+        assert receipt.status_code == 200 and receipt.data.startswith(b'%PDF')
+    finally:
+        _remove_database(db_path)
+    print("✅ Latest receipt found per user")
+
+
+def test_session_benchmark():
+    """The benchmark measures every store; the SQLite store beats the filesystem on reads"""
+    results = benchmark_sessions(stored=300, requests=300)
+    stores = {name for name, _ in results}
+    assert {'sqlite', 'signed-cookie'} <= stores, stores
+    for (name, mode), stats in sorted(results.items()):
+        assert 0 < stats['p50_us'] <= stats['p99_us'], (name, mode, stats)
+        print(f"   {name:<14}{mode:<7}p50 {stats['p50_us']:>7} µs  p99 {stats['p99_us']:>7} µs")
+    if 'filesystem' in stores:
+        assert results[('sqlite', 'read')]['p50_us'] < results[('filesystem', 'read')]['p50_us']
+    print("✅ Session load/save benchmark")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing the session store...")
+    print("=" * 50)
+    tests = [test_round_trip_without_writes, test_login_and_logout_rotate_ids, test_expiry_refresh_and_sweep,
+             test_latest_receipt_per_user, test_session_benchmark]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for start-up time
+Checks that importing the app and the CLI tools stays within the start-up
+budget without loading NumPy, openpyxl or ReportLab, and that those are
+still loaded (and work) on first use.
+"""
+
+import io
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_startup import measure_startup, parse_importtime, STARTUP_TARGETS, HEAVY_MODULES
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+from jobs import run_pending_jobs
+
+# Wall time allowed for a fresh interpreter to import the app (Flask and Werkzeug alone take ~100 ms)
+STARTUP_BUDGET_MS = 350
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def test_parse_importtime():
+    """-X importtime lines become (module, self, cumulative, depth)"""
+    stderr = ('import time: self [us] | cumulative | imported package\n'
+              'import time:       120 |        120 |   zlib\n'
+              'import time:       300 |        420 | receipt_template\n'
+              'some other output\n')
+    assert parse_importtime(stderr) == [('zlib', 120, 120, 1), ('receipt_template', 300, 420, 0)]
+    print("✅ importtime parsing")
+
+
+def test_startup_budget():
+    """The app imports within budget and without any heavy library"""
+    profile = measure_startup(STARTUP_TARGETS['app'])
+    print(f"   app start-up {profile['wall_ms']} ms (budget {STARTUP_BUDGET_MS} ms); slowest: "
+          + ', '.join(f'{name} {ms} ms' for name, ms in profile['slowest'][:3]))
+    assert profile['heavy_loaded'] == [], profile['heavy_loaded']
+    assert profile['wall_ms'] < STARTUP_BUDGET_MS, f"start-up took {profile['wall_ms']} ms"
+    print("✅ App start-up within budget")
+
+
+def test_cli_tools_start_light():
+    """CLI tools do not load heavy libraries just to parse their arguments"""
+    for name, code in STARTUP_TARGETS.items():
+        if name != 'app':
+            assert measure_startup(code, runs=1)['heavy_loaded'] == [], name
+    print("✅ CLI tools start light")
+
+
+def test_loaded_on_first_use():
+    """Receipts, the Excel export and the calendar still work, loading their library then"""
+    db_path = make_seeded_database(200, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        receipt = client.get('/download_custom_receipt/1')
+        assert receipt.status_code == 200 and receipt.data.startswith(b'%PDF')
+        export = client.get('/export_excel?from=2000-01-01&to=2100-01-01')
+        assert export.status_code == 302 and run_pending_jobs() == 1
+        excel = client.get(export.headers['Location'] + '/download')
+        assert excel.status_code == 200 and excel.data[:2] == b'PK'
+        assert client.get('/api/calendar').status_code == 200
+        guest = {'full_name': 'Lazy Guest', 'address': 'Haridwar', 'aadhar_number': '987654321098',
+                 'mobile_number': '9876543210', 'amount_paid_today': '1000', 'remaining_amount': '0',
+                 'check_in_done': True, 'payment_mode': 'Cash', 'male_count': 1, 'female_count': 0,
+                 'check_out_date': date.today().isoformat()}
+        legacy = module.generate_pdf_receipt(guest, 101, io.BytesIO())
+        assert legacy.getvalue().startswith(b'%PDF')
+        assert all(name in sys.modules for name in ('numpy', 'openpyxl', 'reportlab'))
+    finally:
+        _remove_database(db_path)
+    print(f"✅ Loaded on first use ({', '.join(name for name in HEAVY_MODULES if name in sys.modules)})")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing start-up time...")
+    print("=" * 50)
+    tests = [test_parse_importtime, test_startup_budget, test_cli_tools_start_light, test_loaded_on_first_use]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-night stays and date-range availability
+Checks night numbering, that the R*Tree stay index follows inserts, updates
+and deletes, multi-night bitmaps and write-through, the /api/available_rooms
+range endpoint and check-in validation, and range lookups over years of history.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from occupancy import (RoomOccupancy, ensure_occupancy_schema, bump_generation, night_number,
+                       stay_nights)
+from bench_common import make_seeded_database, prepare_app, logged_in_client, percentile
+
+HISTORY_DAYS = 3 * 365
+# 80 check-ins a day staying 1-3 nights keeps all 157 rooms about full
+LARGE_ROWS = int(os.environ.get('STAY_BENCH_ROWS', str(80 * HISTORY_DAYS)))
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _stay(conn, room_number, check_in_date, check_out_date='', check_in_done=1):
+    cursor = conn.execute('''
+        INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today,
+                              remaining_amount, check_in_done, room_number, check_in_date, check_out_date)
+        VALUES ('Stay Guest', 'Haridwar', '123412341234', '9000000000', 500, 0, ?, ?, ?, ?)
+    ''', (check_in_done, room_number, check_in_date.isoformat(),
+          check_out_date.isoformat() if check_out_date else ''))
+    return cursor.lastrowid
+
+
+def _rooms(mask):
+    return [room for room in range(1, 158) if (mask >> (room - 1)) & 1]
+
+
+def test_night_numbers():
+    """Python night numbers match SQLite's julianday; check-out day is not a night"""
+    conn = sqlite3.connect(':memory:')
+    for day in (date(2000, 1, 1), date(2025, 7, 4), date(2028, 2, 29)):
+        sql_night = conn.execute('SELECT CAST(julianday(date(?)) AS INTEGER)', (f'{day} 21:45:00',)).fetchone()[0]
+        assert night_number(day) == night_number(day.isoformat()) == sql_night, day
+    conn.close()
+
+    day = date(2025, 7, 4)
+    assert stay_nights(day, day + timedelta(days=3)) == (day, day + timedelta(days=2))
+    assert stay_nights(day) == stay_nights(day, '') == stay_nights(day, 'soon') == (day, day)
+    assert stay_nights(day, day - timedelta(days=1)) == (day, day)
+    print("✅ Night numbers")
+
+
+def test_index_follows_tourists():
+    """Triggers keep the stay index in step with inserts, updates and deletes"""
+    db_path = make_seeded_database(0)
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        today = date.today()
+        week = today + timedelta(days=7)
+        long_stay = _stay(conn, 5, today, today + timedelta(days=3))
+        _stay(conn, 6, today)
+        pending = _stay(conn, 7, today, week, check_in_done=0)
+        conn.commit()
+
+        occupancy = RoomOccupancy(157)
+        assert _rooms(occupancy.bitmap(today, conn)) == [5, 6]
+        assert _rooms(occupancy.bitmap(today + timedelta(days=2), conn)) == [5]
+        assert _rooms(occupancy.bitmap(today + timedelta(days=3), conn)) == []
+        assert _rooms(occupancy.stay_bitmap(today + timedelta(days=1), week, conn)) == [5]
+        assert occupancy.is_free_for_stay(6, today + timedelta(days=1), week, conn)
+        assert not occupancy.is_free_for_stay(5, today + timedelta(days=2), week, conn)
+
+        # Extending a stay, completing a check-in and deleting a guest all reach the index
+        conn.execute('UPDATE tourists SET check_out_date = ? WHERE id = ?', (week.isoformat(), long_stay))
+        conn.execute('UPDATE tourists SET check_in_done = 1 WHERE id = ?', (pending,))
+        conn.execute("DELETE FROM tourists WHERE room_number = 6")
+        bump_generation(conn)
+        conn.commit()
+        assert _rooms(occupancy.stay_bitmap(today, week, conn)) == [5, 7]
+        assert 7 not in occupancy.free_rooms_for_stay(today + timedelta(days=6), week, conn)
+        assert 6 in occupancy.free_rooms_for_stay(today, week, conn)
+
+        # An existing database gets its index built from the tourists table
+        conn.execute('DROP TABLE stay_index')
+        conn.commit()
+        ensure_occupancy_schema(conn)
+        rebuilt = RoomOccupancy(157)
+        assert _rooms(rebuilt.stay_bitmap(today, week, conn)) == [5, 7]
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Stay index follows the tourists table")
+
+
+def test_multi_night_write_through():
+    """A committed multi-night check-in updates every cached night without re-reading"""
+    db_path = make_seeded_database(0)
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        today = date.today()
+        occupancy = RoomOccupancy(157)
+        nights = [today + timedelta(days=i) for i in range(5)]
+        for night in nights:
+            occupancy.bitmap(night, conn)
+
+        tourist_id = _stay(conn, 12, today, today + timedelta(days=3))
+        generation = bump_generation(conn)
+        conn.commit()
+        first, last = stay_nights(today, today + timedelta(days=3))
+        occupancy.record_check_in(generation, first, 12, last)
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        occupied = [occupancy.is_free(12, night, conn) for night in nights]
+        conn.set_trace_callback(None)
+        assert occupied == [False, False, False, True, True], occupied
+        assert all('generation' in sql for sql in statements), 'a cached night was re-read'
+
+        conn.execute('DELETE FROM tourists WHERE id = ?', (tourist_id,))
+        generation = bump_generation(conn)
+        conn.commit()
+        occupancy.record_release(generation, first, last)
+        assert all(occupancy.is_free(12, night, conn) for night in nights)
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Multi-night write-through")
+
+
+def test_available_rooms_route():
+    """/api/available_rooms answers date ranges and check-in refuses overlapping stays"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    module.room_occupancy.invalidate()
+    client = logged_in_client(module.app)
+    today = date.today()
+    try:
+        tonight = client.get('/api/available_rooms').get_json()
+        assert tonight['from'] == today.isoformat() and tonight['to'] == (today + timedelta(days=1)).isoformat()
+        room = tonight['available_rooms'][-1]
+
+        form = {'full_name': 'Long Stay', 'address': 'Haridwar', 'aadhar_number': '123456789012',
+                'mobile_number': '9876543210', 'amount_paid_today': '3000', 'remaining_amount': '0',
+                'check_in_done': 'yes', 'room_number': str(room), 'payment_mode': 'Cash',
+                'male_count': '2', 'female_count': '0',
+                'check_out_date': (today + timedelta(days=4)).isoformat(), 'check_out_time': '11:00'}
+        assert client.post('/checkin', data=form).status_code == 302
+
+        def free(offset_from, offset_to):
+            data = client.get(f'/api/available_rooms?from={today + timedelta(days=offset_from)}'
+                              f'&to={today + timedelta(days=offset_to)}').get_json()
+            return room in data['available_rooms']
+
+        assert not free(0, 1) and not free(3, 4) and not free(2, 9)
+        assert free(4, 6) and free(-30, -20)
+
+        # The same room cannot be booked for a stay that overlaps
+        form.update(full_name='Double Booking', check_out_date=(today + timedelta(days=2)).isoformat())
+        response = client.post('/checkin', data=form)
+        assert response.status_code == 200 and 'not available for the whole stay' in response.get_data(as_text=True)
+        form.update(check_out_date=today.isoformat())
+        assert 'Check-out date must be after today' in client.post('/checkin', data=form).get_data(as_text=True)
+
+        for query in ('from=2025-13-01', 'to=tomorrow', f'from={today}&to={today}'):
+            assert client.get(f'/api/available_rooms?{query}').status_code == 400, query
+
+        conn = sqlite3.connect(db_path)
+        tourist_id = conn.execute("SELECT id FROM tourists WHERE full_name = 'Long Stay'").fetchone()[0]
+        conn.close()
+        client.post(f'/tourist_profile/{tourist_id}/delete')
+        assert free(0, 4)
+    finally:
+        _remove_database(db_path)
+    print("✅ Date-range availability endpoint")
+
+
+def test_range_lookup_speed():
+    """Range availability over years of history stays under a millisecond"""
+    db_path = make_seeded_database(LARGE_ROWS, days=HISTORY_DAYS)
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_occupancy_schema(conn)
+        occupancy = RoomOccupancy(157)
+        today = date.today()
+        ranges = [(today - timedelta(days=offset), today - timedelta(days=offset - nights))
+                  for offset in range(0, HISTORY_DAYS, 37) for nights in (2, 7)]
+
+        def timings(lookup):
+            samples = []
+            for arrival, departure in ranges:
+                started = time.perf_counter()
+                lookup(arrival, departure)
+                samples.append((time.perf_counter() - started) * 1000)
+            return percentile(samples, 50), percentile(samples, 99)
+
+        indexed = timings(lambda a, d: occupancy.free_rooms_for_stay(a, d, conn))
+        # Without the index: an interval test on every stay in the history
+        scanned = timings(lambda a, d: conn.execute(
+            'SELECT DISTINCT room_number FROM tourists WHERE check_in_done = 1 AND check_in_date < ? '
+            'AND (check_out_date > ? OR check_in_date >= ?)',
+            (d.isoformat(), a.isoformat(), a.isoformat())).fetchall())
+
+        for arrival, departure in ranges[:10]:
+            expected = {row[0] for row in conn.execute(
+                'SELECT room_number FROM tourists WHERE check_in_done = 1 AND check_in_date < ? '
+                "AND (check_out_date > ? OR ((check_out_date IS NULL OR check_out_date <= check_in_date) "
+                'AND check_in_date >= ?))', (departure.isoformat(), arrival.isoformat(), arrival.isoformat()))}
+            assert set(occupancy.free_rooms_for_stay(arrival, departure, conn)) == set(range(1, 158)) - expected
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print(f"   {LARGE_ROWS:,} stays over {HISTORY_DAYS} days: R*Tree p50 {indexed[0]:.3f} ms / "
+          f"p99 {indexed[1]:.3f} ms, table scan p50 {scanned[0]:.1f} ms / p99 {scanned[1]:.1f} ms")
+    assert indexed[0] < 1.0, 'range lookup slower than a millisecond'
+    print("✅ Range lookups stay fast")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing multi-night stays...")
+    print("=" * 50)
+    tests = [test_night_numbers, test_index_follows_tourists, test_multi_night_write_through,
+             test_available_rooms_route, test_range_lookup_speed]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
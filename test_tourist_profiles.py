@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script for the keyset-paginated tourist profiles listing
+Checks cursor handling, that pages cover the history exactly once (rows
+without created_at included), the streamed HTML page and JSON endpoint, and
+that deep pages cost the same as the first one.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from profiles import (ProfilePage, profile_page, profile_counts, encode_cursor, decode_cursor,
+                      PROFILE_PAGE_SIZE)
+from bench_common import make_seeded_database, prepare_app, logged_in_client
+
+LARGE_ROWS = int(os.environ.get('PROFILE_BENCH_ROWS', '100000'))
+
+
+def _remove_database(db_path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _walk(conn, limit):
+    pages = []
+    cursor = None
+    while True:
+        tourists, cursor = profile_page(conn, cursor, limit)
+        pages.append(tourists)
+        if not cursor:
+            return pages
+
+
+def test_cursor_tokens():
+    """Cursors round-trip and malformed ones are rejected"""
+    token = encode_cursor('2025-07-04 10:30:00', 42)
+    assert decode_cursor(token) == ('2025-07-04 10:30:00', 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+    for bad in ('', 'not-a-cursor', encode_cursor(1, 1), encode_cursor('2025-07-04', '42')):
+        try:
+            decode_cursor(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f'{bad!r} accepted')
+    print("✅ Cursor tokens")
+
+
+def test_pages_cover_history_once():
+    """Walking the pages returns every guest once, newest first, ties broken by ID"""
+    db_path = make_seeded_database(1000, days=20)
+    try:
+        conn = sqlite3.connect(db_path)
+        database.ensure_indexes(conn)
+        # Guests checked in within the same second
+        conn.execute("UPDATE tourists SET created_at = '2030-01-01 09:00:00' WHERE id BETWEEN 100 AND 180")
+        conn.commit()
+        expected = [row[0] for row in conn.execute('SELECT id FROM tourists ORDER BY created_at DESC, id DESC')]
+
+        pages = _walk(conn, 37)
+        assert all(len(page) == 37 for page in pages[:-1]) and 0 < len(pages[-1]) <= 37
+        assert [t['id'] for page in pages for t in page] == expected
+
+        # New check-ins after the first page do not shift the pages that follow
+        first, cursor = profile_page(conn, None, 50)
+        conn.execute("INSERT INTO tourists (full_name, address, aadhar_number, mobile_number, amount_paid_today, "
+                     "remaining_amount, check_in_done, room_number, check_in_date, created_at) "
+                     "VALUES ('Late Arrival', 'Haridwar', '111111111111', '9999999999', 0, 0, 1, 1, "
+                     "'2031-01-01', '2031-01-01 08:00:00')")
+        second, _ = profile_page(conn, cursor, 50)
+        assert [t['id'] for t in first + second] == expected[:100]
+
+        assert profile_counts(conn) == {'total': 1001, 'checked_in': 1001, 'pending': 0}
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Pages cover the history exactly once")
+
+
+def test_page_boundary_on_missing_created_at():
+    """Legacy rows without created_at come last, and a page may end on one of them"""
+    db_path = make_seeded_database(100, days=5)
+    try:
+        conn = sqlite3.connect(db_path)
+        database.ensure_indexes(conn)
+        conn.execute('UPDATE tourists SET created_at = NULL WHERE id % 10 = 0')
+        conn.commit()
+        dated = [row[0] for row in conn.execute(
+            'SELECT id FROM tourists WHERE created_at IS NOT NULL ORDER BY created_at DESC, id DESC')]
+        expected = dated + list(range(100, 0, -10))
+
+        # 90 dated rows, then the NULL ones by ID: the first page ends on ID 60
+        first, cursor = profile_page(conn, None, 95)
+        assert first[-1]['id'] == 60 and decode_cursor(cursor) == (None, 60)
+        second, last_cursor = profile_page(conn, cursor, 95)
+        assert [t['id'] for t in first + second] == expected and last_cursor is None
+        assert [t['id'] for page in _walk(conn, 7) for t in page] == expected
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print("✅ Page boundary on a row without created_at")
+
+
+def test_routes():
+    """The HTML page streams one page of cards; the JSON endpoint continues from its cursor"""
+    db_path = make_seeded_database(300, days=10)
+    module = prepare_app(db_path)
+    client = logged_in_client(module.app)
+    try:
+        response = client.get('/tourist_profiles')
+        assert response.status_code == 200 and response.is_streamed
+        html = response.get_data(as_text=True)
+        assert html.count('class="profile-card"') == PROFILE_PAGE_SIZE
+        assert '<div class="stat-number">300</div>' in html
+        assert 'id="loadMore"' in html
+
+        conn = sqlite3.connect(db_path)
+        expected = [row[0] for row in conn.execute('SELECT id FROM tourists ORDER BY created_at DESC, id DESC')]
+        conn.close()
+        seen = []
+        cursor = ''
+        while True:
+            data = client.get(f'/api/tourist_profiles?limit=70&cursor={cursor}').get_json()
+            seen.extend(t['id'] for t in data['tourists'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        assert seen == expected
+
+        html = client.get(f'/tourist_profiles?cursor={encode_cursor("2000-01-01 00:00:00", 1)}').get_data(as_text=True)
+        assert 'class="profile-card"' not in html and 'id="loadMore"' not in html
+
+        assert client.get('/api/tourist_profiles?cursor=garbage').status_code == 400
+        assert client.get('/tourist_profiles?cursor=garbage').status_code == 302
+    finally:
+        _remove_database(db_path)
+    print("✅ Streamed page and JSON endpoint")
+
+
+def _timed(call, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def test_deep_pages_stay_fast():
+    """A page deep in the history costs about the same as the first (OFFSET does not)"""
+    db_path = make_seeded_database(LARGE_ROWS)
+    try:
+        conn = sqlite3.connect(db_path)
+        database.ensure_indexes(conn)
+        created_at, tourist_id = conn.execute(
+            'SELECT created_at, id FROM tourists ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?',
+            (LARGE_ROWS - 2 * PROFILE_PAGE_SIZE,)).fetchone()
+        deep_cursor = encode_cursor(created_at, tourist_id)
+
+        first = _timed(lambda: profile_page(conn))
+        deep = _timed(lambda: profile_page(conn, deep_cursor))
+        offset = _timed(lambda: conn.execute(
+            'SELECT * FROM tourists ORDER BY created_at DESC LIMIT ? OFFSET ?',
+            (PROFILE_PAGE_SIZE, LARGE_ROWS - 2 * PROFILE_PAGE_SIZE)).fetchall())
+
+        # Old route: every profile built into a list before rendering starts
+        started = time.perf_counter()
+        everything = list(ProfilePage(conn, limit=LARGE_ROWS))
+        full_list = (time.perf_counter() - started) * 1000
+        conn.close()
+    finally:
+        _remove_database(db_path)
+    print(f"   {LARGE_ROWS:,} guests: first page {first:.2f} ms, last page {deep:.2f} ms "
+          f"(OFFSET {offset:.2f} ms), whole list {full_list:.0f} ms for {len(everything):,} profiles")
+    assert deep < first * 3 + 1, 'deep pages get slower'
+    print("✅ Deep pages stay fast")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing tourist profiles listing...")
+    print("=" * 50)
+    tests = [test_cursor_tokens, test_pages_cover_history_once, test_page_boundary_on_missing_created_at, test_routes,
+             test_deep_pages_stay_fast]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("=" * 50)
+    print(f"Test Results: {passed}/{len(tests)} tests passed")
+    return 0 if passed == len(tests) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())